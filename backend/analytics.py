@@ -4,88 +4,150 @@ Sistema de análisis de datos para optimización hotelera
 """
 
 import pandas as pd
-import sqlite3
+from db import BaseDatos
+from inventario import capacidades_desde_hotel
+from ocupacion import VENTANA_DIAS, CalendarioOcupacion, fecha_dia, numero_dia, ventana_reciente
+from router_faq import cargar_hotel_info
+from rollups import DIMENSIONES, NOCHES, actualizar_rollups, resumen_analytics
 from datetime import datetime
 import matplotlib
 matplotlib.use('Agg')  # Para guardar gráficos sin mostrar ventanas
 import matplotlib.pyplot as plt
 
-def analizar_reservas():
-    """Análisis completo de reservas del hotel"""
+MESES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+# Columnas que lee el análisis por bloques (nombre, email y teléfono no se leen). El mes y las
+# noches se calculan en SQLite con las mismas expresiones que los rollups, así los dos dan igual.
+CONSULTA_ANALISIS = f"""
+    SELECT COALESCE(tipo_habitacion, '') AS tipo_habitacion, COALESCE(estado, '') AS estado,
+           COALESCE(CAST(huespedes AS INTEGER), -1) AS huespedes, COALESCE(precio_total, 0.0) AS precio_total,
+           {DIMENSIONES['mes']} AS mes, {NOCHES} AS noches
+    FROM reservas"""
+TIPOS_ANALISIS = {'tipo_habitacion': 'category', 'estado': 'category', 'huespedes': 'int32',
+                  'precio_total': 'float64', 'mes': 'category', 'noches': 'int32'}
+
+def leer_bloques(conn, tamano_bloque=100000):
+    """
+    Reservas de a `tamano_bloque` filas con tipos compactos: categorías para tipo, estado y mes,
+    int32 para huéspedes (-1 si falta) y noches. La memoria depende del bloque, no de la tabla.
+    """
+    for bloque in pd.read_sql_query(CONSULTA_ANALISIS, conn, chunksize=tamano_bloque):
+        yield bloque.astype(TIPOS_ANALISIS)
+
+def resumen_por_bloques(conn, tamano_bloque=100000):
+    """
+    Mismo resultado que rollups.resumen_analytics, pero calculado desde la tabla de reservas
+    (para verificar los rollups o analizar una base sin ellos). Cada bloque aporta sumas y
+    cuentas parciales que se acumulan; los promedios se calculan al final.
+    """
+    columnas = ['precio_total', 'noches']
+    parciales = {'tipo_habitacion': None, 'mes': None, 'huespedes': None}
+    for bloque in leer_bloques(conn, tamano_bloque):
+        bloque['reservas'] = 1
+        for clave, acumulado in parciales.items():
+            parcial = bloque.groupby(clave, observed=True)[['reservas'] + columnas].sum()
+            # se combina con lo acumulado en cada bloque: la memoria no crece con la cantidad de bloques
+            if acumulado is not None:
+                parcial = pd.concat([acumulado, parcial]).groupby(level=0).sum()
+            parciales[clave] = parcial
+
+    def filas(clave):
+        tabla = parciales[clave]
+        if tabla is None:
+            return {}
+        return {(int(k) if k >= 0 else '') if clave == 'huespedes' else str(k): {
+            'reservas': int(f['reservas']), 'ingresos': float(f['precio_total']), 'noches': int(f['noches'])
+        } for k, f in tabla.iterrows()}
+
+    por_tipo = filas('tipo_habitacion')
+    for totales in por_tipo.values():
+        totales['ingreso_promedio'] = round(totales['ingresos'] / totales['reservas'], 2) if totales['reservas'] else 0
+    reservas = sum(t['reservas'] for t in por_tipo.values())
+    ingresos = sum(t['ingresos'] for t in por_tipo.values())
+    noches = sum(t['noches'] for t in por_tipo.values())
+    return {
+        'total': {
+            'reservas': reservas,
+            'ingresos': ingresos,
+            'ingreso_promedio': round(ingresos / reservas, 2) if reservas else 0,
+            'noches': noches,
+            'noches_promedio': round(noches / reservas, 2) if reservas else 0
+        },
+        'por_tipo': por_tipo,
+        'por_mes': [{'mes': mes, **t} for mes, t in sorted(filas('mes').items())],
+        'por_huespedes': [
+            {'huespedes': h, **t, 'precio_promedio': round(t['ingresos'] / t['reservas'], 2) if t['reservas'] else 0}
+            for h, t in sorted(filas('huespedes').items(), key=lambda item: str(item[0]))  # mismo orden que los rollups
+        ]
+    }
+
+def analizar_reservas(por_bloques=False, tamano_bloque=100000, desde=None, hasta=None):
+    """
+    Análisis completo de reservas del hotel.
+    Por defecto lee los rollups (rollups.py) en lugar de toda la tabla: antes suma las reservas
+    nuevas desde la última corrida, así que tarda lo mismo con cien reservas que con millones.
+    Con por_bloques=True recalcula todo desde la tabla, de a tamano_bloque filas.
+    desde/hasta (YYYY-MM-DD): ventana de la tasa de ocupación (por defecto, el último año con reservas).
+    """
     
     print("=" * 70)
     print("📊 ANÁLISIS DE DATOS - GRAN HOTEL BELL VILLE")
     print("=" * 70)
     
-    # Conectar a la base de datos
-    conn = sqlite3.connect('reservas.db')
-    
-    # Leer datos
-    df = pd.read_sql_query("SELECT * FROM reservas", conn)
-    conn.close()
-    
-    # Convertir fechas con formato flexible
-    df['fecha_checkin'] = pd.to_datetime(df['fecha_checkin'], format='mixed', errors='coerce')
-    df['fecha_checkout'] = pd.to_datetime(df['fecha_checkout'], format='mixed', errors='coerce')
-    df['fecha_reserva'] = pd.to_datetime(df['fecha_reserva'], format='mixed', errors='coerce')
-    
-    # Calcular noches
-    df['noches'] = (df['fecha_checkout'] - df['fecha_checkin']).dt.days
-    
-    # Extraer mes y día de la semana
-    df['mes'] = df['fecha_checkin'].dt.month
-    df['dia_semana'] = df['fecha_checkin'].dt.day_name()
+    # Leer datos: rollups al día, o la tabla completa por bloques
+    db = BaseDatos()
+    db.migrar()
+    with db.conexion() as conn:
+        if por_bloques:
+            resumen = resumen_por_bloques(conn, tamano_bloque)
+        else:
+            actualizar_rollups(conn)
+            resumen = resumen_analytics(conn)
+        ocupacion = calcular_ocupacion(conn, desde, hasta)
+    total = resumen['total']
     
     print(f"\n📈 ESTADÍSTICAS GENERALES")
     print("-" * 70)
-    print(f"Total de reservas:        {len(df)}")
-    print(f"Ingresos totales:         ${df['precio_total'].sum():,.2f}")
-    print(f"Ingreso promedio:         ${df['precio_total'].mean():,.2f}")
-    print(f"Estancia promedio:        {df['noches'].mean():.1f} noches")
-    print(f"Tasa de ocupación:        {calcular_ocupacion(df):.1f}%")
+    print(f"Total de reservas:        {total['reservas']}")
+    print(f"Ingresos totales:         ${total['ingresos']:,.2f}")
+    print(f"Ingreso promedio:         ${total['ingreso_promedio']:,.2f}")
+    print(f"Estancia promedio:        {total['noches_promedio']:.1f} noches")
+    if ocupacion:
+        print(f"Tasa de ocupación:        {ocupacion['ocupacion']:.1f}% "
+              f"({ocupacion['desde']} a {ocupacion['hasta']}, {ocupacion['habitaciones']} habitaciones)")
+        print(f"Noche de mayor ocupación: {ocupacion['noche_pico']['noche']} "
+              f"({ocupacion['noche_pico']['ocupadas']} habitaciones)")
     
     print(f"\n🏨 ANÁLISIS POR TIPO DE HABITACIÓN")
     print("-" * 70)
-    habitaciones = df.groupby('tipo_habitacion').agg({
-        'id': 'count',
-        'precio_total': ['sum', 'mean']
-    }).round(2)
-    
+    habitaciones = pd.DataFrame.from_dict(resumen['por_tipo'], orient='index')
+    habitaciones = habitaciones[['reservas', 'ingresos', 'ingreso_promedio']].sort_index().round(2)
     habitaciones.columns = ['Reservas', 'Ingresos Totales', 'Ingreso Promedio']
+    if ocupacion:
+        habitaciones['Ocupación %'] = pd.Series(ocupacion['por_tipo'])
     print(habitaciones.to_string())
     
     print(f"\n📅 DEMANDA POR MES")
     print("-" * 70)
-    meses = df.groupby('mes').agg({
-        'id': 'count',
-        'precio_total': 'sum'
-    }).round(2)
-    
-    meses.columns = ['Reservas', 'Ingresos']
-    meses.index = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 
-                   'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic'][:len(meses)]
+    meses = demanda_por_mes(resumen)
     print(meses.to_string())
     
     print(f"\n👥 ANÁLISIS POR CANTIDAD DE HUÉSPEDES")
     print("-" * 70)
-    huespedes = df.groupby('huespedes').agg({
-        'id': 'count',
-        'precio_total': 'mean'
-    }).round(2)
-    
+    huespedes = pd.DataFrame(resumen['por_huespedes']).set_index('huespedes')[['reservas', 'precio_promedio']]
     huespedes.columns = ['Reservas', 'Precio Promedio']
     print(huespedes.to_string())
     
     print(f"\n🎯 HABITACIÓN MÁS RENTABLE")
     print("-" * 70)
-    mas_rentable = df.groupby('tipo_habitacion')['precio_total'].sum().idxmax()
-    ingresos_max = df.groupby('tipo_habitacion')['precio_total'].sum().max()
+    mas_rentable = habitaciones['Ingresos Totales'].idxmax()
+    ingresos_max = habitaciones['Ingresos Totales'].max()
     print(f"Tipo: {mas_rentable}")
     print(f"Ingresos totales: ${ingresos_max:,.2f}")
     
     print(f"\n📊 RECOMENDACIONES")
     print("-" * 70)
-    generar_recomendaciones(df)
+    generar_recomendaciones(resumen, habitaciones, meses)
     
     # Guardar análisis en archivo
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -94,36 +156,54 @@ def analizar_reservas():
     with open(filename, 'w', encoding='utf-8') as f:
         f.write(f"ANÁLISIS DE RESERVAS - {datetime.now()}\n")
         f.write("=" * 70 + "\n\n")
-        f.write(f"Total reservas: {len(df)}\n")
-        f.write(f"Ingresos totales: ${df['precio_total'].sum():,.2f}\n")
+        f.write(f"Total reservas: {total['reservas']}\n")
+        f.write(f"Ingresos totales: ${total['ingresos']:,.2f}\n")
         f.write(f"\nAnálisis por habitación:\n{habitaciones}\n")
     
     print(f"\n✅ Análisis completado con éxito")
     print("=" * 70)
     
-    return df
+    return resumen
 
-def calcular_ocupacion(df):
-    """Calcula la tasa de ocupación aproximada"""
-    total_habitaciones = 29  # Total de habitaciones del hotel
-    dias_periodo = 30  # Mes
-    capacidad_total = total_habitaciones * dias_periodo
-    
-    noches_reservadas = df['noches'].sum()
-    ocupacion = (noches_reservadas / capacidad_total) * 100
-    
-    return min(ocupacion, 100)  # Máximo 100%
+def demanda_por_mes(resumen):
+    """Reservas e ingresos por mes del año (enero a diciembre, sumando todos los años)"""
+    por_mes = pd.DataFrame(resumen['por_mes'])
+    por_mes = por_mes[por_mes['mes'] != '']
+    por_mes['numero'] = por_mes['mes'].str[5:7].astype(int)
+    meses = por_mes.groupby('numero')[['reservas', 'ingresos']].sum().round(2)
+    meses.columns = ['Reservas', 'Ingresos']
+    meses.index = [MESES[n - 1] for n in meses.index]
+    return meses
+
+def calcular_ocupacion(conn, desde=None, hasta=None):
+    """
+    Tasa de ocupación noche por noche (ocupacion.py) con las habitaciones de hotel_info.json:
+    total, por tipo y noche pico. Sin fechas usa el último año con reservas (ventana_reciente);
+    con una sola, el año que empieza o termina en ella. Solo lee las reservas de la ventana.
+    None si no hay reservas.
+    """
+    if desde is None and hasta is None:
+        ventana = ventana_reciente(conn)
+        if ventana is None:
+            return None
+        desde, hasta = ventana
+    elif hasta is None:
+        hasta = fecha_dia(numero_dia(desde) + VENTANA_DIAS - 1)
+    elif desde is None:
+        desde = fecha_dia(numero_dia(hasta) - VENTANA_DIAS + 1)
+    capacidades = capacidades_desde_hotel(cargar_hotel_info())
+    return CalendarioOcupacion.desde_base(conn, capacidades, desde, hasta).resumen(desde, hasta)
 
-def generar_recomendaciones(df):
+def generar_recomendaciones(resumen, habitaciones, meses):
     """Genera recomendaciones basadas en los datos"""
     
     # 1. Habitación más popular
-    mas_popular = df['tipo_habitacion'].value_counts().idxmax() # Devuelve el índice (posicion) del primer valor máximo
+    mas_popular = habitaciones['Reservas'].idxmax()
     print(f"1. La habitación '{mas_popular}' es la más demandada")
     print(f"   💡 Considerar aumentar la cantidad de este tipo")
     
     # 2. Mes de mayor demanda
-    mes_alto = df['mes'].value_counts().idxmax()
+    mes_alto = MESES.index(meses['Reservas'].idxmax()) + 1
     meses_nombres = {1:'Enero', 2:'Febrero', 3:'Marzo', 4:'Abril', 
                      5:'Mayo', 6:'Junio', 7:'Julio', 8:'Agosto',
                      9:'Septiembre', 10:'Octubre', 11:'Noviembre', 12:'Diciembre'}
@@ -131,78 +211,56 @@ def generar_recomendaciones(df):
     print(f"   💡 Implementar precios dinámicos en temporada alta")
     
     # 3. Duración promedio
-    promedio_noches = df['noches'].mean()
+    promedio_noches = resumen['total']['noches_promedio']
     if promedio_noches < 2:
         print(f"\n3. La estancia promedio es corta ({promedio_noches:.1f} noches)")
         print(f"   💡 Ofrecer paquetes con descuento para estadías largas")
     
     # 4. Análisis de precios
-    precio_medio = df['precio_total'].mean()
+    precio_medio = resumen['total']['ingreso_promedio']
     print(f"\n4. Precio promedio por reserva: ${precio_medio:,.2f}")
     print(f"   💡 Optimizar precios basados en demanda y temporada")
 
-def generar_datos_prueba():
-    """Genera datos de prueba si no existen"""
-    import random
+def generar_datos_prueba(cantidad=50, semilla=42):
+    """
+    Genera reservas de prueba si la base está vacía, con check-in en los últimos 6 meses.
+    Usa generador.py (precios del motor de precios y demanda por temporada); para bases grandes:
+    python generador.py --reservas 5000 (o --reservas 1000000 --sin-limite)
+    """
+    from datetime import timedelta
+    from generador import cargar, generador_desde_hotel
     
-    conn = sqlite3.connect('reservas.db')
-    cursor = conn.cursor()
+    db = BaseDatos()
+    db.migrar()
     
     # Verificar si ya hay datos
-    cursor.execute("SELECT COUNT(*) FROM reservas")
-    count = cursor.fetchone()[0]
+    with db.conexion() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM reservas").fetchone()[0]
     
     if count > 0:
         print(f"✅ Ya existen {count} reservas en la base de datos")
-        conn.close()
         return
     
-    # Si la base de datos está vacía genera datos de prueba aleatorios
+    # Si la base de datos está vacía genera datos de prueba
     print("🔄 Generando datos de prueba...")
+    hoy = datetime.now().date()
+    generador = generador_desde_hotel(cargar_hotel_info(), hoy - timedelta(days=180), hoy, semilla)
+    cargar(db, generador, cantidad)
     
-    tipos_habitacion = ['matrimonial', 'doble', 'triple_matrimonial', 'triple_individual']
-    nombres = ['Juan Pérez', 'María García', 'Carlos López', 'Ana Martínez', 
-               'Pedro Rodríguez', 'Laura Fernández', 'Diego Silva', 'Sofía Torres']
-    
-    from unidecode import unidecode
-    
-    # Normalizar caracteres especiales
-    nombres = [unidecode(n) for n in nombres]
-    
-    from datetime import timedelta
-    
-    # Generar 50 reservas
-    for i in range(50):
-        nombre = random.choice(nombres)
-        email = f"{nombre.split()[0].lower()}@email.com"
-        telefono = f"+54 9 3537 {random.randint(100000, 999999)}"
-        tipo = random.choice(tipos_habitacion)
-        
-        # Fechas aleatorias en los últimos 6 meses
-        dias_atras = random.randint(0, 180)
-        fecha_checkin = (datetime.now() - timedelta(days=dias_atras)).date()
-        fecha_checkout = fecha_checkin + timedelta(days=random.randint(1, 7))
-        
-        huespedes = random.randint(1, 3)
-        precio_total = random.randint(25000, 100000)
-        estado = 'confirmada'
-        fecha_reserva = datetime.now()
-        
-        cursor.execute('''INSERT INTO reservas 
-                         (nombre, email, telefono, tipo_habitacion, fecha_checkin, 
-                          fecha_checkout, huespedes, precio_total, estado, fecha_reserva)
-                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                      (nombre, email, telefono, tipo, fecha_checkin, fecha_checkout,
-                       huespedes, precio_total, estado, fecha_reserva))
-    
-    conn.commit()
-    conn.close()
-    
-    print("✅ 50 reservas de prueba generadas")
+    print(f"✅ {cantidad} reservas de prueba generadas")
 
 if __name__ == "__main__":
     print("\n🏨 SISTEMA DE ANÁLISIS DE DATOS - GRAN HOTEL BELL VILLE\n")
     
+    import argparse
+    parser = argparse.ArgumentParser(description='Análisis de reservas')
+    parser.add_argument('--por-bloques', action='store_true',
+                        help='recalcular desde la tabla de reservas en lugar de leer los rollups')
+    parser.add_argument('--bloque', type=int, default=100000, help='filas por bloque con --por-bloques')
+    parser.add_argument('--desde', help='inicio de la ventana de ocupación (YYYY-MM-DD)')
+    parser.add_argument('--hasta', help='fin de la ventana de ocupación (YYYY-MM-DD, inclusive)')
+    args = parser.parse_args()
+    
     # Generar datos si no existen
     generar_datos_prueba()
     
@@ -215,7 +273,7 @@ if __name__ == "__main__":
     original_stdout = sys.stdout  # Guardar la salida original
     with open(filename, 'w', encoding='utf-8') as f:
         sys.stdout = f  # Redirigir todo el print al archivo
-        df = analizar_reservas()
+        resumen = analizar_reservas(args.por_bloques, args.bloque, args.desde, args.hasta)
         sys.stdout = original_stdout  # Restaurar la salida original
     
-print(f"\n✅ Análisis completado y guardado en: {filename}\n")
\ No newline at end of file
+    print(f"\n✅ Análisis completado y guardado en: {filename}\n")
\ No newline at end of file
@@ -1,22 +1,105 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+import io
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from unidecode import unidecode
-import sqlite3
+from urllib.parse import urlencode
+import time
+import threading
+from router_faq import RouterFAQ, cargar_hotel_info
+from constructor_prompt import ConstructorPrompt, estimar_tokens
+from cache_respuestas import CacheSemantica, huella_datos, textos_corpus
+from sesiones import AlmacenSesiones
+from contexto import GestorContexto
+from precios import CalendarioTemporadas, MotorPrecios, feriados_desde_hotel, parsear_fecha
+from db import BaseDatos
+from limitador import LimitadorLLM, Saturado
+from vuelo_unico import VueloUnico
+from llm_backends import crear_backend
+from cliente_llm import ClienteLLM, Circuito, CircuitoAbierto
+from inventario import InventarioHabitaciones, SinDisponibilidad, capacidades_desde_hotel
+from metricas import Metricas, LIMITES_BYTES
+from escritor_lotes import EscritorLotes
+from importador import ImportadorReservas, detectar_formato, leer_csv, leer_ndjson
+from consultas import LIMITE_POR_DEFECTO, buscar_reservas, campos_desde_args, filtros_desde_args, listar_reservas
+from exportador import TIPOS_CONTENIDO, exportar_reservas
+from rollups import actualizar_rollups, resumen_analytics
 
 # Cargar .env
 load_dotenv()
 
 app = Flask(__name__) # crea una instancia de la aplicación web Flask
-CORS(app) # permite peticiones desde cualquier origen
+CORS(app, expose_headers=['X-Cursor-Siguiente', 'Link', 'Retry-After']) # permite peticiones desde cualquier origen
 
-# Configurar Gemini
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.5-flash')
+# Métricas en formato Prometheus (GET /api/metrics): duración de cada pedido y de los tramos calientes
+metricas = Metricas(prefijo='hotel')
+metricas.contador('http_pedidos_total', 'Pedidos HTTP por método, ruta y estado')
+metricas.histograma('http_segundos', 'Duración de los pedidos HTTP (en streaming, hasta enviar los encabezados)')
+metricas.histograma('prompt_segundos', 'Tiempo de armado del prompt')
+metricas.histograma('prompt_bytes', 'Tamaño del prompt enviado al modelo', LIMITES_BYTES)
+metricas.histograma('llm_segundos', 'Latencia de la respuesta del modelo (incluye reintentos y espera en cola)')
+metricas.histograma('respuesta_bytes', 'Tamaño de la respuesta del modelo', LIMITES_BYTES)
+metricas.contador('chat_respuestas_total', 'Respuestas del chat por origen (faq, cache, gemini, contingencia)')
+metricas.histograma('sqlite_segundos', 'Duración de las consultas a SQLite')
+metricas.histograma('json_segundos', 'Serialización de las respuestas JSON')
+
+# Pedidos más lentos que METRICAS_LENTO_MS se registran en el log (0 = desactivado)
+LENTO_MS = float(os.getenv('METRICAS_LENTO_MS', 0))
+
+class ProveedorJSONMedido(DefaultJSONProvider):
+    """jsonify con el tiempo de serialización registrado en métricas"""
+    def response(self, *args, **kwargs):
+        with metricas.medir('json_segundos'):
+            return super().response(*args, **kwargs)
+
+app.json = ProveedorJSONMedido(app)
+
+@app.before_request
+def iniciar_medicion():
+    g.inicio_pedido = time.perf_counter()
+
+@app.after_request
+def registrar_medicion(response):
+    inicio = g.pop('inicio_pedido', None)
+    if inicio is None:
+        return response
+    segundos = time.perf_counter() - inicio
+    ruta = request.url_rule.rule if request.url_rule else 'desconocida'
+    metricas.observar('http_segundos', segundos, metodo=request.method, ruta=ruta)
+    metricas.contar('http_pedidos_total', metodo=request.method, ruta=ruta, estado=response.status_code)
+    if LENTO_MS and segundos * 1000 >= LENTO_MS:
+        app.logger.warning('Pedido lento: %s %s → %s en %.0f ms', request.method, request.full_path.rstrip('?'),
+                           response.status_code, segundos * 1000)
+    return response
+
+# Modelo de lenguaje: Gemini, o un backend local (stub / replay) para pruebas sin clave (ver llm_backends.py)
+model = crear_backend(os.getenv('LLM_BACKEND', 'gemini'))
+
+# Llamadas a Gemini: como máximo LLM_MAX_CONCURRENTES a la vez, LLM_MAX_COLA en espera y LLM_TIMEOUT segundos cada una
+limitador_llm = LimitadorLLM(
+    max_concurrentes=int(os.getenv('LLM_MAX_CONCURRENTES', 4)),
+    max_cola=int(os.getenv('LLM_MAX_COLA', 16)),
+    timeout_segundos=float(os.getenv('LLM_TIMEOUT', 30))
+)
+
+# Reintentos con jitter, hedging opcional (LLM_HEDGING=1) y circuit breaker alrededor de Gemini
+cliente_llm = ClienteLLM(
+    model, limitador_llm,
+    plazo_segundos=limitador_llm.timeout_segundos,
+    reintentos=int(os.getenv('LLM_REINTENTOS', 2)),
+    hedging=os.getenv('LLM_HEDGING', '0') == '1',
+    circuito=Circuito(
+        umbral_fallos=int(os.getenv('LLM_CIRCUITO_FALLOS', 5)),
+        enfriamiento_segundos=float(os.getenv('LLM_CIRCUITO_ENFRIAMIENTO', 30))
+    )
+)
+
+# Pedidos simultáneos con el mismo prompt efectivo comparten una sola llamada a Gemini
+vuelos_llm = VueloUnico(espera_maxima=limitador_llm.timeout_segundos)
 
 # Base de datos de habitaciones
 HABITACIONES = {
@@ -50,154 +133,193 @@ HABITACIONES = {
     }
 }
 
-# Información del hotel
-HOTEL_INFO = """
-Gran Hotel Bell Ville
-Ubicación: Bell Ville, Córdoba, Argentina
-Dirección: Av. San Martín 123, Bell Ville
-
-SERVICIOS:
-- WiFi gratuito en todas las áreas
-- Desayuno buffet incluido (7:00 - 10:00 hs)
-- Estacionamiento gratuito
-- Servicio de limpieza diario
-- Recepción 24 horas
-- Piscina climatizada
-- Gimnasio
-- Sala de conferencias
-
-HORARIOS:
-- Check-in: 14:00 hs
-- Check-out: 10:00 hs
-
-POLÍTICAS:
-- Cancelación gratuita hasta 48 hs antes del check-in
-- Se requiere tarjeta de crédito para garantizar la reserva
-- No se permiten mascotas
-- Niños menores de 5 años no pagan
-
-TEMPORADAS:
-- Temporada Alta: Diciembre a Febrero, Semana Santa, feriados largos
-- Temporada Baja: Resto del año
-
-FORMAS DE PAGO:
-- Efectivo
-- Tarjetas de débito y crédito (Visa, Mastercard, American Express)
-- Transferencia bancaria
-"""
+# Información del hotel (datos/hotel_info.json)
+HOTEL = cargar_hotel_info()
+
+# Huella de los datos que usa el prompt (se cargan al iniciar): si cambian, se invalida la caché
+VERSION_DATOS = huella_datos(HABITACIONES, HOTEL)
 
 # Inicializar base de datos
-def init_db():
-    conn = sqlite3.connect('reservas.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS reservas
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  nombre TEXT,
-                  email TEXT,
-                  telefono TEXT,
-                  tipo_habitacion TEXT,
-                  fecha_checkin TEXT,
-                  fecha_checkout TEXT,
-                  huespedes INTEGER,
-                  precio_total REAL,
-                  estado TEXT,
-                  fecha_reserva TEXT)''')
-    conn.commit()
-    conn.close()
-
-# Crear tabla reservas si no existe
-init_db()
-
-# Contexto del sistema para Gemini
-SYSTEM_PROMPT = f"""Eres un asistente virtual del Gran Hotel Bell Ville en Bell Ville, Córdoba, Argentina. 
-Tu nombre es BellBot y eres amable, profesional y eficiente.
-
-INFORMACIÓN DEL HOTEL:
-{HOTEL_INFO}
-
-TIPOS DE HABITACIONES DISPONIBLES:
-{json.dumps(HABITACIONES, indent=2, ensure_ascii=False)}
-
-INSTRUCCIONES:
-1. Saluda cordialmente y ofrece ayuda
-2. Si preguntan por habitaciones, describe las opciones disponibles con sus características y precios
-3. Para hacer una reserva, solicita: nombre, email, teléfono, tipo de habitación, fechas (check-in y check-out), número de huéspedes
-4. Calcula precios según la temporada (verifica las fechas)
-5. Responde preguntas sobre servicios, políticas, ubicación, etc.
-6. Si no tienes información, sé honesto y ofrece contactar a recepción
-7. Mantén un tono profesional pero amigable
-8. Responde siempre en español argentino
-
-IMPORTANTE SOBRE IMÁGENES:
-- NO menciones que vas a mostrar imágenes, fotos o contenido visual
-- NO digas frases como "te muestro la imagen" o "aquí está la foto"
-- El sistema automáticamente muestra las imágenes cuando preguntan por habitaciones
-- Simplemente describe las características de las habitaciones sin mencionar imágenes
-- Enfócate en dar información útil: tamaño, comodidades, precio, capacidad
-
-EJEMPLO CORRECTO:
-Usuario: "Quiero ver una habitación matrimonial"
-Tu respuesta: "¡Por supuesto! La Habitación Matrimonial es ideal para parejas. Cuenta con una cama de 2 plazas (1.40m x 1.90m), baño privado, aire acondicionado, TV LED, WiFi gratuito y minibar. El precio es de $25,000 por noche en temporada baja y $35,000 en temporada alta. ¿Te gustaría hacer una reserva o necesitas información sobre otro tipo de habitación?"
-
-EJEMPLO INCORRECTO (NO HACER):
-"Te muestro la imagen de la habitación matrimonial..." ← NO DECIR ESTO
-"Si estuviéramos en una plataforma visual..." ← NO DECIR ESTO
-"Aquí tienes la foto..." ← NO DECIR ESTO
-"""
+db = BaseDatos(
+    max_conexiones=int(os.getenv('DB_MAX_CONEXIONES', 8)),
+    busy_timeout_ms=int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000)),
+    sincronizacion=os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+)
+
+# Crear tabla reservas e índices si no existen (migraciones pendientes)
+db.migrar()
+
+SQL_INSERTAR_RESERVA = '''INSERT INTO reservas 
+                          (nombre, email, telefono, tipo_habitacion, fecha_checkin, 
+                           fecha_checkout, huespedes, precio_total, estado, fecha_reserva)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+# Group commit opcional (DB_ESCRITURA_LOTES=1): las reservas se insertan de a lotes con un solo commit
+escritor_reservas = None
+if os.getenv('DB_ESCRITURA_LOTES', '0') == '1':
+    escritor_reservas = EscritorLotes(
+        db, SQL_INSERTAR_RESERVA,
+        max_lote=int(os.getenv('DB_LOTE_MAX', 64)),
+        espera_maxima_ms=float(os.getenv('DB_LOTE_ESPERA_MS', 0))
+    )
+
+# Calendario de temporadas (verano, Semana Santa y feriados largos) y precios precalculados por día
+calendario_temporadas = CalendarioTemporadas(feriados_largos=feriados_desde_hotel(HOTEL))
+motor_precios = MotorPrecios(HABITACIONES, calendario_temporadas)
+
+# Inventario: habitaciones ocupadas por noche y por tipo (capacidad desde hotel_info.json)
+def cargar_inventario():
+    inventario = InventarioHabitaciones(capacidades_desde_hotel(HOTEL))
+    with metricas.medir('sqlite_segundos', consulta='cargar_inventario'), db.conexion() as conn:
+        inventario.cargar(conn.execute('SELECT tipo_habitacion, fecha_checkin, fecha_checkout, estado FROM reservas'))
+    return inventario
+
+inventario = cargar_inventario()
+
+# Rollups de analytics: un hilo en segundo plano suma las reservas que falten al iniciar (la primera
+# vez, todo el historial), apenas se insertan reservas nuevas y cada ROLLUPS_INTERVALO_SEGUNDOS
+# (reservas cargadas por otro proceso). GET /api/analytics solo lee los rollups
+reservas_nuevas = threading.Event()
+
+def mantener_rollups():
+    intervalo = float(os.getenv('ROLLUPS_INTERVALO_SEGUNDOS', 60))
+    while True:
+        try:
+            with db.conexion() as conn:
+                actualizar_rollups(conn)
+        except Exception as e:
+            app.logger.warning('No se pudieron actualizar los rollups: %s', e)
+        reservas_nuevas.wait(intervalo)
+        reservas_nuevas.clear()
+
+threading.Thread(target=mantener_rollups, name='rollups', daemon=True).start()
+
+# Router de preguntas frecuentes: responde desde datos/hotel_info.json sin llamar a Gemini
+router_faq = RouterFAQ(HOTEL)
+
+# Prompt por recuperación: solo las secciones de hotel_info.json relevantes a cada mensaje
+constructor_prompt = ConstructorPrompt(HOTEL, HABITACIONES, top_k=int(os.getenv('PROMPT_TOP_K', 3)))
+
+# Historial acotado por tokens: mensajes recientes textuales + resumen de los anteriores
+gestor_contexto = GestorContexto(
+    presupuesto_tokens=int(os.getenv('HISTORIAL_MAX_TOKENS', 1200)),
+    max_tokens_mensaje=int(os.getenv('MENSAJE_MAX_TOKENS', 400)),
+    max_tokens_resumen=int(os.getenv('RESUMEN_MAX_TOKENS', 300)),
+    max_mensajes=int(os.getenv('SESION_MAX_MENSAJES', 20)) - 4
+)
+
+# Sesiones de conversación: el cliente envía solo el mensaje nuevo y su session_id.
+# Lo que sale de la sesión (por el tope o al armar el prompt) se pliega en su resumen
+sesiones = AlmacenSesiones(
+    max_mensajes=int(os.getenv('SESION_MAX_MENSAJES', 20)),
+    max_bytes=int(os.getenv('SESIONES_MAX_BYTES', 16 * 1024 * 1024)),
+    ttl_segundos=int(os.getenv('SESION_TTL_SEGUNDOS', 1800)),
+    plegador=gestor_contexto.plegar
+)
+
+# Caché semántica de respuestas de Gemini (LRU + TTL)
+cache_respuestas = CacheSemantica(
+    corpus=textos_corpus(HOTEL),
+    max_entradas=int(os.getenv('CACHE_MAX_ENTRADAS', 512)),
+    ttl_segundos=int(os.getenv('CACHE_TTL_SEGUNDOS', 3600)),
+    umbral_similitud=float(os.getenv('CACHE_UMBRAL_SIMILITUD', 0.92)),
+    version=VERSION_DATOS
+)
 
 def es_temporada_alta(fecha_str):
-    """Determina si una fecha está en temporada alta"""
-    try:
-        fecha = datetime.strptime(fecha_str, "%Y-%m-%d")
-        mes = fecha.month
-        
-        # Temporada alta: Diciembre-Febrero (12, 1, 2)
-        if mes in [12, 1, 2]:
-            return True
-        
-        # Semana Santa (aproximación: marzo-abril)
-        if mes in [3, 4]:
-            dia = fecha.day
-            if 10 <= dia <= 20:  # Aproximación de Semana Santa
-                return True
-        
-        return False
-    except:
-        return False
+    """Determina si una fecha está en temporada alta (consulta el calendario precalculado)"""
+    fecha = parsear_fecha(fecha_str)
+    return calendario_temporadas.es_alta(fecha) if fecha else False
 
 def calcular_precio_reserva(tipo_habitacion, fecha_checkin, fecha_checkout):
     """Calcula el precio total de una reserva"""
     try:
-        checkin = datetime.strptime(fecha_checkin, "%Y-%m-%d")
-        checkout = datetime.strptime(fecha_checkout, "%Y-%m-%d")
-        noches = (checkout - checkin).days
-        
-        if noches <= 0:
-            return None
-        
-        habitacion = HABITACIONES.get(tipo_habitacion)
-        if not habitacion:
-            return None
-        
-        precio_total = 0
-        fecha_actual = checkin
-        
-        # suma el precio por cada noche de la estadía
-        while fecha_actual < checkout:
-            if es_temporada_alta(fecha_actual.strftime("%Y-%m-%d")):
-                precio_total += habitacion["precio_temporada_alta"]
-            else:
-                precio_total += habitacion["precio_temporada_baja"]
-            fecha_actual += timedelta(days=1)
-        
-        return {
-            "noches": noches,
-            "precio_total": precio_total,
-            "precio_promedio_noche": precio_total / noches
-        }
-    except:
+        return motor_precios.cotizar(tipo_habitacion, fecha_checkin, fecha_checkout)
+    except Exception:
         return None
 
+def construir_contexto(user_message, conversation_history, session_id=None):
+    """
+    Arma el prompt completo: instrucciones + secciones relevantes del hotel + historial + mensaje actual.
+    El historial se recorta por presupuesto de tokens; lo que no entra se pliega en un resumen
+    que, si hay sesión, queda guardado en ella.
+    Devuelve (prompt, info) donde info indica las secciones usadas y el tamaño del prompt.
+    """
+    inicio = time.perf_counter()
+    system_prompt, info = constructor_prompt.construir(user_message, conversation_history)
+    
+    resumen = sesiones.resumen(session_id) if session_id else None
+    conversacion, resumen, plegados, info['historial'] = gestor_contexto.formatear(
+        conversation_history, user_message, resumen
+    )
+    if session_id and plegados:
+        sesiones.plegar(session_id, conversation_history[:plegados])
+    
+    chat_context = system_prompt + "\n\n" + conversacion
+    
+    info['caracteres'] = len(chat_context)
+    info['tokens_estimados'] = estimar_tokens(chat_context)
+    metricas.observar('prompt_segundos', time.perf_counter() - inicio)
+    metricas.observar('prompt_bytes', len(chat_context.encode('utf-8')))
+    return chat_context, info
+
+def detectar_imagenes(user_message):
+    """Detecta si se mencionan habitaciones para enviar imágenes"""
+    mostrar_imagenes = []
+    mensaje_lower = user_message.lower()
+    
+    if any(word in mensaje_lower for word in ['habitacion', 'habitación', 'cuarto', 'tipo', 'opciones', 'mostrar', 'ver', 'fotos']):
+        if 'matrimonial' in mensaje_lower and 'triple' not in mensaje_lower:
+            mostrar_imagenes.append('matrimonial')
+        if 'doble' in mensaje_lower:
+            mostrar_imagenes.append('doble')
+        if 'triple' in mensaje_lower:
+            if 'matrimonial' in mensaje_lower or 'simple' in mensaje_lower:
+                mostrar_imagenes.append('triple_matrimonial')
+            if 'individual' in mensaje_lower or 'tres camas' in mensaje_lower:
+                mostrar_imagenes.append('triple_individual')
+        
+        # Si no se especifica tipo, mostrar todas
+        if not mostrar_imagenes and any(word in mensaje_lower for word in ['todas', 'tipos', 'opciones', 'disponibles']):
+            mostrar_imagenes = list(HABITACIONES.keys())
+    
+    return mostrar_imagenes
+
+def resolver_historial(data):
+    """
+    Devuelve (session_id, historial).
+    Si el cliente envía 'history' sin session_id se usa tal cual (modo anterior, sin sesión);
+    si no, el historial se toma de la sesión del servidor (que se crea si no existe o expiró).
+    """
+    if 'history' in data and not data.get('session_id'):
+        return None, data.get('history') or []
+    session_id = sesiones.obtener_o_crear(data.get('session_id'))
+    return session_id, sesiones.historial(session_id)
+
+def registrar_turno(session_id, user_message, respuesta):
+    """Guarda el mensaje y la respuesta en la sesión (si la conversación usa sesión)"""
+    if session_id:
+        sesiones.agregar_turno(session_id, user_message, respuesta)
+
+def respuesta_chat(texto, user_message, session_id, origen, **extra):
+    """Registra el turno y arma el JSON de respuesta de /api/chat"""
+    registrar_turno(session_id, user_message, texto)
+    metricas.contar('chat_respuestas_total', origen=origen)
+    return jsonify({
+        'response': texto,
+        'imagenes': detectar_imagenes(user_message),
+        'timestamp': datetime.now().isoformat(),
+        'origen': origen,
+        'session_id': session_id,
+        **extra
+    })
+
+def respuesta_saturado(error):
+    """503 con Retry-After cuando ya hay demasiadas llamadas a Gemini en curso"""
+    respuesta = jsonify({'error': str(error), 'reintentar_en': error.reintentar_en})
+    respuesta.headers['Retry-After'] = str(error.reintentar_en)
+    return respuesta, 503
+
 # API principal en Flask. Función del chat que se comunica con Gemini.
 # Endpoint /api/chat -> URL donde la aplicación cliente puede enviar solicitudes para acceder a recursos o ejecutar funciones de un servidor.
 @app.route('/api/chat', methods=['POST'])
@@ -205,45 +327,193 @@ def chat():
     try:
         data = request.json
         user_message = data.get('message', '')
-        conversation_history = data.get('history', [])
+        session_id, conversation_history = resolver_historial(data)
+        
+        # Camino rápido: preguntas frecuentes respondidas desde el JSON
+        faq = router_faq.responder(user_message, conversation_history)
+        if faq:
+            return respuesta_chat(faq['respuesta'], user_message, session_id, 'faq', intencion=faq['intencion'])
+        
+        # Caché semántica: misma pregunta (o muy parecida) con el mismo historial corto
+        historial_corto = conversation_history[-2:]
+        cacheada = cache_respuestas.buscar(user_message, historial_corto, VERSION_DATOS)
+        if cacheada:
+            return respuesta_chat(cacheada, user_message, session_id, 'cache')
         
         # Construir el contexto de la conversación
-        chat_context = SYSTEM_PROMPT + "\n\nCONVERSACIÓN:\n"
-        for msg in conversation_history[-10:]:  # Últimos 10 mensajes
-            role = "Usuario" if msg['role'] == 'user' else "BellBot"
-            chat_context += f"{role}: {msg['content']}\n"
+        chat_context, info_prompt = construir_contexto(user_message, conversation_history, session_id)
         
-        chat_context += f"Usuario: {user_message}\nBellBot:"
+        # Generar respuesta con Gemini (en el pool acotado, con tiempo máximo);
+        # si otro pedido idéntico ya está esperando a Gemini, se usa su respuesta
+        try:
+            with metricas.medir('llm_segundos', modo='completo'):
+                bot_response, compartida = vuelos_llm.ejecutar(
+                    vuelos_llm.clave(chat_context), cliente_llm.generar, chat_context
+                )
+        except Saturado:
+            raise
+        except Exception as e:
+            # Gemini no disponible (circuito abierto, reintentos agotados): respuesta armada desde el JSON
+            texto = router_faq.respuesta_contingencia(user_message)
+            return respuesta_chat(texto, user_message, session_id, 'contingencia', motivo=str(e))
+        metricas.observar('respuesta_bytes', len(bot_response.encode('utf-8')))
+        cache_respuestas.guardar(user_message, historial_corto, bot_response, VERSION_DATOS)
         
-        # Generar respuesta con Gemini
-        response = model.generate_content(chat_context)
-        bot_response = response.text
+        return respuesta_chat(bot_response, user_message, session_id, 'gemini', prompt=info_prompt, compartida=compartida)
+    
+    except Saturado as e:
+        return respuesta_saturado(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def formatear_evento(evento, datos):
+    """Serializa un evento en formato Server-Sent Events"""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+def texto_fragmento(chunk):
+    """Devuelve el texto de un fragmento del stream (vacío si el fragmento no trae texto)"""
+    try:
+        return chunk.text or ''
+    except ValueError:
+        # Gemini lanza ValueError en fragmentos sin partes de texto (ej. solo metadata)
+        return ''
+
+def generar_eventos_fijos(texto, imagenes, origen, session_id=None, **extra):
+    """Eventos SSE para una respuesta ya resuelta (router de preguntas frecuentes o caché)"""
+    metricas.contar('chat_respuestas_total', origen=origen)
+    yield formatear_evento('inicio', {'imagenes': imagenes, 'session_id': session_id})
+    yield formatear_evento('fragmento', {'texto': texto})
+    yield formatear_evento('fin', {
+        'response': texto,
+        'imagenes': imagenes,
+        'timestamp': datetime.now().isoformat(),
+        'origen': origen,
+        'session_id': session_id,
+        **extra
+    })
+
+def generar_eventos_chat(fragmentos, imagenes, al_terminar=None, info_prompt=None, session_id=None, compartida=False,
+                         contingencia=None):
+    """
+    Generador de eventos SSE para el chat en streaming.
+    fragmentos: cualquier iterable de objetos con atributo .text (ej. lo que devuelve
+    generate_content(prompt, stream=True)), así se puede probar con un modelo falso local.
+    contingencia: función que devuelve el texto a enviar si el modelo falla antes del primer fragmento.
+    """
+    inicio = time.perf_counter()
+    primer_fragmento_ms = None
+    partes = []
+    
+    # Primer evento: las imágenes ya se conocen antes de llamar al modelo
+    yield formatear_evento('inicio', {'imagenes': imagenes, 'session_id': session_id})
+    
+    try:
+        for chunk in fragmentos:
+            texto = texto_fragmento(chunk)
+            if not texto:
+                continue
+            if primer_fragmento_ms is None:
+                primer_fragmento_ms = (time.perf_counter() - inicio) * 1000
+            partes.append(texto)
+            yield formatear_evento('fragmento', {'texto': texto})
+    except Exception as e:
+        if partes or contingencia is None:
+            yield formatear_evento('error', {'error': str(e)})
+            return
+        texto = contingencia()
+        metricas.contar('chat_respuestas_total', origen='contingencia')
+        yield formatear_evento('fragmento', {'texto': texto})
+        yield formatear_evento('fin', {
+            'response': texto,
+            'imagenes': imagenes,
+            'timestamp': datetime.now().isoformat(),
+            'origen': 'contingencia',
+            'session_id': session_id,
+            'motivo': str(e)
+        })
+        return
+    
+    if al_terminar:
+        al_terminar(''.join(partes))
+    
+    metricas.observar('llm_segundos', time.perf_counter() - inicio, modo='flujo')
+    metricas.observar('respuesta_bytes', len(''.join(partes).encode('utf-8')))
+    metricas.contar('chat_respuestas_total', origen='gemini')
+    
+    # Último evento: respuesta completa y metadata
+    yield formatear_evento('fin', {
+        'response': ''.join(partes),
+        'imagenes': imagenes,
+        'timestamp': datetime.now().isoformat(),
+        'origen': 'gemini',
+        'session_id': session_id,
+        'prompt': info_prompt,
+        'compartida': compartida,
+        'primer_fragmento_ms': round(primer_fragmento_ms or 0, 2),
+        'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)
+    })
+
+# POST → igual que /api/chat pero envía la respuesta de Gemini a medida que se genera (SSE)
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    try:
+        data = request.json
+        user_message = data.get('message', '')
+        session_id, conversation_history = resolver_historial(data)
         
-        # Detectar si se mencionan habitaciones para enviar imágenes
-        mostrar_imagenes = []
-        mensaje_lower = user_message.lower()
+        imagenes = detectar_imagenes(user_message)
         
-        if any(word in mensaje_lower for word in ['habitacion', 'habitación', 'cuarto', 'tipo', 'opciones', 'mostrar', 'ver', 'fotos']):
-            if 'matrimonial' in mensaje_lower and 'triple' not in mensaje_lower:
-                mostrar_imagenes.append('matrimonial')
-            if 'doble' in mensaje_lower:
-                mostrar_imagenes.append('doble')
-            if 'triple' in mensaje_lower:
-                if 'matrimonial' in mensaje_lower or 'simple' in mensaje_lower:
-                    mostrar_imagenes.append('triple_matrimonial')
-                if 'individual' in mensaje_lower or 'tres camas' in mensaje_lower:
-                    mostrar_imagenes.append('triple_individual')
+        historial_corto = conversation_history[-2:]
+        
+        faq = router_faq.responder(user_message, conversation_history)
+        cacheada = None if faq else cache_respuestas.buscar(user_message, historial_corto, VERSION_DATOS)
+        if faq:
+            registrar_turno(session_id, user_message, faq['respuesta'])
+            eventos = generar_eventos_fijos(faq['respuesta'], imagenes, 'faq', session_id, intencion=faq['intencion'])
+        elif cacheada:
+            registrar_turno(session_id, user_message, cacheada)
+            eventos = generar_eventos_fijos(cacheada, imagenes, 'cache', session_id)
+        else:
+            chat_context, info_prompt = construir_contexto(user_message, conversation_history, session_id)
+            
+            def al_terminar(texto):
+                cache_respuestas.guardar(user_message, historial_corto, texto, VERSION_DATOS)
+                registrar_turno(session_id, user_message, texto)
             
-            # Si no se especifica tipo, mostrar todas
-            if not mostrar_imagenes and any(word in mensaje_lower for word in ['todas', 'tipos', 'opciones', 'disponibles']):
-                mostrar_imagenes = list(HABITACIONES.keys())
+            def contingencia():
+                texto = router_faq.respuesta_contingencia(user_message)
+                registrar_turno(session_id, user_message, texto)
+                return texto
+            
+            # Se admite (o se rechaza con 503) antes de empezar a responder; si otro pedido
+            # idéntico ya está generando, se reciben sus mismos fragmentos
+            try:
+                fragmentos, compartida = vuelos_llm.flujo(
+                    vuelos_llm.clave(chat_context), lambda: cliente_llm.flujo(chat_context)
+                )
+                eventos = generar_eventos_chat(
+                    fragmentos, imagenes,
+                    al_terminar=al_terminar,
+                    info_prompt=info_prompt,
+                    session_id=session_id,
+                    compartida=compartida,
+                    contingencia=contingencia
+                )
+            except CircuitoAbierto as e:
+                # Gemini falló varias veces seguidas: respuesta armada desde el JSON sin llamarlo
+                eventos = generar_eventos_fijos(contingencia(), imagenes, 'contingencia', session_id, motivo=str(e))
         
-        return jsonify({
-            'response': bot_response,
-            'imagenes': mostrar_imagenes,
-            'timestamp': datetime.now().isoformat()
-        })
+        return Response(
+            stream_with_context(eventos),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'  # evita que un proxy (nginx) acumule la respuesta
+            }
+        )
     
+    except Saturado as e:
+        return respuesta_saturado(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -278,6 +548,23 @@ def calcular_precio():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# POST → cotiza muchas estadías en una sola llamada
+# Body: {"cotizaciones": [{"tipo_habitacion", "fecha_checkin", "fecha_checkout"}, ...]}
+@app.route('/api/calcular-precio/lote', methods=['POST'])
+def calcular_precio_lote():
+    try:
+        cotizaciones = request.json.get('cotizaciones', [])
+        resultados = motor_precios.cotizar_lote(
+            (c.get('tipo_habitacion'), c.get('fecha_checkin'), c.get('fecha_checkout'))
+            for c in cotizaciones
+        )
+        return jsonify({
+            'resultados': [r if r else {'error': 'Error al calcular precio'} for r in resultados]
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # POST → valida campos requeridos, calcula precio, inserta reserva en SQLite 
 @app.route('/api/reservar', methods=['POST'])
 def crear_reserva():
@@ -308,27 +595,42 @@ def crear_reserva():
             return jsonify({'error': 'Error al calcular precio'}), 400
         
         # Guardar reserva CON DATOS NORMALIZADOS
-        conn = sqlite3.connect('reservas.db')
-        c = conn.cursor()
+        fila = (nombre_normalizado,          # <- NORMALIZADO
+                email_normalizado,            # <- NORMALIZADO
+                telefono_limpio,              # <- LIMPIO
+                data['tipo_habitacion'], 
+                data['fecha_checkin'], 
+                data['fecha_checkout'], 
+                data['huespedes'], 
+                precio_info['precio_total'], 
+                'confirmada', 
+                datetime.now().isoformat())
         
-        c.execute('''INSERT INTO reservas 
-                     (nombre, email, telefono, tipo_habitacion, fecha_checkin, 
-                      fecha_checkout, huespedes, precio_total, estado, fecha_reserva)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                  (nombre_normalizado,          # <- NORMALIZADO
-                   email_normalizado,            # <- NORMALIZADO
-                   telefono_limpio,              # <- LIMPIO
-                   data['tipo_habitacion'], 
-                   data['fecha_checkin'], 
-                   data['fecha_checkout'], 
-                   data['huespedes'], 
-                   precio_info['precio_total'], 
-                   'confirmada', 
-                   datetime.now().isoformat()))
-        
-        reserva_id = c.lastrowid
-        conn.commit()
-        conn.close()
+        if escritor_reservas:
+            # Group commit: se aparta la habitación y la fila espera su lote; si el lote falla se libera
+            try:
+                inventario.reservar(data['tipo_habitacion'], data['fecha_checkin'], data['fecha_checkout'])
+            except SinDisponibilidad as e:
+                return jsonify({'error': str(e), 'disponibles': e.disponibles}), 409
+            try:
+                with metricas.medir('sqlite_segundos', consulta='insertar_reserva_lote'):
+                    reserva_id = escritor_reservas.insertar(fila)
+            except Exception:
+                inventario.liberar(data['tipo_habitacion'], data['fecha_checkin'], data['fecha_checkout'])
+                raise
+        else:
+            # El inventario verifica la disponibilidad y hace el INSERT sin que otra reserva se intercale
+            def insertar_reserva():
+                with metricas.medir('sqlite_segundos', consulta='insertar_reserva'), db.conexion() as conn:
+                    return conn.execute(SQL_INSERTAR_RESERVA, fila).lastrowid
+            
+            try:
+                reserva_id = inventario.reservar(
+                    data['tipo_habitacion'], data['fecha_checkin'], data['fecha_checkout'], insertar_reserva
+                )
+            except SinDisponibilidad as e:
+                return jsonify({'error': str(e), 'disponibles': e.disponibles}), 409
+        reservas_nuevas.set()
         
         return jsonify({
             'success': True,
@@ -341,41 +643,202 @@ def crear_reserva():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# GET → devuelve últimos 50 registros
+# POST → importa muchas reservas de una vez (NDJSON o CSV con encabezado, ver importador.py)
+# Content-Type: application/x-ndjson o text/csv (o ?formato=csv); ?lote=500 filas por transacción
+# El cuerpo se lee de a una línea: la memoria no depende del tamaño del archivo
+@app.route('/api/reservas/importar', methods=['POST'])
+def importar_reservas():
+    lote = request.args.get('lote', '500')
+    if not lote.isdecimal() or int(lote) <= 0:
+        return jsonify({'error': 'lote debe ser un entero positivo'}), 400
+    
+    try:
+        formato = detectar_formato(request.args.get('formato') or request.content_type)
+        importador = ImportadorReservas(db, motor_precios, inventario, tamano_lote=int(lote))
+        entrada = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        registros = leer_csv(entrada) if formato == 'csv' else leer_ndjson(entrada)
+        with metricas.medir('sqlite_segundos', consulta='importar_reservas'):
+            resumen = importador.importar(registros)
+        reservas_nuevas.set()
+        return jsonify(resumen)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# GET → habitaciones libres por tipo entre dos fechas
+# Query: ?checkin=YYYY-MM-DD&checkout=YYYY-MM-DD[&tipo=matrimonial&tipo=doble][&por_noche=1]
+@app.route('/api/disponibilidad', methods=['GET'])
+def get_disponibilidad():
+    checkin = request.args.get('checkin')
+    checkout = request.args.get('checkout')
+    tipos = request.args.getlist('tipo')
+    por_noche = request.args.get('por_noche', '').lower() in ('1', 'true', 'si')
+    
+    resultado = inventario.disponibilidad(checkin, checkout, tipos=tipos or None, por_noche=por_noche)
+    if resultado is None:
+        return jsonify({'error': 'Fechas inválidas'}), 400
+    return jsonify({'checkin': checkin, 'checkout': checkout, 'habitaciones': resultado})
+
+# GET → reservas de la más nueva a la más vieja (por check-in si se filtra por check-in), de a páginas (50 por defecto, ver consultas.py)
+# Query: ?limite=50&cursor=...&tipo=doble&estado=confirmada&checkin_desde=2025-01-01&campos=id,nombre
+# El cuerpo sigue siendo la lista de reservas; el cursor de la página siguiente va en X-Cursor-Siguiente
 @app.route('/api/reservas', methods=['GET'])
 def get_reservas():
     try:
-        conn = sqlite3.connect('reservas.db')
-        c = conn.cursor()
-        c.execute('SELECT * FROM reservas ORDER BY fecha_reserva DESC LIMIT 50')
-        reservas = c.fetchall()
-        conn.close()
-        
-        reservas_list = []
-        for r in reservas:
-            reservas_list.append({
-                'id': r[0],
-                'nombre': r[1],
-                'email': r[2],
-                'telefono': r[3],
-                'tipo_habitacion': r[4],
-                'fecha_checkin': r[5],
-                'fecha_checkout': r[6],
-                'huespedes': r[7],
-                'precio_total': r[8],
-                'estado': r[9],
-                'fecha_reserva': r[10]
-            })
-        
-        return jsonify(reservas_list)
+        filtros = filtros_desde_args(request.args)
+        campos = campos_desde_args(request.args)
+        limite = int(request.args.get('limite', LIMITE_POR_DEFECTO))
+        with metricas.medir('sqlite_segundos', consulta='listar_reservas'), db.conexion() as conn:
+            reservas, siguiente = listar_reservas(conn, filtros, campos, request.args.get('cursor'), limite)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
     
+    respuesta = jsonify(reservas)
+    if siguiente:
+        respuesta.headers['X-Cursor-Siguiente'] = siguiente
+        siguiente_pagina = {**request.args.to_dict(flat=False), 'cursor': [siguiente]}
+        respuesta.headers['Link'] = f'<{request.base_url}?{urlencode(siguiente_pagina, doseq=True)}>; rel="next"'
+    return respuesta
+
+# GET → búsqueda por nombre, email o teléfono (parcial, sin tildes), ordenada por relevancia
+# Query: ?q=perez gmail&limite=20&campos=id,nombre,email
+@app.route('/api/reservas/buscar', methods=['GET'])
+def buscar():
+    try:
+        campos = campos_desde_args(request.args)
+        limite = int(request.args.get('limite', 20))
+        with metricas.medir('sqlite_segundos', consulta='buscar_reservas'), db.conexion() as conn:
+            return jsonify(buscar_reservas(conn, request.args.get('q'), campos, limite))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# GET → salud del servicio
+# GET → todas las reservas (con los mismos filtros y campos que /api/reservas) en streaming
+# Query: ?formato=ndjson|csv&gzip=1 (por defecto se comprime si el cliente acepta gzip)
+@app.route('/api/reservas/exportar', methods=['GET'])
+def exportar():
+    try:
+        filtros = filtros_desde_args(request.args)
+        campos = campos_desde_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    formato = request.args.get('formato', 'ndjson').lower()
+    if formato not in TIPOS_CONTENIDO:
+        return jsonify({'error': 'Formato inválido (ndjson o csv)'}), 400
+    if 'gzip' in request.args:
+        comprimir = request.args.get('gzip').lower() in ('1', 'true', 'si')
+    else:
+        comprimir = 'gzip' in request.headers.get('Accept-Encoding', '')
+    
+    headers = {
+        'Content-Disposition': f"attachment; filename=reservas_{datetime.now():%Y%m%d_%H%M%S}.{formato}",
+        'X-Accel-Buffering': 'no'
+    }
+    if comprimir:
+        headers['Content-Encoding'] = 'gzip'
+    return Response(
+        exportar_reservas(db, filtros, campos, formato, comprimir),
+        mimetype=TIPOS_CONTENIDO[formato],
+        headers=headers
+    )
+
+# GET → reservas, ingresos y noches totales, por tipo, por mes y por huéspedes (desde los rollups)
+# Query opcional: ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD agrega la serie por día de check-in
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    desde = request.args.get('desde')
+    hasta = request.args.get('hasta')
+    if any(f and parsear_fecha(f) is None for f in (desde, hasta)):
+        return jsonify({'error': 'Fechas inválidas'}), 400
+    try:
+        with metricas.medir('sqlite_segundos', consulta='analytics'), db.conexion() as conn:
+            return jsonify(resumen_analytics(conn, desde, hasta))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# GET → estadísticas de la caché de respuestas (aciertos, fallos, expulsiones)
+@app.route('/api/cache', methods=['GET'])
+def get_cache():
+    return jsonify(cache_respuestas.estadisticas())
+
+# GET → estadísticas de las sesiones de conversación en memoria
+@app.route('/api/sesiones', methods=['GET'])
+def get_sesiones():
+    return jsonify({**sesiones.estadisticas(), 'contexto': gestor_contexto.estadisticas()})
+
+# GET → llamadas a Gemini en curso, en cola, rechazadas, vencidas y pedidos que compartieron llamada
+@app.route('/api/llm', methods=['GET'])
+def get_llm():
+    return jsonify({
+        'backend': model.nombre,
+        **limitador_llm.estadisticas(),
+        'coalescencia': vuelos_llm.estadisticas(),
+        'cliente': cliente_llm.estadisticas()
+    })
+
+# Medidores: se leen del estado actual en cada GET /api/metrics
+ESTADOS_CIRCUITO = ('cerrado', 'semiabierto', 'abierto')
+metricas.medidor('llm_en_curso', 'Llamadas al modelo ejecutándose', lambda: limitador_llm.en_curso)
+metricas.medidor('llm_en_cola', 'Llamadas al modelo esperando lugar en el pool',
+                 lambda: limitador_llm.estadisticas()['en_cola'])
+metricas.medidor('llm_rechazadas', 'Llamadas rechazadas por saturación (503) desde el inicio',
+                 lambda: limitador_llm.rechazadas)
+metricas.medidor('llm_circuito', 'Estado del circuit breaker (1 en el estado actual)', lambda: {
+    (('estado', estado),): int(cliente_llm.circuito.estado == estado) for estado in ESTADOS_CIRCUITO
+})
+metricas.medidor('db_conexiones_abiertas', 'Conexiones SQLite abiertas en el pool', lambda: db.abiertas)
+metricas.medidor('sesiones_activas', 'Sesiones de conversación en memoria', 
+                 lambda: sesiones.estadisticas()['sesiones_activas'])
+if escritor_reservas:
+    metricas.medidor('db_escritura_pendientes', 'Reservas esperando su lote (group commit)',
+                     lambda: escritor_reservas.estadisticas()['pendientes'])
+metricas.medidor('cache_entradas', 'Respuestas en la caché', lambda: cache_respuestas.estadisticas()['entradas'])
+
+# GET → métricas en formato Prometheus
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metricas.exportar(), mimetype='text/plain; version=0.0.4')
+
+# GET → salud del servicio (readiness): base de datos accesible y estado del modelo
+# 200 si puede atender (con el circuito abierto el chat responde con contingencia: 'degradado'), 503 si no
 @app.route('/api/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok', 'message': 'API funcionando correctamente'})
+    verificaciones = {}
+    
+    inicio = time.perf_counter()
+    try:
+        with metricas.medir('sqlite_segundos', consulta='salud'), db.conexion() as conn:
+            conn.execute('SELECT 1').fetchone()
+        verificaciones['base_datos'] = {'ok': True, 'ms': round((time.perf_counter() - inicio) * 1000, 2),
+                                        'version': db.version()}
+    except Exception as e:
+        verificaciones['base_datos'] = {'ok': False, 'error': str(e)}
+    
+    circuito = cliente_llm.circuito.estadisticas()
+    limitador = limitador_llm.estadisticas()
+    verificaciones['llm'] = {
+        'ok': circuito['estado'] != 'abierto',
+        'backend': model.nombre,
+        'circuito': circuito['estado'],
+        'en_curso': limitador['en_curso'],
+        'en_cola': limitador['en_cola'],
+        'saturado': limitador['en_curso'] + limitador['en_cola'] >= limitador['max_concurrentes'] + limitador['max_cola']
+    }
+    
+    if not verificaciones['base_datos']['ok']:
+        estado, codigo = 'error', 503
+    elif not verificaciones['llm']['ok'] or verificaciones['llm']['saturado']:
+        estado, codigo = 'degradado', 200
+    else:
+        estado, codigo = 'ok', 200
+    mensajes = {'ok': 'API funcionando correctamente', 'degradado': 'Asistente limitado (circuito abierto o cola llena)',
+                'error': 'Base de datos no disponible'}
+    return jsonify({'status': estado, 'message': mensajes[estado], 'verificaciones': verificaciones}), codigo
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # threaded=True: cada pedido en su hilo; el chat espera en el pool de Gemini sin frenar al resto
+    app.run(debug=True, port=5000, threaded=True)
\ No newline at end of file
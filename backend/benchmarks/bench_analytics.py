@@ -0,0 +1,104 @@
+"""
+Benchmark del análisis de reservas: tabla entera vs. por bloques vs. rollups
+Carga una base temporal y compara tres formas de calcular los totales de analytics.py:
+    completo   el análisis original: SELECT * a un solo DataFrame con tipos object y
+               fechas con format='mixed'
+    bloques    analytics.resumen_por_bloques: solo las columnas necesarias (mes y noches
+               calculados en SQLite), de a --bloque filas, con categorías e int32
+    rollups    rollups.resumen_analytics (después de ponerlos al día, que no se mide)
+Para cada una informa el tiempo y el pico de memoria de Python (tracemalloc; pandas y NumPy
+registran ahí sus arreglos) y verifica que los totales coincidan.
+
+Uso (desde backend/):
+    python benchmarks/bench_analytics.py --reservas 1000000
+    python benchmarks/bench_analytics.py --reservas 2000000 --bloque 50000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import resumen_por_bloques  # noqa: E402
+from db import BaseDatos  # noqa: E402
+from generador import cargar, generador_desde_hotel  # noqa: E402
+from router_faq import cargar_hotel_info  # noqa: E402
+from rollups import actualizar_rollups, resumen_analytics  # noqa: E402
+
+
+def resumen_completo(conn):
+    """Los mismos cálculos del análisis original (toda la tabla en memoria)"""
+    df = pd.read_sql_query('SELECT * FROM reservas', conn)
+    df['fecha_checkin'] = pd.to_datetime(df['fecha_checkin'], format='mixed', errors='coerce')
+    df['fecha_checkout'] = pd.to_datetime(df['fecha_checkout'], format='mixed', errors='coerce')
+    df['fecha_reserva'] = pd.to_datetime(df['fecha_reserva'], format='mixed', errors='coerce')
+    df['noches'] = (df['fecha_checkout'] - df['fecha_checkin']).dt.days
+    df['mes'] = df['fecha_checkin'].dt.month
+    return {
+        'total': {'reservas': len(df), 'ingresos': float(df['precio_total'].sum()), 'noches': int(df['noches'].sum())},
+        'por_tipo': df.groupby('tipo_habitacion').agg({'id': 'count', 'precio_total': ['sum', 'mean']}),
+        'por_mes': df.groupby('mes').agg({'id': 'count', 'precio_total': 'sum'}),
+        'por_huespedes': df.groupby('huespedes').agg({'id': 'count', 'precio_total': 'mean'})
+    }
+
+
+def medir(funcion):
+    """(resultado, segundos, pico de memoria en MB). tracemalloc hace todo más lento: la memoria se mide en otra corrida"""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcion()
+    pico = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return resultado, segundos, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reservas', type=int, default=1000000)
+    parser.add_argument('--bloque', type=int, default=100000, help='filas por bloque')
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='bench_analytics_')
+    db = BaseDatos(os.path.join(directorio, 'reservas.db'))
+    try:
+        db.migrar()
+        inicio = time.perf_counter()
+        cargar(db, generador_desde_hotel(cargar_hotel_info(), semilla=args.semilla, sobreventa=None), args.reservas)
+        print(f"{args.reservas:,} reservas cargadas en {time.perf_counter() - inicio:.1f} s\n")
+
+        with db.conexion() as conn:
+            actualizar_rollups(conn)
+            completo, completo_s, completo_mb = medir(lambda: resumen_completo(conn))
+            bloques, bloques_s, bloques_mb = medir(lambda: resumen_por_bloques(conn, args.bloque))
+            rollups, rollups_s, rollups_mb = medir(lambda: resumen_analytics(conn))
+
+        print(f"{'Método':<10} {'tiempo':>10} {'pico memoria':>14}")
+        for nombre, segundos, pico in (('completo', completo_s, completo_mb), ('bloques', bloques_s, bloques_mb),
+                                       ('rollups', rollups_s, rollups_mb)):
+            print(f"{nombre:<10} {segundos:>8.2f} s {pico:>11.1f} MB")
+
+        # los tres cálculos tienen que dar los mismos totales
+        for nombre, resumen in (('bloques', bloques), ('rollups', rollups)):
+            for clave in ('reservas', 'ingresos', 'noches'):
+                if resumen['total'][clave] != completo['total'][clave]:
+                    print(f"\n⚠️ {nombre}: {clave} = {resumen['total'][clave]} (completo: {completo['total'][clave]})")
+                    sys.exit(1)
+        print(f"\nTotales iguales en los tres: {completo['total']['reservas']:,} reservas, "
+              f"${completo['total']['ingresos']:,.0f}, {completo['total']['noches']:,} noches")
+    finally:
+        db.cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
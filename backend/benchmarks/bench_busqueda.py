@@ -0,0 +1,73 @@
+"""
+Benchmark de búsqueda de huéspedes: LIKE '%...%' vs. índice FTS5
+Carga una base temporal con reservas sintéticas (generador.py) y compara el tiempo de buscar
+por nombre parcial, email y teléfono con LIKE (recorre toda la tabla) y con
+consultas.buscar_reservas (índice reservas_fts).
+
+Uso (desde backend/):
+    python benchmarks/bench_busqueda.py --reservas 500000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consultas import buscar_reservas  # noqa: E402
+from db import BaseDatos  # noqa: E402
+from generador import cargar, generador_desde_hotel  # noqa: E402
+from router_faq import cargar_hotel_info  # noqa: E402
+
+
+def medir(funcion, repeticiones=5):
+    tiempos, resultado = [], None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return sorted(tiempos)[len(tiempos) // 2] * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reservas', type=int, default=500000)
+    parser.add_argument('--limite', type=int, default=20)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='bench_busqueda_')
+    db = BaseDatos(os.path.join(directorio, 'reservas.db'))
+    try:
+        db.migrar()
+        inicio = time.perf_counter()
+        cargar(db, generador_desde_hotel(cargar_hotel_info(), semilla=args.semilla, sobreventa=None), args.reservas)
+        print(f"{args.reservas:,} reservas cargadas (con su índice FTS5) en {time.perf_counter() - inicio:.1f} s\n")
+
+        with db.conexion() as conn:
+            email = conn.execute('SELECT email FROM reservas WHERE id = ?', (args.reservas // 2,)).fetchone()[0]
+            telefono = conn.execute('SELECT telefono FROM reservas WHERE id = ?', (args.reservas // 3,)).fetchone()[0]
+            casos = [
+                ('nombre parcial', 'ludu', "nombre LIKE '%ludu%'"),
+                ('nombre y apellido', 'sofia pereyra', "nombre LIKE '%sofia%' AND nombre LIKE '%pereyra%'"),
+                ('sin resultados', 'zuviria', "nombre LIKE '%zuviria%'"),
+                ('email', email, f"email LIKE '%{email}%'"),
+                ('teléfono sin espacios', telefono.replace(' ', '').lstrip('+'),
+                 f"replace(telefono, ' ', '') LIKE '%{telefono.replace(' ', '')}%'"),
+            ]
+            print(f"{'Búsqueda':<24} {'LIKE':>10} {'FTS5':>10}   resultados")
+            for nombre, texto, where in casos:
+                like_ms, _ = medir(lambda: conn.execute(
+                    f'SELECT * FROM reservas WHERE {where} ORDER BY fecha_reserva DESC LIMIT {args.limite}').fetchall())
+                fts_ms, resultado = medir(lambda: buscar_reservas(conn, texto, limite=args.limite))
+                print(f"{nombre:<24} {like_ms:>7.2f} ms {fts_ms:>7.2f} ms   {len(resultado)}")
+    finally:
+        db.cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
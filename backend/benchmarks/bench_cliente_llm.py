@@ -0,0 +1,99 @@
+"""
+Benchmark del cliente resiliente con un modelo falso local
+Simula un modelo con latencia de cola (algunas respuestas mucho más lentas) y errores
+transitorios, y compara la latencia y la tasa de error de:
+- llamada directa (sin reintentos ni hedging),
+- reintentos con jitter,
+- reintentos + hedging en el p95,
+y muestra cómo el circuit breaker corta las llamadas cuando el modelo falla siempre.
+
+Uso (desde backend/):
+    python benchmarks/bench_cliente_llm.py --pedidos 300 --latencia 0.05 --cola-lenta 0.05 --errores 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cliente_llm import Circuito, CircuitoAbierto, ClienteLLM  # noqa: E402
+from limitador import LimitadorLLM  # noqa: E402
+from modelo_falso import ModeloFalso  # noqa: E402
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))] if valores else 0
+
+
+def correr(nombre, cliente, pedidos, concurrencia):
+    latencias, errores = [], 0
+
+    def pedir(i):
+        inicio = time.perf_counter()
+        try:
+            cliente.generar(f'pregunta {i}')
+            return time.perf_counter() - inicio, None
+        except Exception as e:
+            return time.perf_counter() - inicio, e
+
+    with ThreadPoolExecutor(concurrencia) as ejecutor:
+        for segundos, error in ejecutor.map(pedir, range(pedidos)):
+            latencias.append(segundos)
+            errores += error is not None
+
+    print(f"{nombre:<28} p50 {percentil(latencias, 50) * 1000:>7.0f} ms   p95 {percentil(latencias, 95) * 1000:>7.0f} ms"
+          f"   p99 {percentil(latencias, 99) * 1000:>7.0f} ms   errores {errores / pedidos:>6.1%}")
+    return cliente.estadisticas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pedidos', type=int, default=300)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--latencia', type=float, default=0.05, help='segundos por respuesta normal')
+    parser.add_argument('--cola-lenta', type=float, default=0.05, help='proporción de respuestas 10x más lentas')
+    parser.add_argument('--errores', type=float, default=0.05, help='proporción de errores transitorios')
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    def nuevo_cliente(**opciones):
+        modelo = ModeloFalso(latencia=args.latencia, cola_lenta=args.cola_lenta, tasa_errores=args.errores,
+                             semilla=args.semilla)
+        limitador = LimitadorLLM(max_concurrentes=args.concurrencia * 2, max_cola=args.pedidos, timeout_segundos=10)
+        return ClienteLLM(modelo, limitador, plazo_segundos=10, espera_base=args.latencia,
+                          hedging_minimo=args.latencia, circuito=Circuito(umbral_fallos=10 ** 6), **opciones)
+
+    print(f"{args.pedidos} pedidos, {args.concurrencia} concurrentes, latencia {args.latencia * 1000:.0f} ms, "
+          f"{args.cola_lenta:.0%} lentas (x10), {args.errores:.0%} errores\n")
+
+    correr('Directo', nuevo_cliente(reintentos=0), args.pedidos, args.concurrencia)
+    correr('Reintentos', nuevo_cliente(reintentos=2), args.pedidos, args.concurrencia)
+    cliente = nuevo_cliente(reintentos=2, hedging=True)
+    correr('Precalentamiento (p95)', cliente, 50, args.concurrencia)
+    estadisticas = correr('Reintentos + hedging', cliente, args.pedidos, args.concurrencia)
+    print(f"  coberturas lanzadas: {estadisticas['coberturas_lanzadas']}, "
+          f"ganadas por la cobertura: {estadisticas['ganadas_por_cobertura']}")
+
+    # Circuit breaker: el modelo falla siempre
+    modelo = ModeloFalso(latencia=args.latencia, tasa_errores=1.0)
+    cliente = ClienteLLM(modelo, LimitadorLLM(max_concurrentes=4, max_cola=100, timeout_segundos=10), reintentos=0,
+                         circuito=Circuito(umbral_fallos=5, enfriamiento_segundos=60))
+    inicio = time.perf_counter()
+    rechazadas = 0
+    for i in range(50):
+        try:
+            cliente.generar(f'pregunta {i}')
+        except CircuitoAbierto:
+            rechazadas += 1
+        except Exception:
+            pass
+    print(f"\nCircuit breaker (modelo caído): 50 pedidos en {(time.perf_counter() - inicio) * 1000:.0f} ms, "
+          f"{modelo.llamadas} llegaron al modelo, {rechazadas} respondidos al instante con contingencia")
+
+
+if __name__ == '__main__':
+    main()
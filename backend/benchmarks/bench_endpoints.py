@@ -0,0 +1,305 @@
+"""
+Benchmark de carga de los endpoints del API
+Levanta el backend en un proceso aparte con el modelo local (LLM_BACKEND=stub) y una base
+SQLite temporal cargada con muchas reservas, lo somete a una mezcla configurable de pedidos
+concurrentes y muestra, por endpoint, throughput, percentiles e histograma de latencias.
+También corre microbenchmarks de calcular_precio_reserva y detectar_imagenes y compara todo
+contra una línea de base guardada (benchmarks/baseline.json).
+
+Uso (desde backend/):
+    python benchmarks/bench_endpoints.py --duracion 20 --concurrencia 16
+    python benchmarks/bench_endpoints.py --mezcla chat=1,precio=6,reservar=1,reservas=2 --reservas-base 100000
+    python benchmarks/bench_endpoints.py --guardar-base        # actualiza baseline.json
+    python benchmarks/bench_endpoints.py --comparar            # exit 1 si algo empeora más que --tolerancia
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import requests
+
+DIR_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIR_BACKEND)
+
+from db import BaseDatos  # noqa: E402
+
+ARCHIVO_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+TIPOS = ['matrimonial', 'doble', 'triple_matrimonial', 'triple_individual']
+LIMITES_HISTOGRAMA_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+# Mensajes de chat: preguntas frecuentes (router), repetidas (caché) y únicas (modelo)
+MENSAJES_FAQ = ['¿A qué hora es el check-in?', '¿Tienen WiFi?', '¿Permiten mascotas?', '¿Qué formas de pago aceptan?']
+MENSAJES_LLM = ['Quiero reservar una doble del {d}/3 al {h}/3 para 2 personas',
+                '¿Qué me recomendás visitar si llego el {d} de julio?',
+                'Viajo con {d} amigos, ¿qué habitación nos conviene?']
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def cargar_reservas(ruta, cantidad, semilla):
+    """Base temporal con `cantidad` reservas repartidas entre 2001 y 2099"""
+    db = BaseDatos(ruta)
+    db.migrar()
+    rnd = random.Random(semilla)
+    inicio = date(2001, 1, 1)
+    filas = []
+    for i in range(cantidad):
+        checkin = inicio + timedelta(days=rnd.randint(0, 36000))
+        checkout = checkin + timedelta(days=rnd.randint(1, 7))
+        filas.append((f'Huesped {i}', f'huesped{i}@email.com', f'+54 9 3537 {rnd.randint(100000, 999999)}',
+                      rnd.choice(TIPOS), checkin.isoformat(), checkout.isoformat(), rnd.randint(1, 3),
+                      rnd.randint(25000, 300000), 'confirmada', (datetime(2024, 1, 1) + timedelta(minutes=i)).isoformat()))
+    with db.conexion() as conn:
+        conn.executemany('''INSERT INTO reservas (nombre, email, telefono, tipo_habitacion, fecha_checkin,
+                            fecha_checkout, huespedes, precio_total, estado, fecha_reserva)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', filas)
+    db.cerrar()
+
+
+def levantar_servidor(puerto, entorno):
+    codigo = ('import app; app.app.run(host="127.0.0.1", port=%d, threaded=True, debug=False)' % puerto)
+    proceso = subprocess.Popen([sys.executable, '-c', codigo], cwd=DIR_BACKEND, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limite = time.time() + 60
+    while time.time() < limite:
+        try:
+            if requests.get(f'http://127.0.0.1:{puerto}/api/health', timeout=1).status_code == 200:
+                return proceso
+        except requests.RequestException:
+            time.sleep(0.2)
+    proceso.kill()
+    raise RuntimeError('El servidor no respondió a /api/health')
+
+
+def fechas_aleatorias(rnd, max_noches=7):
+    checkin = date(2030, 1, 1) + timedelta(days=rnd.randint(0, 25000))
+    return checkin.isoformat(), (checkin + timedelta(days=rnd.randint(1, max_noches))).isoformat()
+
+
+def pedido(nombre, rnd):
+    """(método, ruta, cuerpo) de un pedido del tipo indicado"""
+    if nombre == 'chat':
+        sorteo = rnd.random()
+        if sorteo < 0.4:
+            mensaje = rnd.choice(MENSAJES_FAQ)
+        elif sorteo < 0.7:
+            mensaje = MENSAJES_LLM[0].format(d=10, h=12)  # se repite: la caché lo responde
+        else:
+            mensaje = rnd.choice(MENSAJES_LLM).format(d=rnd.randint(1, 20), h=rnd.randint(21, 28))
+        return 'POST', '/api/chat', {'message': mensaje, 'history': []}
+    if nombre == 'precio':
+        checkin, checkout = fechas_aleatorias(rnd, 30)
+        return 'POST', '/api/calcular-precio', {
+            'tipo_habitacion': rnd.choice(TIPOS), 'fecha_checkin': checkin, 'fecha_checkout': checkout
+        }
+    if nombre == 'reservar':
+        checkin, checkout = fechas_aleatorias(rnd)
+        return 'POST', '/api/reservar', {
+            'nombre': 'Carga Prueba', 'email': 'carga@email.com', 'telefono': '+54 9 3537 000000',
+            'tipo_habitacion': rnd.choice(TIPOS), 'fecha_checkin': checkin, 'fecha_checkout': checkout, 'huespedes': 2
+        }
+    if nombre == 'reservas':
+        return 'GET', '/api/reservas', None
+    raise ValueError(f'Endpoint desconocido en la mezcla: {nombre}')
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, max(0, -(-len(valores) * p // 100) - 1))] if valores else 0
+
+
+def histograma(valores):
+    cuentas = [0] * (len(LIMITES_HISTOGRAMA_MS) + 1)
+    for v in valores:
+        i = next((i for i, limite in enumerate(LIMITES_HISTOGRAMA_MS) if v <= limite), len(LIMITES_HISTOGRAMA_MS))
+        cuentas[i] += 1
+    return cuentas
+
+
+def imprimir_histograma(cuentas):
+    total = sum(cuentas) or 1
+    etiquetas = [f'≤{l} ms' for l in LIMITES_HISTOGRAMA_MS] + [f'>{LIMITES_HISTOGRAMA_MS[-1]} ms']
+    for etiqueta, cuenta in zip(etiquetas, cuentas):
+        if cuenta:
+            print(f"      {etiqueta:>10} {cuenta:>7}  {'█' * max(1, round(40 * cuenta / total))}")
+
+
+def prueba_de_carga(puerto, mezcla, concurrencia, duracion, semilla):
+    nombres = [n for n, peso in mezcla.items() for _ in range(peso)]
+    latencias = {n: [] for n in mezcla}
+    estados = {n: {} for n in mezcla}
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+
+    def trabajador(indice):
+        rnd = random.Random(semilla * 1000 + indice)
+        sesion = requests.Session()
+        while time.perf_counter() < fin:
+            nombre = rnd.choice(nombres)
+            metodo, ruta, cuerpo = pedido(nombre, rnd)
+            inicio = time.perf_counter()
+            try:
+                estado = sesion.request(metodo, f'http://127.0.0.1:{puerto}{ruta}', json=cuerpo, timeout=60).status_code
+            except requests.RequestException:
+                estado = 'excepcion'
+            ms = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias[nombre].append(ms)
+                estados[nombre][estado] = estados[nombre].get(estado, 0) + 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concurrencia) as ejecutor:
+        list(ejecutor.map(trabajador, range(concurrencia)))
+    segundos = time.perf_counter() - inicio
+
+    resultados = {}
+    total = sum(len(v) for v in latencias.values())
+    print(f"\n{total:,} pedidos en {segundos:.1f} s → {total / segundos:,.0f} pedidos/s en total\n")
+    for nombre, valores in latencias.items():
+        valores.sort()
+        errores = sum(c for e, c in estados[nombre].items() if e == 'excepcion' or e >= 500)
+        resultados[nombre] = {
+            'pedidos': len(valores),
+            'rps': round(len(valores) / segundos, 1),
+            'p50_ms': round(percentil(valores, 50), 2),
+            'p95_ms': round(percentil(valores, 95), 2),
+            'p99_ms': round(percentil(valores, 99), 2),
+            'errores': errores,
+            'estados': {str(e): c for e, c in sorted(estados[nombre].items(), key=str)},
+            'histograma': histograma(valores)
+        }
+        r = resultados[nombre]
+        print(f"  {nombre:<10} {r['pedidos']:>7} pedidos {r['rps']:>8.1f}/s   p50 {r['p50_ms']:>8.1f} ms"
+              f"   p95 {r['p95_ms']:>8.1f} ms   p99 {r['p99_ms']:>8.1f} ms   estados {r['estados']}")
+        imprimir_histograma(r['histograma'])
+    return resultados
+
+
+def microbenchmarks(semilla, repeticiones=20000):
+    """Funciones puras de app.py, en este proceso (sin HTTP). RESERVAS_DB ya apunta a la base temporal"""
+    import app
+
+    if os.path.abspath(app.db.ruta) != os.path.abspath(os.environ['RESERVAS_DB']):
+        raise RuntimeError(f'app.py abrió {app.db.ruta} en lugar de la base temporal')
+
+    rnd = random.Random(semilla)
+    cotizaciones = [(rnd.choice(TIPOS), *fechas_aleatorias(rnd, 30)) for _ in range(repeticiones)]
+    mensajes = [rnd.choice(['Quiero ver las habitaciones triple matrimonial', 'mostrame fotos de la doble',
+                            'qué opciones tienen disponibles?', 'hola, a qué hora es el desayuno?'])
+                for _ in range(repeticiones)]
+
+    resultados = {}
+    for nombre, funcion, argumentos in (
+        ('calcular_precio_reserva', app.calcular_precio_reserva, cotizaciones),
+        ('detectar_imagenes', app.detectar_imagenes, [(m,) for m in mensajes]),
+    ):
+        inicio = time.perf_counter()
+        for args in argumentos:
+            funcion(*args)
+        segundos = time.perf_counter() - inicio
+        resultados[nombre] = {'us_por_llamada': round(segundos / len(argumentos) * 1e6, 3),
+                              'llamadas_por_s': round(len(argumentos) / segundos)}
+        print(f"  {nombre:<26} {resultados[nombre]['us_por_llamada']:>9.2f} µs/llamada"
+              f"   {resultados[nombre]['llamadas_por_s']:>12,} llamadas/s")
+    return resultados
+
+
+def comparar(actual, base, tolerancia):
+    """Lista de regresiones respecto de la línea de base"""
+    regresiones = []
+    for nombre, datos in actual.get('endpoints', {}).items():
+        anterior = base.get('endpoints', {}).get(nombre)
+        if not anterior:
+            continue
+        if datos['rps'] < anterior['rps'] * (1 - tolerancia):
+            regresiones.append(f"{nombre}: {anterior['rps']} → {datos['rps']} pedidos/s")
+        if datos['p95_ms'] > anterior['p95_ms'] * (1 + tolerancia) and datos['p95_ms'] - anterior['p95_ms'] > 2:
+            regresiones.append(f"{nombre}: p95 {anterior['p95_ms']} → {datos['p95_ms']} ms")
+    for nombre, datos in actual.get('micro', {}).items():
+        anterior = base.get('micro', {}).get(nombre)
+        if anterior and datos['us_por_llamada'] > anterior['us_por_llamada'] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: {anterior['us_por_llamada']} → {datos['us_por_llamada']} µs/llamada")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duracion', type=float, default=15, help='segundos de carga')
+    parser.add_argument('--concurrencia', type=int, default=16, help='clientes simultáneos')
+    parser.add_argument('--mezcla', default='chat=2,precio=4,reservar=1,reservas=2', help='endpoint=peso,...')
+    parser.add_argument('--reservas-base', type=int, default=50000, help='reservas precargadas en la base temporal')
+    parser.add_argument('--latencia-llm', type=float, default=0.2, help='segundos hasta el primer fragmento del stub')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--sin-carga', action='store_true', help='solo microbenchmarks')
+    parser.add_argument('--guardar-base', action='store_true', help=f'guarda los resultados en {ARCHIVO_BASE}')
+    parser.add_argument('--comparar', action='store_true', help='compara con la línea de base (exit 1 si empeora)')
+    parser.add_argument('--tolerancia', type=float, default=0.3, help='empeoramiento aceptado (0.3 = 30%%)')
+    parser.add_argument('--salida', help='archivo JSON con los resultados')
+    args = parser.parse_args()
+
+    mezcla = {n.strip(): int(p) for n, p in (parte.split('=') for parte in args.mezcla.split(','))}
+    directorio = tempfile.mkdtemp(prefix='bench_hotel_')
+    ruta_db = os.path.join(directorio, 'reservas.db')
+    entorno = {**os.environ, 'RESERVAS_DB': ruta_db, 'LLM_BACKEND': 'stub',
+               'LLM_STUB_LATENCIA_INICIAL': str(args.latencia_llm), 'LLM_STUB_SEGUNDOS_POR_TOKEN': '0.001',
+               'LLM_MAX_CONCURRENTES': os.getenv('LLM_MAX_CONCURRENTES', '8'),
+               'LLM_MAX_COLA': os.getenv('LLM_MAX_COLA', '64')}
+    # antes de cualquier import de app.py: este proceso también usa la base temporal y el stub
+    os.environ.update(entorno)
+    resultados = {'fecha': datetime.now().isoformat(timespec='seconds'),
+                  'configuracion': {k: v for k, v in vars(args).items() if k not in ('guardar_base', 'comparar', 'salida')}}
+    try:
+        inicio = time.perf_counter()
+        cargar_reservas(ruta_db, args.reservas_base, args.semilla)
+        print(f"Base temporal con {args.reservas_base:,} reservas en {time.perf_counter() - inicio:.1f} s ({ruta_db})")
+
+        if not args.sin_carga:
+            puerto = puerto_libre()
+            proceso = levantar_servidor(puerto, entorno)
+            try:
+                print(f"Carga: {args.concurrencia} clientes durante {args.duracion:g} s, mezcla {mezcla}, LLM stub")
+                resultados['endpoints'] = prueba_de_carga(puerto, mezcla, args.concurrencia, args.duracion, args.semilla)
+            finally:
+                proceso.terminate()
+                proceso.wait(timeout=10)
+
+        print("\nMicrobenchmarks")
+        resultados['micro'] = microbenchmarks(args.semilla)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if args.guardar_base:
+        with open(ARCHIVO_BASE, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nLínea de base guardada en {ARCHIVO_BASE}")
+    if args.comparar:
+        if not os.path.exists(ARCHIVO_BASE):
+            print(f"\nNo hay línea de base ({ARCHIVO_BASE}); correr con --guardar-base")
+            sys.exit(1)
+        with open(ARCHIVO_BASE, encoding='utf-8') as f:
+            regresiones = comparar(resultados, json.load(f), args.tolerancia)
+        print("\nComparación con la línea de base: " + ('sin regresiones' if not regresiones else 'REGRESIONES'))
+        for regresion in regresiones:
+            print(f"  ❌ {regresion}")
+        sys.exit(1 if regresiones else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark de escritura de reservas: una transacción por reserva vs. group commit
+Reserva concurrentemente con el mismo flujo que /api/reservar (el inventario verifica la
+disponibilidad y se inserta la fila) en una base temporal, y compara reservas por segundo y
+latencia entre:
+- directo: un INSERT y un commit por reserva, dentro del lock del inventario (como hoy),
+- lotes:   la habitación se aparta en el inventario y la fila espera al escritor (EscritorLotes),
+con PRAGMA synchronous NORMAL y FULL (FULL espera el disco en cada commit).
+
+Uso (desde backend/):
+    python benchmarks/bench_escritura.py --reservas 5000 --concurrencia 32
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import BaseDatos  # noqa: E402
+from escritor_lotes import EscritorLotes  # noqa: E402
+from inventario import InventarioHabitaciones, capacidades_desde_hotel  # noqa: E402
+from router_faq import cargar_hotel_info  # noqa: E402
+
+SQL = '''INSERT INTO reservas (nombre, email, telefono, tipo_habitacion, fecha_checkin, fecha_checkout,
+         huespedes, precio_total, estado, fecha_reserva) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))] if valores else 0
+
+
+def pedidos(cantidad, semilla):
+    rnd = random.Random(semilla)
+    tipos = ['matrimonial', 'doble', 'triple_matrimonial', 'triple_individual']
+    resultado = []
+    for i in range(cantidad):
+        checkin = date(2030, 1, 1) + timedelta(days=rnd.randint(0, 20000))
+        checkout = checkin + timedelta(days=rnd.randint(1, 7))
+        resultado.append((f'Huesped {i}', f'huesped{i}@email.com', '+54 9 3537 000000', rnd.choice(tipos),
+                          checkin.isoformat(), checkout.isoformat(), 2, 56000, 'confirmada', datetime.now().isoformat()))
+    return resultado
+
+
+def correr(modo, sincronizacion, filas, concurrencia, max_lote, espera_ms):
+    directorio = tempfile.mkdtemp(prefix='bench_escritura_')
+    db = BaseDatos(os.path.join(directorio, 'reservas.db'), max_conexiones=concurrencia, sincronizacion=sincronizacion)
+    db.migrar()
+    inventario = InventarioHabitaciones(capacidades_desde_hotel(cargar_hotel_info()))
+    escritor = EscritorLotes(db, SQL, max_lote=max_lote, espera_maxima_ms=espera_ms) if modo == 'lotes' else None
+    latencias = []
+    lock = threading.Lock()
+
+    def reservar(fila):
+        inicio = time.perf_counter()
+        if escritor:
+            inventario.reservar(fila[3], fila[4], fila[5])
+            escritor.insertar(fila)
+        else:
+            def insertar():
+                with db.conexion() as conn:
+                    return conn.execute(SQL, fila).lastrowid
+            inventario.reservar(fila[3], fila[4], fila[5], insertar)
+        with lock:
+            latencias.append(time.perf_counter() - inicio)
+
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(concurrencia) as ejecutor:
+            list(ejecutor.map(reservar, filas))
+        segundos = time.perf_counter() - inicio
+        with db.conexion() as conn:
+            guardadas = conn.execute('SELECT COUNT(*) FROM reservas').fetchone()[0]
+        extra = ''
+        if escritor:
+            escritor.cerrar()
+            estadisticas = escritor.estadisticas()
+            extra = f"   {estadisticas['lotes']} commits ({estadisticas['filas_por_lote']} filas/lote)"
+        print(f"{modo:<8} synchronous={sincronizacion:<7} {len(filas) / segundos:>9,.0f} reservas/s   "
+              f"p50 {percentil(latencias, 50) * 1000:>7.2f} ms   p95 {percentil(latencias, 95) * 1000:>7.2f} ms"
+              f"   guardadas {guardadas}{extra}")
+        return len(filas) / segundos
+    finally:
+        db.cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reservas', type=int, default=5000)
+    parser.add_argument('--concurrencia', type=int, default=32, help='reservas simultáneas')
+    parser.add_argument('--max-lote', type=int, default=64)
+    parser.add_argument('--espera-ms', type=float, default=0, help='ventana máxima para juntar un lote')
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    filas = pedidos(args.reservas, args.semilla)
+    print(f"{args.reservas} reservas, {args.concurrencia} concurrentes, lotes de hasta {args.max_lote} "
+          f"o {args.espera_ms:g} ms\n")
+    for sincronizacion in ('NORMAL', 'FULL'):
+        directo = correr('directo', sincronizacion, filas, args.concurrencia, args.max_lote, args.espera_ms)
+        lotes = correr('lotes', sincronizacion, filas, args.concurrencia, args.max_lote, args.espera_ms)
+        print(f"  → group commit x{lotes / directo:.1f}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark de la ocupación por noche: bucle por reserva vs. ocupacion.CalendarioOcupacion
+Genera estadías al azar (tipo, check-in en --anios años, 1 a 7 noches) y calcula la ocupación
+diaria de cada tipo durante un año: primero recorriendo las reservas en Python y sumando 1 a
+su tramo de noches, después con el arreglo de diferencias vectorizado. Verifica que den lo
+mismo y muestra también la aproximación anterior (noches / 29 habitaciones × 30 días).
+
+Uso (desde backend/):
+    python benchmarks/bench_ocupacion.py --reservas 1000000
+    python benchmarks/bench_ocupacion.py --reservas 5000000 --anios 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventario import capacidades_desde_hotel  # noqa: E402
+from ocupacion import CalendarioOcupacion, numero_dia  # noqa: E402
+from router_faq import cargar_hotel_info  # noqa: E402
+
+
+def ocupacion_bucle(calendario, desde, hasta):
+    """Lo mismo que CalendarioOcupacion.matriz, reserva por reserva"""
+    inicio = numero_dia(desde)
+    noches = numero_dia(hasta) - inicio + 1
+    matriz = np.zeros((len(calendario.tipos), noches), dtype=np.int32)
+    for codigo, i, j in zip(calendario.codigos.tolist(), calendario.inicios.tolist(), calendario.fines.tolist()):
+        i, j = max(i - inicio, 0), min(j - inicio, noches)
+        if j > i:
+            matriz[codigo, i:j] += 1
+    return matriz
+
+
+def medir(funcion, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return resultado, sorted(tiempos)[len(tiempos) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reservas', type=int, default=1000000)
+    parser.add_argument('--anios', type=int, default=10, help='años en los que se reparten los check-in')
+    parser.add_argument('--desde', default='2025-01-01', help='inicio del año a calcular')
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    capacidades = capacidades_desde_hotel(cargar_hotel_info())
+    rnd = np.random.default_rng(args.semilla)
+    primera = numero_dia('2020-01-01')
+    inicios = rnd.integers(primera, primera + 365 * args.anios, args.reservas)
+    calendario = CalendarioOcupacion(capacidades, rnd.integers(0, len(capacidades), args.reservas),
+                                     inicios, inicios + rnd.integers(1, 8, args.reservas))
+    desde = args.desde
+    hasta = str(np.datetime64(desde) + np.timedelta64(364, 'D'))
+    print(f"{args.reservas:,} reservas en {args.anios} años, {sum(capacidades.values())} habitaciones; "
+          f"ocupación de {desde} a {hasta}\n")
+
+    bucle, bucle_s = medir(lambda: ocupacion_bucle(calendario, desde, hasta), repeticiones=1)
+    vectorizada, vectorizada_s = medir(lambda: calendario.matriz(desde, hasta))
+    resumen, resumen_s = medir(lambda: calendario.resumen(desde, hasta))
+    print(f"{'Método':<22} {'tiempo':>12}")
+    print(f"{'bucle por reserva':<22} {bucle_s * 1000:>9.1f} ms")
+    print(f"{'vectorizada (matriz)':<22} {vectorizada_s * 1000:>9.1f} ms   ({bucle_s / vectorizada_s:.0f}x)")
+    print(f"{'vectorizada (resumen)':<22} {resumen_s * 1000:>9.1f} ms")
+
+    if not np.array_equal(bucle, vectorizada):
+        print('\n⚠️ La ocupación vectorizada no coincide con el bucle')
+        sys.exit(1)
+
+    noches = int((calendario.fines - calendario.inicios).sum())
+    aproximada = min(noches / (29 * 30) * 100, 100)
+    print(f"\nOcupación {resumen['ocupacion']:.1f}% (por tipo: "
+          + ', '.join(f"{t} {p:.1f}%" for t, p in resumen['por_tipo'].items())
+          + f"); la aproximación anterior daba {aproximada:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark del listado de reservas: OFFSET vs. cursor (keyset)
+Carga una base temporal con muchas reservas y mide cuánto tarda traer una página de 50 a
+distintas profundidades, con LIMIT/OFFSET y con el cursor de consultas.listar_reservas
+(sin filtros, filtrando por tipo de habitación y por un rango de check-in, que se ordena por
+(fecha_checkin, id)). Con el rango de check-in también mide el orden anterior por
+fecha_reserva, que ordenaba todas las reservas del rango en cada página.
+
+Uso (desde backend/):
+    python benchmarks/bench_paginacion.py --reservas 2000000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consultas import codificar_cursor, columna_orden, condiciones, listar_reservas  # noqa: E402
+from db import BaseDatos  # noqa: E402
+from generador import cargar, generador_desde_hotel  # noqa: E402
+from router_faq import cargar_hotel_info  # noqa: E402
+
+
+def medir(funcion, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return sorted(tiempos)[len(tiempos) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reservas', type=int, default=1000000)
+    parser.add_argument('--pagina', type=int, default=50)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='bench_paginacion_')
+    db = BaseDatos(os.path.join(directorio, 'reservas.db'))
+    try:
+        db.migrar()
+        inicio = time.perf_counter()
+        cargar(db, generador_desde_hotel(cargar_hotel_info(), semilla=args.semilla, sobreventa=None), args.reservas)
+        print(f"{args.reservas:,} reservas cargadas en {time.perf_counter() - inicio:.1f} s\n")
+
+        # el filtro por tipo deja ~1/4 de las filas: las profundidades no pasan de ahí
+        profundidades = sorted(p for p in {0, 1000, 10000, 100000, args.reservas // 5} if p < args.reservas // 4)
+        casos = (('-', {}), ('doble', {'tipo_habitacion': ['doble']}),
+                 ('checkin', {'checkin_desde': '2023-01-01', 'checkin_hasta': '2024-12-31'}))
+        print(f"{'Profundidad':>12} {'filtro':>8} {'OFFSET':>11} {'cursor':>11}")
+        with db.conexion() as conn:
+            for nombre, filtros in casos:
+                where, params = condiciones(filtros)
+                where = f"WHERE {' AND '.join(where)}" if where else ''
+                orden = columna_orden(filtros)
+                for profundidad in profundidades:
+                    sql = (f'SELECT * FROM reservas {where} ORDER BY {orden} DESC, id DESC '
+                           f'LIMIT {args.pagina} OFFSET {profundidad}')
+                    offset_ms = medir(lambda: conn.execute(sql, params).fetchall())
+
+                    cursor = None
+                    if profundidad:
+                        anterior = conn.execute(f'SELECT {orden}, id FROM reservas {where} '
+                                                f'ORDER BY {orden} DESC, id DESC LIMIT 1 OFFSET {profundidad - 1}',
+                                                params).fetchone()
+                        cursor = codificar_cursor(*anterior, orden)
+                    cursor_ms = medir(lambda: listar_reservas(conn, filtros, cursor=cursor, limite=args.pagina))
+                    print(f"{profundidad:>12,} {nombre:>8} {offset_ms:>8.2f} ms {cursor_ms:>8.2f} ms")
+
+            # orden anterior con rango de check-in: ordena todo el rango por fecha_reserva en cada página
+            where, params = condiciones(casos[-1][1])
+            sql = (f"SELECT * FROM reservas WHERE {' AND '.join(where)} "
+                   f"ORDER BY fecha_reserva DESC, id DESC LIMIT {args.pagina}")
+            print(f"\nRango de check-in ordenado por fecha_reserva (antes): "
+                  f"{medir(lambda: conn.execute(sql, params).fetchall()):.2f} ms por página")
+    finally:
+        db.cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
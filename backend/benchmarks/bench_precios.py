@@ -0,0 +1,103 @@
+"""
+Benchmark del cálculo de precios
+Compara el cálculo anterior (un strftime + strptime por noche) con el motor de precios
+precalculado (precios.py), tanto por cotización como por lote.
+
+Uso (desde backend/):
+    python benchmarks/bench_precios.py --cotizaciones 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from precios import CalendarioTemporadas, MotorPrecios, feriados_desde_hotel, precios_desde_hotel  # noqa: E402
+from router_faq import cargar_hotel_info  # noqa: E402
+
+
+# --- Implementación anterior (copiada de app.py como referencia) ---
+def es_temporada_alta_anterior(fecha_str):
+    try:
+        fecha = datetime.strptime(fecha_str, "%Y-%m-%d")
+        mes = fecha.month
+        if mes in [12, 1, 2]:
+            return True
+        if mes in [3, 4]:
+            if 10 <= fecha.day <= 20:
+                return True
+        return False
+    except Exception:
+        return False
+
+
+def calcular_precio_anterior(habitaciones, tipo_habitacion, fecha_checkin, fecha_checkout):
+    checkin = datetime.strptime(fecha_checkin, "%Y-%m-%d")
+    checkout = datetime.strptime(fecha_checkout, "%Y-%m-%d")
+    noches = (checkout - checkin).days
+    habitacion = habitaciones.get(tipo_habitacion)
+    if noches <= 0 or not habitacion:
+        return None
+    precio_total = 0
+    fecha_actual = checkin
+    while fecha_actual < checkout:
+        if es_temporada_alta_anterior(fecha_actual.strftime("%Y-%m-%d")):
+            precio_total += habitacion["precio_temporada_alta"]
+        else:
+            precio_total += habitacion["precio_temporada_baja"]
+        fecha_actual += timedelta(days=1)
+    return {"noches": noches, "precio_total": precio_total, "precio_promedio_noche": precio_total / noches}
+
+
+def generar_cotizaciones(cantidad, tipos, max_noches, semilla):
+    rnd = random.Random(semilla)
+    inicio = date(2025, 1, 1)
+    cotizaciones = []
+    for _ in range(cantidad):
+        checkin = inicio + timedelta(days=rnd.randint(0, 730))
+        checkout = checkin + timedelta(days=rnd.randint(1, max_noches))
+        cotizaciones.append((rnd.choice(tipos), checkin.isoformat(), checkout.isoformat()))
+    return cotizaciones
+
+
+def medir(nombre, funcion, cantidad):
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    print(f"{nombre:<38} {segundos * 1000:>10.1f} ms   {cantidad / segundos:>12,.0f} cotizaciones/s")
+    return segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cotizaciones', type=int, default=20000)
+    parser.add_argument('--max-noches', type=int, default=30)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    hotel = cargar_hotel_info()
+    habitaciones = precios_desde_hotel(hotel)
+
+    inicio = time.perf_counter()
+    motor = MotorPrecios(habitaciones, CalendarioTemporadas(feriados_largos=feriados_desde_hotel(hotel)))
+    print(f"Construcción del calendario y acumulados: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    cotizaciones = generar_cotizaciones(args.cotizaciones, list(habitaciones), args.max_noches, args.semilla)
+    print(f"{len(cotizaciones):,} cotizaciones, estadías de 1 a {args.max_noches} noches\n")
+
+    t_anterior = medir('Anterior (bucle por noche)', lambda: [
+        calcular_precio_anterior(habitaciones, *c) for c in cotizaciones
+    ], len(cotizaciones))
+    t_motor = medir('Motor: cotizar() una por una', lambda: [motor.cotizar(*c) for c in cotizaciones], len(cotizaciones))
+    t_lote = medir('Motor: cotizar_lote()', lambda: motor.cotizar_lote(cotizaciones), len(cotizaciones))
+
+    print(f"\nAceleración cotizar():      x{t_anterior / t_motor:.1f}")
+    print(f"Aceleración cotizar_lote(): x{t_anterior / t_lote:.1f}")
+
+
+if __name__ == '__main__':
+    main()
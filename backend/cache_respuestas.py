@@ -0,0 +1,193 @@
+"""
+Caché semántica de respuestas del chat
+Evita regenerar con Gemini respuestas a preguntas ya contestadas con otras palabras:
+el mensaje se normaliza, se vectoriza con TF-IDF de n-gramas de caracteres y se compara
+por similitud coseno contra las entradas guardadas (LRU + TTL, memoria acotada).
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+from router_faq import normalizar
+
+# Números, emails y negaciones deben coincidir exactamente: "reserva para 2" y "reserva para 3",
+# o "quiero desayuno" y "no quiero desayuno", son casi iguales como texto pero no como respuesta
+REGEX_DISTINTIVOS = re.compile(r'\d+|\S+@\S+')
+NEGADORES = {'no', 'nunca', 'sin', 'tampoco', 'ni', 'nada', 'jamas', 'ningun', 'ninguna', 'ninguno'}
+# Con menos palabras que esto solo vale la coincidencia exacta ("la doble" ≈ "la triple" por n-gramas)
+MIN_PALABRAS_SEMANTICA = 4
+
+
+def huella_datos(*partes):
+    """Hash de los datos del hotel; si cambia, la caché se invalida"""
+    h = hashlib.sha1()
+    for parte in partes:
+        h.update(repr(parte).encode('utf-8'))
+    return h.hexdigest()
+
+
+def distintivos(mensaje, texto):
+    """Números y emails del mensaje original y negaciones del texto normalizado"""
+    return set(REGEX_DISTINTIVOS.findall(mensaje or '')) | (NEGADORES & set(texto.split()))
+
+
+def textos_corpus(datos):
+    """Todos los textos de un JSON (para ajustar el IDF del vectorizador)"""
+    if isinstance(datos, dict):
+        return [t for clave, valor in datos.items() for t in [str(clave)] + textos_corpus(valor)]
+    if isinstance(datos, list):
+        return [t for valor in datos for t in textos_corpus(valor)]
+    return [str(datos)]
+
+
+class CacheSemantica:
+    """
+    Caché de respuestas con búsqueda por similitud.
+    Las entradas se agrupan por el historial corto normalizado (solo se comparan mensajes
+    con el mismo contexto) y dentro del grupo se busca el vecino más cercano por coseno.
+    """
+
+    def __init__(self, corpus, max_entradas=512, ttl_segundos=3600, umbral_similitud=0.92, version=''):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self.umbral_similitud = umbral_similitud
+        self.version = version
+
+        # El IDF se ajusta una sola vez con textos del hotel: palabras comunes ("tienen",
+        # "hotel") pesan poco y las palabras nuevas pesan el máximo
+        self.vectorizador = HashingVectorizer(
+            analyzer='char_wb', ngram_range=(3, 5), n_features=2 ** 18,
+            alternate_sign=False, norm=None
+        )
+        self.tfidf = TfidfTransformer(sublinear_tf=True)
+        self.tfidf.fit(self.vectorizador.transform([normalizar(t) for t in corpus]))
+
+        self._entradas = OrderedDict()  # (grupo, texto) → entrada
+        self._matrices = {}  # grupo → (claves, matriz) para buscar por similitud
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.aciertos_semanticos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.invalidaciones = 0
+
+    def _vectorizar(self, texto):
+        return self.tfidf.transform(self.vectorizador.transform([texto]))
+
+    @staticmethod
+    def _grupo(historial):
+        """Clave del historial corto (rol + contenido normalizado)"""
+        return '|'.join(f"{m.get('role')}:{normalizar(m.get('content', ''))}" for m in historial)
+
+    def _verificar_version(self, version):
+        if version is not None and version != self.version:
+            self._entradas.clear()
+            self._matrices.clear()
+            self.version = version
+            self.invalidaciones += 1
+
+    def _eliminar(self, clave):
+        del self._entradas[clave]
+        self._matrices.pop(clave[0], None)
+
+    def _matriz_grupo(self, grupo):
+        if grupo not in self._matrices:
+            claves = [c for c in self._entradas if c[0] == grupo]
+            matriz = sp.vstack([self._entradas[c]['vector'] for c in claves]) if claves else None
+            self._matrices[grupo] = (claves, matriz)
+        return self._matrices[grupo]
+
+    def buscar(self, mensaje, historial=(), version=None):
+        """Devuelve la respuesta cacheada más similar o None"""
+        texto = normalizar(mensaje)
+        grupo = self._grupo(historial)
+        buscados = distintivos(mensaje, texto)
+
+        with self._lock:
+            self._verificar_version(version)
+            ahora = time.time()
+
+            # 1) Coincidencia exacta del texto normalizado
+            clave = (grupo, texto)
+            entrada = self._entradas.get(clave)
+            if entrada and ahora - entrada['creado'] > self.ttl_segundos:
+                self._eliminar(clave)
+                entrada = None
+            if entrada:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada['respuesta']
+
+            # 2) Vecino más cercano por similitud coseno dentro del mismo grupo (mensajes no tan cortos)
+            claves, matriz = self._matriz_grupo(grupo)
+            if matriz is not None and len(texto.split()) >= MIN_PALABRAS_SEMANTICA:
+                similitudes = (matriz @ self._vectorizar(texto).T).toarray().ravel()
+                for i in similitudes.argsort()[::-1]:
+                    if similitudes[i] < self.umbral_similitud:
+                        break
+                    entrada = self._entradas.get(claves[i])
+                    if entrada is None or entrada['distintivos'] != buscados:
+                        continue
+                    if ahora - entrada['creado'] > self.ttl_segundos:
+                        self._eliminar(claves[i])
+                        break
+                    self._entradas.move_to_end(claves[i])
+                    self.aciertos += 1
+                    self.aciertos_semanticos += 1
+                    return entrada['respuesta']
+
+            self.fallos += 1
+            return None
+
+    def guardar(self, mensaje, historial, respuesta, version=None):
+        texto = normalizar(mensaje)
+        if not texto or not respuesta:
+            return
+        grupo = self._grupo(historial)
+
+        with self._lock:
+            self._verificar_version(version)
+            clave = (grupo, texto)
+            if clave in self._entradas:
+                self._eliminar(clave)
+            self._entradas[clave] = {
+                'vector': self._vectorizar(texto),
+                'distintivos': distintivos(mensaje, texto),
+                'respuesta': respuesta,
+                'creado': time.time()
+            }
+            self._matrices.pop(grupo, None)
+
+            # Expulsar las entradas usadas hace más tiempo (LRU)
+            while len(self._entradas) > self.max_entradas:
+                clave_vieja, _ = self._entradas.popitem(last=False)
+                self._matrices.pop(clave_vieja[0], None)
+                self.expulsiones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._matrices.clear()
+            self.invalidaciones += 1
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._entradas),
+            'max_entradas': self.max_entradas,
+            'ttl_segundos': self.ttl_segundos,
+            'umbral_similitud': self.umbral_similitud,
+            'aciertos': self.aciertos,
+            'aciertos_semanticos': self.aciertos_semanticos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0,
+            'expulsiones': self.expulsiones,
+            'invalidaciones': self.invalidaciones
+        }
@@ -0,0 +1,301 @@
+"""
+Cliente resiliente para el modelo de lenguaje
+Envuelve las llamadas a Gemini con:
+- plazo máximo por pedido (incluye reintentos),
+- reintentos con espera exponencial y jitter ante errores transitorios (503, 429, timeouts),
+- hedging opcional: si la primera llamada no respondió en el p95 de latencia se lanza una
+  segunda y se usa la que termine primero,
+- circuit breaker: tras varios fallos seguidos se deja de llamar al modelo por un tiempo y
+  el chat responde con datos de hotel_info.json (ver RouterFAQ.respuesta_contingencia).
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from limitador import Saturado, TiempoAgotado
+
+# Errores de google.api_core (y similares) que vale la pena reintentar
+ERRORES_TRANSITORIOS = {
+    'ServiceUnavailable', 'ResourceExhausted', 'TooManyRequests', 'DeadlineExceeded',
+    'InternalServerError', 'BadGateway', 'GatewayTimeout', 'Aborted',
+}
+CODIGOS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+
+class CircuitoAbierto(Exception):
+    """El modelo falló varias veces seguidas: no se lo llama hasta que pase el enfriamiento"""
+
+    def __init__(self, reintentar_en):
+        super().__init__('El asistente no está disponible en este momento')
+        self.reintentar_en = reintentar_en
+
+
+def es_transitorio(error):
+    """True si el error puede resolverse reintentando (no incluye Saturado: es la cola local)"""
+    if isinstance(error, (TiempoAgotado, TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in ERRORES_TRANSITORIOS:
+        return True
+    codigo = getattr(error, 'code', None)
+    codigo = getattr(codigo, 'value', codigo)  # grpc.StatusCode o int
+    return codigo in CODIGOS_TRANSITORIOS
+
+
+class Circuito:
+    """
+    Circuit breaker: cerrado (normal) → abierto tras umbral_fallos fallos seguidos →
+    semiabierto pasado el enfriamiento (deja pasar una llamada de prueba) → cerrado si responde.
+    La prueba se resuelve con exito(), fallo() o liberar() (no llegó a probar el modelo: cola
+    llena o el cliente cortó el streaming). Si no informa nada en otro enfriamiento, se deja
+    pasar una prueba nueva: el circuito nunca queda trabado en semiabierto.
+    """
+
+    def __init__(self, umbral_fallos=5, enfriamiento_segundos=30):
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento_segundos = enfriamiento_segundos
+        self._lock = threading.Lock()
+        self.estado = 'cerrado'
+        self.fallos_seguidos = 0
+        self.abierto_desde = 0.0
+        self.prueba_desde = 0.0
+        self.aperturas = 0
+        self.rechazos = 0
+
+    def permitir(self):
+        """Lanza CircuitoAbierto si no se debe llamar al modelo"""
+        with self._lock:
+            if self.estado == 'cerrado':
+                return
+            ahora = time.monotonic()
+            desde = self.abierto_desde if self.estado == 'abierto' else self.prueba_desde
+            restante = desde + self.enfriamiento_segundos - ahora
+            if restante <= 0:
+                self.estado = 'semiabierto'  # esta llamada es la prueba
+                self.prueba_desde = ahora
+                return
+            self.rechazos += 1
+            raise CircuitoAbierto(max(1, int(restante + 0.999)))
+
+    def exito(self):
+        with self._lock:
+            self.estado = 'cerrado'
+            self.fallos_seguidos = 0
+
+    def fallo(self):
+        with self._lock:
+            self.fallos_seguidos += 1
+            if self.estado == 'semiabierto' or self.fallos_seguidos >= self.umbral_fallos:
+                if self.estado != 'abierto':
+                    self.aperturas += 1
+                self.estado = 'abierto'
+                self.abierto_desde = time.monotonic()
+
+    def liberar(self):
+        """La llamada terminó sin resultado del modelo: si era la prueba, vuelve a abierto con un enfriamiento nuevo"""
+        with self._lock:
+            if self.estado == 'semiabierto':
+                self.estado = 'abierto'
+                self.abierto_desde = time.monotonic()
+
+    def estadisticas(self):
+        return {
+            'estado': self.estado,
+            'fallos_seguidos': self.fallos_seguidos,
+            'aperturas': self.aperturas,
+            'rechazos': self.rechazos
+        }
+
+
+class ClienteLLM:
+    """
+    generar(prompt) → texto; flujo(prompt) → generador de fragmentos.
+    modelo: cualquier objeto con generate_content(prompt, stream=False, request_options=None)
+    (Gemini o un modelo falso local que inyecte demoras y errores).
+    Las llamadas corren en el LimitadorLLM (pool acotado).
+    """
+
+    def __init__(self, modelo, limitador, plazo_segundos=30, reintentos=2, espera_base=0.25, espera_maxima=4.0,
+                 hedging=False, hedging_minimo=0.5, circuito=None):
+        self.modelo = modelo
+        self.limitador = limitador
+        self.plazo_segundos = plazo_segundos
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.hedging = hedging
+        self.hedging_minimo = hedging_minimo
+        self.circuito = circuito or Circuito()
+
+        self._latencias = deque(maxlen=200)  # segundos de las últimas llamadas exitosas
+        self._lock = threading.Lock()
+        self.llamadas = 0
+        self.reintentadas = 0
+        self.cubiertas = 0  # hedging: segunda llamada lanzada
+        self.ganadas_por_cobertura = 0
+        self.fallidas = 0
+
+    def p95(self):
+        """Latencia p95 de las llamadas recientes (None con pocas muestras)"""
+        with self._lock:
+            muestras = sorted(self._latencias)
+        if len(muestras) < 20:
+            return None
+        return muestras[int(len(muestras) * 0.95) - 1]
+
+    def _llamar(self, prompt, timeout):
+        inicio = time.perf_counter()
+        texto = self.modelo.generate_content(prompt, request_options={'timeout': timeout}).text
+        with self._lock:
+            self._latencias.append(time.perf_counter() - inicio)
+        return texto
+
+    def _intento(self, prompt, limite):
+        """Una llamada (más su cobertura si corresponde) dentro del tiempo restante"""
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            raise TiempoAgotado(self.plazo_segundos)
+
+        futuros = [self.limitador.enviar(self._llamar, prompt, restante)]
+        umbral = self.p95() if self.hedging else None
+        if umbral is not None:
+            umbral = max(umbral, self.hedging_minimo)
+            hechos, _ = wait(futuros, timeout=min(umbral, restante))
+            if not hechos and limite - time.monotonic() > 0:
+                try:
+                    futuros.append(self.limitador.enviar(self._llamar, prompt, limite - time.monotonic()))
+                    with self._lock:
+                        self.cubiertas += 1
+                except Saturado:
+                    pass  # sin lugar para la cobertura: se sigue esperando la primera
+
+        pendientes = set(futuros)
+        error = None
+        while pendientes:
+            hechos, pendientes = wait(pendientes, timeout=max(limite - time.monotonic(), 0),
+                                      return_when=FIRST_COMPLETED)
+            if not hechos:
+                break
+            for futuro in hechos:
+                if futuro.exception() is None:
+                    for otro in pendientes:
+                        self.limitador.abandonar(otro, vencida=False)
+                    if futuro is not futuros[0]:
+                        with self._lock:
+                            self.ganadas_por_cobertura += 1
+                    return futuro.result()
+                error = futuro.exception()
+
+        for futuro in pendientes:
+            self.limitador.abandonar(futuro)
+        raise error or TiempoAgotado(self.plazo_segundos)
+
+    def _esperar(self, intento, limite):
+        """Espera exponencial con jitter completo, sin pasarse del plazo. False si no queda tiempo."""
+        espera = random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** intento))
+        if time.monotonic() + espera >= limite:
+            return False
+        time.sleep(espera)
+        return True
+
+    def generar(self, prompt):
+        """Texto de la respuesta. Lanza CircuitoAbierto, Saturado, TiempoAgotado o el último error del modelo."""
+        self.circuito.permitir()
+        with self._lock:
+            self.llamadas += 1
+        limite = time.monotonic() + self.plazo_segundos
+
+        intento = 0
+        while True:
+            try:
+                texto = self._intento(prompt, limite)
+            except Saturado:
+                self.circuito.liberar()
+                raise
+            except Exception as e:
+                if es_transitorio(e) and intento < self.reintentos and self._esperar(intento, limite):
+                    intento += 1
+                    with self._lock:
+                        self.reintentadas += 1
+                    continue
+                self.circuito.fallo()
+                with self._lock:
+                    self.fallidas += 1
+                raise
+            self.circuito.exito()
+            return texto
+
+    def flujo(self, prompt):
+        """
+        Versión en streaming (sin hedging). La admisión y el circuito se verifican acá mismo;
+        si el error llega antes del primer fragmento se reintenta, después ya no (el cliente
+        recibió parte de la respuesta).
+        """
+        self.circuito.permitir()
+        with self._lock:
+            self.llamadas += 1
+        limite = time.monotonic() + self.plazo_segundos
+
+        def abrir():
+            restante = max(limite - time.monotonic(), 0.001)
+            return self.limitador.flujo(
+                self.modelo.generate_content, prompt, stream=True,
+                request_options={'timeout': restante}, timeout=restante
+            )
+
+        try:
+            primera = abrir()
+        except Saturado:
+            self.circuito.liberar()
+            raise
+
+        def fragmentos():
+            actual = primera
+            intento = 0
+            recibidos = False
+            while True:
+                try:
+                    # El reintento se abre dentro del try: si la cola está llena o falla, el
+                    # circuito se entera igual que con la primera llamada
+                    if actual is None:
+                        actual = abrir()
+                    for fragmento in actual:
+                        recibidos = True
+                        yield fragmento
+                except GeneratorExit:
+                    self.circuito.liberar()  # el cliente cortó: no se sabe cómo terminaba
+                    raise
+                except Saturado:
+                    self.circuito.liberar()
+                    raise
+                except Exception as e:
+                    if (not recibidos and es_transitorio(e)
+                            and intento < self.reintentos and self._esperar(intento, limite)):
+                        intento += 1
+                        with self._lock:
+                            self.reintentadas += 1
+                        actual = None
+                        continue
+                    self.circuito.fallo()
+                    with self._lock:
+                        self.fallidas += 1
+                    raise
+                self.circuito.exito()
+                return
+
+        return fragmentos()
+
+    def estadisticas(self):
+        p95 = self.p95()
+        return {
+            'llamadas': self.llamadas,
+            'reintentadas': self.reintentadas,
+            'fallidas': self.fallidas,
+            'hedging': self.hedging,
+            'coberturas_lanzadas': self.cubiertas,
+            'ganadas_por_cobertura': self.ganadas_por_cobertura,
+            'latencia_p95_segundos': round(p95, 3) if p95 is not None else None,
+            'circuito': self.circuito.estadisticas()
+        }
@@ -0,0 +1,193 @@
+"""
+Armado del prompt por recuperación de secciones
+En lugar de enviar toda la información del hotel en cada turno, datos/hotel_info.json se
+divide en secciones una sola vez al iniciar, se indexa con TF-IDF y en cada mensaje se
+incluyen solo las secciones más relevantes.
+"""
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+
+from router_faq import normalizar, formatear_precio
+
+# Instrucciones fijas (identidad, tono y reglas sobre imágenes)
+PROMPT_BASE = """Eres BellBot, el asistente virtual del {nombre} en {ciudad}, {provincia}, {pais}. Eres amable, profesional y eficiente.
+
+INSTRUCCIONES:
+1. Saluda cordialmente y ofrece ayuda
+2. Si preguntan por habitaciones, describe las opciones con sus características y precios
+3. Para hacer una reserva, solicita: nombre, email, teléfono, tipo de habitación, fechas (check-in y check-out), número de huéspedes
+4. Calcula precios según la temporada (verifica las fechas)
+5. Responde preguntas sobre servicios, políticas, ubicación, etc. usando solo la información de abajo
+6. Si no tienes información, sé honesto y ofrece contactar a recepción
+7. Mantén un tono profesional pero amigable y responde siempre en español argentino
+
+IMÁGENES: el sistema muestra automáticamente las fotos de las habitaciones. NO menciones imágenes, fotos ni contenido visual
+(nada de "te muestro la imagen" o "aquí está la foto"); describe tamaño, comodidades, precio y capacidad.
+"""
+
+# Palabras extra por sección para mejorar la recuperación con consultas coloquiales
+ALIAS_SECCIONES = {
+    'ubicacion': 'direccion donde queda como llego ubicado mapa centro',
+    'contacto': 'telefono whatsapp email mail redes contacto llamar',
+    'horarios': 'horario hora check in check out entrada salida desayuno recepcion',
+    'servicios': 'servicios wifi internet estacionamiento cochera piscina pileta gimnasio limpieza lavanderia room service conferencias',
+    'habitaciones': 'habitaciones tipos opciones precios tarifas cuanto cuesta sale barata capacidad personas reservar reserva',
+    'politicas': 'politicas cancelar cancelacion mascotas perro ninos chicos menores fumar garantia tarjeta edad documento',
+    'formas_pago': 'pagar pago tarjeta efectivo transferencia cuotas debito credito anticipo',
+    'temporadas': 'temporada alta baja verano semana santa feriados fechas enero febrero marzo abril mayo julio octubre diciembre',
+    'atracciones_cercanas': 'atracciones que hacer visitar cerca paseos museo plaza turismo',
+    'preguntas_frecuentes': 'preguntas frecuentes',
+    'accesibilidad': 'accesibilidad silla de ruedas discapacidad rampa ascensor adaptada pisos estrellas',
+}
+
+# Si ninguna sección se parece al mensaje (ej. un saludo) se envía el resumen de habitaciones
+SECCIONES_POR_DEFECTO = ['habitaciones']
+
+PALABRAS_VACIAS = set(
+    'a al algo con como cual de del el en es esta este hay la las lo los me mi para por que se su sus '
+    'tienen tiene un una uno unos y o hola quiero puedo'.split()
+)
+
+
+def tokenizar(texto):
+    """Palabras sin números, sin palabras vacías y sin la 's' final del plural (habitaciones → habitacione)"""
+    return [p[:-1] if len(p) > 4 and p.endswith('s') else p for p in texto.split()
+            if p not in PALABRAS_VACIAS and not p.isdigit()]
+
+
+def es_simple(valor):
+    """Valor que entra en una sola línea (escalar o lista de escalares)"""
+    if isinstance(valor, dict):
+        return False
+    if isinstance(valor, list):
+        return all(not isinstance(v, (dict, list)) for v in valor)
+    return True
+
+
+def a_texto(valor, sangria=''):
+    """Convierte un valor del JSON en texto compacto (menos tokens que json.dumps con indent)"""
+    if isinstance(valor, dict):
+        lineas = []
+        for clave, v in valor.items():
+            etiqueta = clave.replace('_', ' ')
+            if es_simple(v):
+                lineas.append(f"{sangria}- {etiqueta}: {a_texto(v)}")
+            else:
+                lineas.append(f"{sangria}- {etiqueta}:")
+                lineas.append(a_texto(v, sangria + '  '))
+        return '\n'.join(lineas)
+    if isinstance(valor, list):
+        if es_simple(valor):
+            return ', '.join(a_texto(v) for v in valor)
+        lineas = []
+        for v in valor:
+            if isinstance(v, dict) and all(es_simple(x) for x in v.values()):
+                # Lista de objetos simples (servicios, atracciones): un objeto por línea
+                lineas.append(sangria + '- ' + '; '.join(f"{k.replace('_', ' ')}: {a_texto(x)}" for k, x in v.items()))
+            else:
+                lineas.append(a_texto(v, sangria))
+        return '\n'.join(lineas)
+    if isinstance(valor, bool):
+        return 'sí' if valor else 'no'
+    return str(valor)
+
+
+def estimar_tokens(texto):
+    """Aproximación: ~4 caracteres por token"""
+    return (len(texto) + 3) // 4
+
+
+class ConstructorPrompt:
+    """
+    Divide la información del hotel en secciones, las indexa con TF-IDF y arma el
+    prompt de cada turno con las top_k secciones más parecidas al mensaje.
+    """
+
+    def __init__(self, hotel, habitaciones, top_k=3, similitud_minima=0.05, proporcion_minima=0.3):
+        self.top_k = top_k
+        self.similitud_minima = similitud_minima
+        self.proporcion_minima = proporcion_minima
+        self.base = PROMPT_BASE.format(nombre=hotel['nombre'], **{
+            k: hotel['ubicacion'][k] for k in ('ciudad', 'provincia', 'pais')
+        })
+        # Datos mínimos que van siempre (pocos tokens)
+        self.esenciales = (
+            f"DATOS BÁSICOS: {hotel['ubicacion']['direccion']}, {hotel['ubicacion']['ciudad']}. "
+            f"Check-in {hotel['horarios']['check_in']} hs, check-out {hotel['horarios']['check_out']} hs. "
+            f"Teléfono {hotel['contacto']['telefono']}."
+        )
+
+        self.secciones = self._dividir(hotel, habitaciones)
+        self.nombres = list(self.secciones)
+        self.vectorizador = TfidfVectorizer(
+            preprocessor=normalizar, tokenizer=tokenizar, token_pattern=None, sublinear_tf=True
+        )
+        self.matriz = self.vectorizador.fit_transform([
+            f"{nombre.replace('_', ' ').replace(':', ' ')} {ALIAS_SECCIONES.get(nombre, '')} {texto}"
+            for nombre, texto in self.secciones.items()
+        ])
+
+    def _dividir(self, hotel, habitaciones):
+        """Secciones del JSON → {nombre: texto}. Precios de habitaciones desde HABITACIONES (fuente de los cálculos)."""
+        secciones = {}
+        for clave in ('ubicacion', 'contacto', 'horarios', 'servicios', 'politicas', 'formas_pago',
+                      'temporadas', 'atracciones_cercanas'):
+            if clave in hotel:
+                secciones[clave] = a_texto(hotel[clave])
+
+        if 'preguntas_frecuentes' in hotel:
+            secciones['preguntas_frecuentes'] = '\n'.join(
+                f"- {f['pregunta']} {f['respuesta']}" for f in hotel['preguntas_frecuentes']
+            )
+
+        secciones['accesibilidad'] = a_texto({
+            **hotel.get('accesibilidad', {}),
+            'estrellas': hotel.get('estrellas'),
+            'pisos': hotel.get('pisos'),
+            'ascensor': hotel.get('ascensor'),
+            'total_habitaciones': hotel.get('total_habitaciones'),
+        })
+
+        # Resumen de todas las habitaciones + una sección con el detalle de cada tipo
+        secciones['habitaciones'] = '\n'.join(
+            f"- {clave} ({h['nombre']}): hasta {h['capacidad']} personas, "
+            f"{formatear_precio(h['precio_temporada_baja'])} temporada baja / "
+            f"{formatear_precio(h['precio_temporada_alta'])} temporada alta por noche"
+            for clave, h in habitaciones.items()
+        )
+        for clave, h in habitaciones.items():
+            detalle = dict(hotel.get('habitaciones', {}).get(clave, {}))
+            detalle.pop('precios', None)
+            detalle.pop('disponibilidad', None)
+            secciones[f'habitacion:{clave}'] = (
+                f"{h['descripcion']}. Precio por noche: {formatear_precio(h['precio_temporada_baja'])} "
+                f"(baja) / {formatear_precio(h['precio_temporada_alta'])} (alta).\n{a_texto(detalle)}"
+            )
+        return secciones
+
+    def seleccionar(self, consulta):
+        """Nombres de las secciones más relevantes para la consulta"""
+        similitudes = linear_kernel(self.vectorizador.transform([consulta]), self.matriz).ravel()
+        orden = similitudes.argsort()[::-1][:self.top_k]
+        minimo = max(self.similitud_minima, similitudes[orden[0]] * self.proporcion_minima)
+        elegidas = [self.nombres[i] for i in orden if similitudes[i] >= minimo]
+        return elegidas or list(SECCIONES_POR_DEFECTO)
+
+    def construir(self, mensaje, historial=()):
+        """
+        Devuelve (prompt_sistema, info) con las secciones elegidas.
+        El último mensaje del usuario en el historial se suma a la consulta para las repreguntas ("¿y la doble?").
+        """
+        previos = [m.get('content', '') for m in historial if m.get('role') == 'user'][-1:]
+        secciones = self.seleccionar(' '.join([mensaje, mensaje] + previos))
+
+        partes = [self.base, self.esenciales, 'INFORMACIÓN RELEVANTE DEL HOTEL:']
+        partes.extend(f"[{nombre.replace('_', ' ').upper()}]\n{self.secciones[nombre]}" for nombre in secciones)
+        prompt = '\n\n'.join(partes)
+
+        return prompt, {'secciones': secciones}
+
+    def prompt_completo(self):
+        """Prompt con todas las secciones (referencia para comparar tamaños)"""
+        return '\n\n'.join([self.base, self.esenciales] + list(self.secciones.values()))
@@ -0,0 +1,197 @@
+"""
+Consultas de reservas con filtros y paginación por cursor
+El listado se ordena por (fecha_reserva, id) descendente y cada página sigue desde la última
+fila de la anterior (keyset): WHERE (fecha_reserva, id) < (?, ?) usa el índice y cuesta lo
+mismo en la página 1 que en la 10.000, a diferencia de OFFSET que recorre todas las filas
+salteadas. El cursor que recibe el cliente es ese par codificado (opaco).
+Con un rango de check-in se ordena por (fecha_checkin, id) descendente: así el mismo índice
+del filtro da el orden y no hay que ordenar todas las reservas del rango en cada página.
+
+Filtros (query string de /api/reservas):
+    tipo, estado             igualdad (se pueden repetir: ?estado=confirmada&estado=pendiente)
+    email                    igualdad (se normaliza como al reservar: unidecode y minúsculas)
+    checkin_desde/hasta      rango de fecha_checkin (YYYY-MM-DD, inclusive)
+    reservada_desde/hasta    rango de fecha_reserva (YYYY-MM-DD o ISO completo, inclusive)
+    campos                   columnas a devolver (?campos=id,nombre,estado)
+
+La búsqueda por texto (/api/reservas/buscar?q=) usa el índice FTS5 reservas_fts (migración 4).
+"""
+
+import base64
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+from unidecode import unidecode
+
+from precios import parsear_fecha
+
+COLUMNAS = ('id', 'nombre', 'email', 'telefono', 'tipo_habitacion', 'fecha_checkin', 'fecha_checkout',
+            'huespedes', 'precio_total', 'estado', 'fecha_reserva')
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+# Peso de cada columna de reservas_fts en el ranking (bm25): un acierto en el nombre vale más
+PESOS_BUSQUEDA = (10.0, 5.0, 2.0)
+
+
+class ConsultaInvalida(ValueError):
+    """Filtro, campo o cursor mal formado (400 en el API)"""
+
+
+def columna_orden(filtros):
+    """Columna por la que se ordena (y pagina) el listado: fecha_checkin si se filtra por check-in"""
+    if filtros.get('checkin_desde') or filtros.get('checkin_hasta'):
+        return 'fecha_checkin'
+    return 'fecha_reserva'
+
+
+def codificar_cursor(valor, reserva_id, columna='fecha_reserva'):
+    datos = [valor, reserva_id] if columna == 'fecha_reserva' else [valor, reserva_id, columna]
+    texto = json.dumps(datos, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, columna='fecha_reserva'):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        valor, reserva_id, *resto = json.loads(texto)
+        if resto != ([] if columna == 'fecha_reserva' else [columna]):
+            raise ValueError('el cursor es de un listado con otro orden')
+        return str(valor), int(reserva_id)
+    except (ValueError, TypeError):
+        raise ConsultaInvalida('Cursor inválido')
+
+
+def filtros_desde_args(args):
+    """Filtros validados desde request.args (o cualquier MultiDict con get/getlist)"""
+    filtros = {}
+    for clave, columna in (('tipo', 'tipo_habitacion'), ('estado', 'estado')):
+        valores = [v for v in args.getlist(clave) if v]
+        if valores:
+            filtros[columna] = valores
+    if args.get('email'):
+        filtros['email'] = [unidecode(args.get('email').strip()).lower()]
+    for clave in ('checkin_desde', 'checkin_hasta', 'reservada_desde', 'reservada_hasta'):
+        valor = args.get(clave)
+        if not valor:
+            continue
+        # Se guarda normalizada (YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS) para compararla como texto con la columna
+        fecha = parsear_fecha(valor)
+        if fecha is None and clave.startswith('reservada'):
+            try:
+                fecha = datetime.fromisoformat(valor)
+            except ValueError:
+                pass
+        if fecha is None:
+            raise ConsultaInvalida(f'Fecha inválida en {clave}: {valor}')
+        filtros[clave] = fecha.isoformat()
+    return filtros
+
+
+def campos_desde_args(args):
+    """Columnas pedidas en ?campos= (todas si no se indica)"""
+    if not args.get('campos'):
+        return list(COLUMNAS)
+    campos = [c.strip() for c in args.get('campos').split(',') if c.strip()]
+    desconocidos = [c for c in campos if c not in COLUMNAS]
+    if desconocidos:
+        raise ConsultaInvalida(f"Campos desconocidos: {', '.join(desconocidos)}")
+    return campos
+
+
+def condiciones(filtros):
+    """(cláusulas WHERE, parámetros) de los filtros"""
+    where, parametros = [], []
+    for columna in ('tipo_habitacion', 'estado', 'email'):
+        valores = filtros.get(columna)
+        if valores:
+            where.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+            parametros += valores
+    if filtros.get('checkin_desde'):
+        where.append('fecha_checkin >= ?')
+        parametros.append(filtros['checkin_desde'])
+    if filtros.get('checkin_hasta'):
+        where.append('fecha_checkin <= ?')
+        parametros.append(filtros['checkin_hasta'])
+    if filtros.get('reservada_desde'):
+        where.append('fecha_reserva >= ?')
+        parametros.append(filtros['reservada_desde'])
+    if filtros.get('reservada_hasta'):
+        hasta = filtros['reservada_hasta']
+        if len(hasta) == 10:  # una fecha sola incluye todo ese día
+            where.append('fecha_reserva < ?')
+            parametros.append((parsear_fecha(hasta) + timedelta(days=1)).isoformat())
+        else:
+            where.append('fecha_reserva <= ?')
+            parametros.append(hasta)
+    return where, parametros
+
+
+def listar_reservas(conn, filtros=None, campos=COLUMNAS, cursor=None, limite=LIMITE_POR_DEFECTO):
+    """
+    Una página del listado: (lista de dicts con `campos`, cursor de la página siguiente o None).
+    Se lee una fila de más para saber si hay otra página sin hacer un COUNT.
+    """
+    limite = max(1, min(int(limite), LIMITE_MAXIMO))
+    filtros = filtros or {}
+    orden = columna_orden(filtros)
+    where, parametros = condiciones(filtros)
+    if cursor:
+        if 'fecha_checkin <= ?' in where and orden == 'fecha_checkin':
+            # el cursor ya acota desde arriba: con el "+" SQLite no toma checkin_hasta como límite del
+            # índice (recorrería otra vez todas las filas de las páginas anteriores)
+            where[where.index('fecha_checkin <= ?')] = '+fecha_checkin <= ?'
+        where.append(f'({orden}, id) < (?, ?)')
+        parametros += decodificar_cursor(cursor, orden)
+
+    # id y la columna del orden siempre se leen: con ellos se arma el cursor
+    columnas = list(dict.fromkeys(list(campos) + [orden, 'id']))
+    sql = (f"SELECT {', '.join(columnas)} FROM reservas"
+           + (f" WHERE {' AND '.join(where)}" if where else '')
+           + f' ORDER BY {orden} DESC, id DESC LIMIT ?')
+
+    consulta = conn.cursor()
+    consulta.row_factory = sqlite3.Row
+    filas = consulta.execute(sql, parametros + [limite + 1]).fetchall()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1][orden], filas[-1]['id'], orden)
+    return [{c: fila[c] for c in campos} for fila in filas], siguiente
+
+
+def consulta_fts(texto):
+    """
+    Texto libre → expresión MATCH de FTS5: todas las palabras obligatorias y la última parte de
+    cada una como prefijo. Una palabra con puntos o guiones ("jose.perez", "3537-12") se busca
+    como frase; de un email se usa lo anterior a la @ (el dominio lo comparten miles de reservas
+    y solo haría más lenta la búsqueda). Se normaliza con unidecode como los datos al reservar.
+    """
+    frases = []
+    for palabra in unidecode(texto or '').lower().split():
+        partes = re.findall(r'\w+', palabra.split('@')[0] if '@' in palabra[1:] else palabra)
+        if partes:
+            frases.append('"' + ' '.join(partes) + '"*')
+    if not frases:
+        raise ConsultaInvalida('Falta el texto a buscar (?q=)')
+    return ' '.join(frases)
+
+
+def buscar_reservas(conn, texto, campos=COLUMNAS, limite=20):
+    """Reservas cuyo nombre, email o teléfono coincide con el texto, de la más relevante a la menos"""
+    limite = max(1, min(int(limite), LIMITE_MAXIMO))
+    columnas = ', '.join(f'r.{c}' for c in campos)
+    pesos = ', '.join(str(p) for p in PESOS_BUSQUEDA)
+    consulta = conn.cursor()
+    consulta.row_factory = sqlite3.Row
+    filas = consulta.execute(
+        f"""SELECT {columnas} FROM reservas_fts
+            JOIN reservas r ON r.id = reservas_fts.rowid
+            WHERE reservas_fts MATCH ?
+            ORDER BY bm25(reservas_fts, {pesos}), r.fecha_reserva DESC
+            LIMIT ?""",
+        (consulta_fts(texto), limite)
+    ).fetchall()
+    return [dict(fila) for fila in filas]
@@ -0,0 +1,172 @@
+"""
+Recorte del historial por presupuesto de tokens con resumen acumulado
+Los mensajes recientes van textuales hasta completar el presupuesto; los más viejos se
+pliegan en un resumen corto que se calcula de forma incremental (solo se resumen los
+mensajes nuevos que salen de la ventana) y se guarda junto con la conversación.
+"""
+
+import re
+import threading
+
+from constructor_prompt import estimar_tokens
+
+# Datos que conviene recordar aunque el mensaje salga de la ventana (reservas en curso)
+# (el orden importa: cada dato encontrado se quita del texto antes de buscar el siguiente,
+# así una fecha 2025-12-03 no se confunde con un teléfono)
+PATRONES_DATOS = {
+    'email': re.compile(r'[\w.+-]+@[\w-]+\.[\w.]+'),
+    'fechas': re.compile(
+        r'\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}(?:/\d{2,4})?|\d{1,2} de (?:enero|febrero|marzo|abril|mayo|junio|julio|'
+        r'agosto|septiembre|setiembre|octubre|noviembre|diciembre)', re.IGNORECASE),
+    'telefono': re.compile(r'\+?\d[\d\s-]{7,}\d'),
+    'huespedes': re.compile(r'\d+\s*(?:personas|huespedes|huéspedes|adultos|niños|ninos)', re.IGNORECASE),
+    'habitacion': re.compile(r'triple\s+(?:matrimonial|individual)|matrimonial|doble|triple', re.IGNORECASE),
+}
+
+PALABRAS_POR_LINEA = 20
+
+
+def recortar_texto(texto, max_tokens):
+    """Corta el texto para que no supere max_tokens (aprox.)"""
+    max_caracteres = max_tokens * 4
+    if len(texto) <= max_caracteres:
+        return texto
+    return texto[:max_caracteres].rsplit(' ', 1)[0] + ' […]'
+
+
+def resumir_mensaje(rol, contenido):
+    """Una línea corta por mensaje: primera oración, como máximo PALABRAS_POR_LINEA palabras"""
+    primera = re.split(r'(?<=[.!?])\s', contenido.strip(), maxsplit=1)[0]
+    palabras = primera.split()
+    linea = ' '.join(palabras[:PALABRAS_POR_LINEA]) + ('…' if len(palabras) > PALABRAS_POR_LINEA else '')
+    return f"{'Usuario' if rol == 'user' else 'BellBot'}: {linea}"
+
+
+class GestorContexto:
+    """
+    Arma la parte de conversación del prompt con tamaño acotado:
+    resumen (≤ max_tokens_resumen) + mensajes recientes (≤ presupuesto_tokens) + mensaje actual (≤ max_tokens_mensaje).
+    """
+
+    def __init__(self, presupuesto_tokens=1200, max_tokens_mensaje=400, max_tokens_resumen=300, max_mensajes=16):
+        self.presupuesto_tokens = presupuesto_tokens
+        # Tope de mensajes textuales: debe ser menor que el de la sesión para plegarlos antes de que se descarten
+        self.max_mensajes = max_mensajes
+        self.max_tokens_mensaje = max_tokens_mensaje
+        self.max_tokens_resumen = max_tokens_resumen
+
+        self._lock = threading.Lock()
+        self.solicitudes = 0
+        self.mensajes_plegados = 0
+        self.tokens_originales = 0
+        self.tokens_enviados = 0
+
+    def plegar(self, resumen, mensajes):
+        """
+        Suma mensajes al resumen previo (incremental).
+        resumen = {'datos': {clave: valor}, 'lineas': [...], 'tokens_originales': int}
+        """
+        resumen = {
+            'datos': dict(resumen.get('datos', {})) if resumen else {},
+            'lineas': list(resumen.get('lineas', [])) if resumen else [],
+            'tokens_originales': resumen.get('tokens_originales', 0) if resumen else 0,
+        }
+        for msg in mensajes:
+            contenido = msg.get('content', '')
+            resumen['tokens_originales'] += estimar_tokens(contenido)
+            if msg.get('role') == 'user':
+                restante = contenido
+                for clave, patron in PATRONES_DATOS.items():
+                    encontrados = patron.findall(restante)
+                    if encontrados:
+                        resumen['datos'][clave] = ', '.join(dict.fromkeys(e.strip() for e in encontrados))
+                        restante = patron.sub(' ', restante)
+            resumen['lineas'].append(resumir_mensaje(msg.get('role'), contenido))
+
+        # Si el resumen excede su presupuesto se descartan las líneas más viejas (los datos clave quedan)
+        while resumen['lineas'] and estimar_tokens(self.texto_resumen(resumen)) > self.max_tokens_resumen:
+            resumen['lineas'].pop(0)
+        return resumen
+
+    @staticmethod
+    def texto_resumen(resumen):
+        if not resumen or not (resumen.get('datos') or resumen.get('lineas')):
+            return ''
+        partes = ['RESUMEN DE LA CONVERSACIÓN ANTERIOR:']
+        if resumen.get('datos'):
+            partes.append('Datos mencionados por el usuario: ' + '; '.join(f"{k}: {v}" for k, v in resumen['datos'].items()))
+        partes.extend(resumen.get('lineas', []))
+        return '\n'.join(partes)
+
+    def preparar(self, historial, resumen=None):
+        """
+        Devuelve (mensajes_textuales, resumen_actualizado, cantidad_plegada).
+        Los mensajes se recorren del más nuevo al más viejo hasta agotar el presupuesto;
+        el resto se pliega en el resumen.
+        """
+        usados = 0
+        corte = len(historial)
+        for i in range(len(historial) - 1, -1, -1):
+            tokens = min(estimar_tokens(historial[i].get('content', '')), self.max_tokens_mensaje)
+            if usados + tokens > self.presupuesto_tokens or len(historial) - i > self.max_mensajes:
+                break
+            usados += tokens
+            corte = i
+
+        plegados = historial[:corte]
+        if plegados:
+            resumen = self.plegar(resumen, plegados)
+        textuales = [
+            {'role': m.get('role'), 'content': recortar_texto(m.get('content', ''), self.max_tokens_mensaje)}
+            for m in historial[corte:]
+        ]
+        return textuales, resumen, len(plegados)
+
+    def formatear(self, historial, user_message, resumen=None):
+        """
+        Texto de la conversación para el prompt + info de tokens.
+        Devuelve (texto, resumen_actualizado, cantidad_plegada, info).
+        """
+        textuales, resumen, plegados = self.preparar(historial, resumen)
+
+        partes = []
+        texto_resumen = self.texto_resumen(resumen)
+        if texto_resumen:
+            partes.append(texto_resumen + '\n')
+        partes.append("CONVERSACIÓN:\n")
+        for msg in textuales:
+            role = "Usuario" if msg['role'] == 'user' else "BellBot"
+            partes.append(f"{role}: {msg['content']}\n")
+        partes.append(f"Usuario: {recortar_texto(user_message, self.max_tokens_mensaje)}\nBellBot:")
+        texto = ''.join(partes)
+
+        # Ahorro: tokens del historial completo (incluido lo ya plegado antes) vs. lo que se envía
+        originales = (
+            sum(estimar_tokens(m.get('content', '')) for m in historial[plegados:])
+            + (resumen or {}).get('tokens_originales', 0)
+            + estimar_tokens(user_message)
+        )
+        enviados = estimar_tokens(texto)
+        with self._lock:
+            self.solicitudes += 1
+            self.mensajes_plegados += plegados
+            self.tokens_originales += originales
+            self.tokens_enviados += enviados
+
+        info = {
+            'tokens_conversacion': enviados,
+            'tokens_ahorrados': max(originales - enviados, 0),
+            'mensajes_textuales': len(textuales),
+            'mensajes_plegados': plegados
+        }
+        return texto, resumen, plegados, info
+
+    def estadisticas(self):
+        return {
+            'solicitudes': self.solicitudes,
+            'presupuesto_tokens': self.presupuesto_tokens,
+            'mensajes_plegados': self.mensajes_plegados,
+            'tokens_originales': self.tokens_originales,
+            'tokens_enviados': self.tokens_enviados,
+            'tokens_ahorrados': max(self.tokens_originales - self.tokens_enviados, 0)
+        }
@@ -0,0 +1,198 @@
+"""
+Acceso a la base de reservas (SQLite)
+Las conexiones se reutilizan desde un pool en lugar de abrir una por pedido, la base se usa
+en modo WAL (las lecturas no esperan a las escrituras) y el esquema se actualiza con
+migraciones numeradas que se registran en PRAGMA user_version.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Ruta absoluta por defecto (backend/reservas.db), sin depender del directorio de trabajo
+RUTA_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reservas.db')
+
+
+def ruta_db():
+    """
+    Base a usar: RESERVAS_DB o, si no está, RUTA_DB. Se lee al crear cada BaseDatos (no al
+    importar el módulo), así quien cambie RESERVAS_DB antes de crearla nunca abre la base real.
+    """
+    return os.getenv('RESERVAS_DB') or RUTA_DB
+
+# Cada migración se aplica una sola vez y en orden; para cambiar el esquema se agrega una nueva al final
+MIGRACIONES = [
+    # 1: tabla original
+    '''CREATE TABLE IF NOT EXISTS reservas
+       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT,
+        email TEXT,
+        telefono TEXT,
+        tipo_habitacion TEXT,
+        fecha_checkin TEXT,
+        fecha_checkout TEXT,
+        huespedes INTEGER,
+        precio_total REAL,
+        estado TEXT,
+        fecha_reserva TEXT)''',
+    # 2: índices para el listado (ORDER BY fecha_reserva), la disponibilidad por tipo/fechas y la búsqueda por email
+    '''CREATE INDEX IF NOT EXISTS idx_reservas_fecha_reserva ON reservas (fecha_reserva);
+       CREATE INDEX IF NOT EXISTS idx_reservas_tipo_fechas ON reservas (tipo_habitacion, fecha_checkin, fecha_checkout);
+       CREATE INDEX IF NOT EXISTS idx_reservas_email ON reservas (email)''',
+    # 3: listado paginado por (fecha_reserva, id) con filtros por tipo, estado y rango de check-in
+    '''CREATE INDEX IF NOT EXISTS idx_reservas_tipo_fecha_reserva ON reservas (tipo_habitacion, fecha_reserva);
+       CREATE INDEX IF NOT EXISTS idx_reservas_estado_fecha_reserva ON reservas (estado, fecha_reserva);
+       CREATE INDEX IF NOT EXISTS idx_reservas_checkin ON reservas (fecha_checkin)''',
+    # 4: búsqueda de texto (FTS5) por nombre, email y teléfono, sincronizada con triggers.
+    #    Sin contenido propio (content=''): guarda solo el índice. El teléfono se indexa tal cual y
+    #    además solo con sus dígitos, para encontrarlo escrito con o sin espacios.
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS reservas_fts USING fts5(
+           nombre, email, telefono,
+           content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+       );
+       CREATE TRIGGER IF NOT EXISTS reservas_fts_insertar AFTER INSERT ON reservas BEGIN
+           INSERT INTO reservas_fts (rowid, nombre, email, telefono)
+           VALUES (new.id, new.nombre, new.email,
+                   new.telefono || ' ' || replace(replace(replace(new.telefono, ' ', ''), '-', ''), '+', ''));
+       END;
+       CREATE TRIGGER IF NOT EXISTS reservas_fts_borrar AFTER DELETE ON reservas BEGIN
+           INSERT INTO reservas_fts (reservas_fts, rowid, nombre, email, telefono)
+           VALUES ('delete', old.id, old.nombre, old.email,
+                   old.telefono || ' ' || replace(replace(replace(old.telefono, ' ', ''), '-', ''), '+', ''));
+       END;
+       CREATE TRIGGER IF NOT EXISTS reservas_fts_actualizar AFTER UPDATE OF nombre, email, telefono ON reservas BEGIN
+           INSERT INTO reservas_fts (reservas_fts, rowid, nombre, email, telefono)
+           VALUES ('delete', old.id, old.nombre, old.email,
+                   old.telefono || ' ' || replace(replace(replace(old.telefono, ' ', ''), '-', ''), '+', ''));
+           INSERT INTO reservas_fts (rowid, nombre, email, telefono)
+           VALUES (new.id, new.nombre, new.email,
+                   new.telefono || ' ' || replace(replace(replace(new.telefono, ' ', ''), '-', ''), '+', ''));
+       END;
+       INSERT INTO reservas_fts (rowid, nombre, email, telefono)
+       SELECT id, nombre, email,
+              telefono || ' ' || replace(replace(replace(telefono, ' ', ''), '-', ''), '+', '')
+       FROM reservas''',
+    # 5: rollups de analytics (ver rollups.py) y marca de agua de las reservas ya sumadas
+    '''CREATE TABLE IF NOT EXISTS rollup_reservas
+       (dimension TEXT NOT NULL,
+        clave TEXT NOT NULL,
+        tipo_habitacion TEXT NOT NULL,
+        reservas INTEGER NOT NULL DEFAULT 0,
+        ingresos REAL NOT NULL DEFAULT 0,
+        noches INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, clave, tipo_habitacion)) WITHOUT ROWID;
+       CREATE TABLE IF NOT EXISTS rollup_estado
+       (id INTEGER PRIMARY KEY CHECK (id = 1),
+        ultimo_id INTEGER NOT NULL);
+       INSERT OR IGNORE INTO rollup_estado (id, ultimo_id) VALUES (1, 0)''',
+    # 6: ocupación de una ventana de noches (ocupacion.py): las estadías con check-out posterior al inicio,
+    #    con todas las columnas que lee para no ir a la tabla
+    '''CREATE INDEX IF NOT EXISTS idx_reservas_checkout ON reservas
+       (fecha_checkout, fecha_checkin, tipo_habitacion, estado)''',
+    # 7: listado filtrado por estado y rango de check-in, ordenado por (fecha_checkin, id) sin ordenar el rango
+    '''CREATE INDEX IF NOT EXISTS idx_reservas_estado_checkin ON reservas (estado, fecha_checkin)''',
+]
+
+# Indexa en reservas_fts las reservas con id > ? de una sola vez (mismos valores que los triggers de
+# la migración 4); lo usa generador.py, que inserta sin los triggers y después indexa todo junto
+SQL_INDEXAR_FTS = '''INSERT INTO reservas_fts (rowid, nombre, email, telefono)
+                     SELECT id, nombre, email,
+                            telefono || ' ' || replace(replace(replace(telefono, ' ', ''), '-', ''), '+', '')
+                     FROM reservas WHERE id > ?'''
+
+
+class BaseDatos:
+    """
+    Pool de conexiones a la base de reservas.
+    sincronizacion: PRAGMA synchronous (NORMAL por defecto; FULL espera el disco en cada commit).
+
+        with db.conexion() as conn:   # commit al salir, rollback si hay una excepción
+            conn.execute(...)
+    """
+
+    def __init__(self, ruta=None, max_conexiones=8, busy_timeout_ms=5000, sincronizacion='NORMAL'):
+        self.ruta = ruta or ruta_db()
+        self.sincronizacion = sincronizacion
+        self.max_conexiones = max_conexiones
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._libres = queue.LifoQueue(maxsize=max_conexiones)
+        self._lock = threading.Lock()
+        self.abiertas = 0
+        self.reutilizadas = 0
+
+    def _abrir(self):
+        # check_same_thread=False: una conexión del pool la puede usar otro hilo (nunca dos a la vez)
+        conn = sqlite3.connect(self.ruta, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # NORMAL: en WAL no se pierde consistencia, solo los últimos commits ante un corte de luz
+        conn.execute(f'PRAGMA synchronous={self.sincronizacion}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-8000')  # ~8 MB por conexión
+        with self._lock:
+            self.abiertas += 1
+        return conn
+
+    def _tomar(self):
+        try:
+            conn = self._libres.get_nowait()
+        except queue.Empty:
+            return self._abrir()
+        with self._lock:
+            self.reutilizadas += 1
+        return conn
+
+    def _devolver(self, conn):
+        try:
+            self._libres.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+            with self._lock:
+                self.abiertas -= 1
+
+    @contextmanager
+    def conexion(self):
+        """Conexión del pool dentro de una transacción"""
+        conn = self._tomar()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._devolver(conn)
+
+    def version(self):
+        with self.conexion() as conn:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def migrar(self):
+        """Aplica las migraciones pendientes. Devuelve la versión final del esquema."""
+        with self.conexion() as conn:
+            actual = conn.execute('PRAGMA user_version').fetchone()[0]
+            for numero, sql in enumerate(MIGRACIONES[actual:], start=actual + 1):
+                # executescript hace COMMIT antes de empezar; la migración y su número van en el mismo script
+                conn.executescript(f'BEGIN;\n{sql};\nPRAGMA user_version = {numero};\nCOMMIT;')
+            return max(actual, len(MIGRACIONES))
+
+    def cerrar(self):
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self.abiertas -= 1
+
+    def estadisticas(self):
+        return {
+            'ruta': self.ruta,
+            'conexiones_abiertas': self.abiertas,
+            'conexiones_libres': self._libres.qsize(),
+            'max_conexiones': self.max_conexiones,
+            'reutilizadas': self.reutilizadas
+        }
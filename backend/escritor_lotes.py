@@ -0,0 +1,125 @@
+"""
+Escritura de reservas por lotes (group commit)
+Con una reserva por transacción, cada commit espera su propia escritura a disco y eso limita
+las reservas por segundo en un pico de demanda. Acá los pedidos encolan su fila y un único hilo
+escritor las inserta juntas: toma las que se acumularon mientras hacía el commit anterior (hasta
+max_lote, esperando como mucho espera_maxima_ms por más), hace un solo commit y recién entonces
+le devuelve a cada pedido su id.
+
+    escritor = EscritorLotes(db, 'INSERT INTO reservas (...) VALUES (?, ...)')
+    reserva_id = escritor.insertar(fila)   # bloquea hasta que el lote quedó guardado
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class EscritorCerrado(Exception):
+    """El escritor se detuvo: no acepta más filas"""
+
+
+class EscritorLotes:
+    """
+    db: BaseDatos; sql: INSERT con parámetros.
+    espera_maxima_ms: ventana extra para juntar filas; con 0 el lote es lo que llegó durante el
+    commit anterior, que ya agrupa bien bajo carga sin sumar demora cuando hay pocos pedidos.
+    Si el lote falla (ej. una fila inválida) se deshace y las filas se reintentan de a una,
+    así el error le llega solo al pedido culpable.
+    """
+
+    def __init__(self, db, sql, max_lote=64, espera_maxima_ms=0.0, max_pendientes=10000):
+        self.db = db
+        self.sql = sql
+        self.max_lote = max_lote
+        self.espera_maxima = espera_maxima_ms / 1000
+        self._pendientes = queue.Queue(maxsize=max_pendientes)
+        self._lock = threading.Lock()
+        self._cerrado = False
+        self.lotes = 0
+        self.filas = 0
+        self.fallidas = 0
+        self.lote_maximo = 0
+        self._hilo = threading.Thread(target=self._escribir, name='escritor-reservas', daemon=True)
+        self._hilo.start()
+
+    def enviar(self, fila):
+        """Encola la fila; devuelve un Future con el id insertado (lastrowid)"""
+        if self._cerrado:
+            raise EscritorCerrado('El escritor de reservas está detenido')
+        futuro = Future()
+        self._pendientes.put((fila, futuro))
+        return futuro
+
+    def insertar(self, fila, timeout=None):
+        """Id de la fila una vez que su lote se confirmó en la base"""
+        return self.enviar(fila).result(timeout)
+
+    def _juntar(self):
+        """Bloquea hasta la primera fila y junta las que lleguen dentro de la ventana"""
+        primera = self._pendientes.get()
+        if primera is None:
+            return None
+        lote = [primera]
+        limite = time.monotonic() + self.espera_maxima
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                item = self._pendientes.get(timeout=restante) if restante > 0 else self._pendientes.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._pendientes.put(None)  # se procesa este lote y después se termina
+                break
+            lote.append(item)
+        return lote
+
+    def _guardar(self, lote):
+        with self.db.conexion() as conn:
+            return [conn.execute(self.sql, fila).lastrowid for fila, _ in lote]
+
+    def _escribir(self):
+        while True:
+            lote = self._juntar()
+            if lote is None:
+                return
+            try:
+                ids = self._guardar(lote)
+            except Exception:
+                ids = None
+
+            if ids is not None:
+                for (_, futuro), reserva_id in zip(lote, ids):
+                    futuro.set_result(reserva_id)
+            else:
+                for item in lote:  # de a una: solo fallan las filas con error
+                    try:
+                        item[1].set_result(self._guardar([item])[0])
+                    except Exception as e:
+                        with self._lock:
+                            self.fallidas += 1
+                        item[1].set_exception(e)
+
+            with self._lock:
+                self.lotes += 1
+                self.filas += len(lote)
+                self.lote_maximo = max(self.lote_maximo, len(lote))
+
+    def cerrar(self, timeout=10):
+        """Escribe lo pendiente y detiene el hilo"""
+        self._cerrado = True
+        self._pendientes.put(None)
+        self._hilo.join(timeout)
+
+    def estadisticas(self):
+        return {
+            'max_lote': self.max_lote,
+            'espera_maxima_ms': self.espera_maxima * 1000,
+            'pendientes': self._pendientes.qsize(),
+            'lotes': self.lotes,
+            'filas': self.filas,
+            'fallidas': self.fallidas,
+            'filas_por_lote': round(self.filas / self.lotes, 2) if self.lotes else 0,
+            'lote_maximo': self.lote_maximo
+        }
@@ -0,0 +1,63 @@
+"""
+Exportación de reservas en streaming (NDJSON o CSV, opcionalmente gzip)
+Recorre la consulta con fetchmany y va generando el archivo por bloques: la memoria depende
+del tamaño del bloque y no de la cantidad de reservas, y el primer byte sale enseguida.
+Acepta los mismos filtros y campos que el listado (ver consultas.py). No hay ORDER BY: sin
+filtros las filas salen por id y con filtros en el orden del índice que use SQLite; ordenar
+obligaría a juntar todo el resultado antes de enviar la primera fila.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from consultas import COLUMNAS, condiciones
+
+TIPOS_CONTENIDO = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv; charset=utf-8'}
+
+
+def filas_reservas(conn, filtros=None, campos=COLUMNAS, tamano_bloque=1000):
+    """Genera listas de hasta tamano_bloque tuplas (en el orden de `campos`)"""
+    where, parametros = condiciones(filtros or {})
+    sql = f"SELECT {', '.join(campos)} FROM reservas" + (f" WHERE {' AND '.join(where)}" if where else '')
+    consulta = conn.execute(sql, parametros)
+    while True:
+        bloque = consulta.fetchmany(tamano_bloque)
+        if not bloque:
+            return
+        yield bloque
+
+
+def _bloques_texto(bloques, campos, formato):
+    if formato == 'csv':
+        salida = io.StringIO()
+        escritor = csv.writer(salida, lineterminator='\n')
+        escritor.writerow(campos)
+        for bloque in bloques:
+            escritor.writerows(bloque)
+            yield salida.getvalue()
+            salida.seek(0)
+            salida.truncate()
+        if salida.tell():
+            yield salida.getvalue()
+    else:
+        for bloque in bloques:
+            yield ''.join(json.dumps(dict(zip(campos, fila)), ensure_ascii=False) + '\n' for fila in bloque)
+
+
+def exportar_reservas(db, filtros=None, campos=COLUMNAS, formato='ndjson', comprimir=False, tamano_bloque=1000):
+    """
+    Generador de bytes para una respuesta en streaming.
+    La conexión del pool se usa mientras dura la descarga y se devuelve al terminar (o si el cliente corta).
+    """
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None  # wbits=31: formato gzip
+    with db.conexion() as conn:
+        for texto in _bloques_texto(filas_reservas(conn, filtros, campos, tamano_bloque), campos, formato):
+            datos = texto.encode('utf-8')
+            if compresor:
+                # SYNC_FLUSH: cada bloque sale comprimido sin esperar a que se llene el buffer de zlib
+                datos = compresor.compress(datos) + compresor.flush(zlib.Z_SYNC_FLUSH)
+            yield datos
+    if compresor:
+        yield compresor.flush()
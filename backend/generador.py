@@ -0,0 +1,276 @@
+"""
+Generador de reservas sintéticas para pruebas y benchmarks
+Genera con NumPy reservas verosímiles y reproducibles (la misma semilla da siempre las mismas
+filas): check-in según una curva de demanda por mes, día de la semana y temporada alta
+(precios.CalendarioTemporadas), estadías de 1 a 14 noches (más largas en temporada alta),
+tipos de habitación en proporción a las habitaciones de hotel_info.json, huéspedes hasta la
+capacidad de cada tipo y precio_total calculado con MotorPrecios, igual que al reservar.
+
+Las reservas confirmadas no superan las habitaciones de cada tipo ninguna noche (contando las
+que ya hay en la base): se lleva la ocupación por noche y la estadía que no entra se vuelve a
+sortear. El hotel tiene 29 habitaciones, así que en 4 años entran unas 10.000 reservas; con
+sobreventa=2 entra el doble y con sobreventa=None (--sin-limite) no hay límite, para los
+benchmarks que necesitan millones de filas y no usan la disponibilidad.
+
+Se inserta con executemany de a BLOQUE filas por transacción. Si se cargan más reservas de
+las que ya hay, los índices y los triggers de búsqueda se sacan durante la carga y se vuelven
+a crear al final (reservas_fts se indexa de una sola vez): mucho más rápido que mantenerlos
+fila por fila. Usar con el servidor detenido (el inventario se carga al iniciarlo).
+
+Uso (desde backend/):
+    python generador.py --reservas 5000 --db /tmp/reservas.db
+    python generador.py --reservas 50000 --db /tmp/reservas.db --sobreventa 5
+    python generador.py --reservas 1000000 --db /tmp/reservas.db --sin-limite --semilla 7
+    python generador.py --reservas 2000 --desde 2024-01-01 --hasta 2025-12-31
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+from importador import SQL_INSERTAR
+
+BLOQUE = 100000
+DESDE = date(2022, 1, 1)
+HASTA = date(2025, 12, 31)
+
+NOMBRES = ['Jose', 'Maria', 'Juan', 'Ana', 'Lucia', 'Martin', 'Sofia', 'Diego', 'Valentina', 'Carlos', 'Camila',
+           'Federico', 'Julieta', 'Nicolas', 'Agustina', 'Mateo', 'Emilia', 'Tomas', 'Paula', 'Santiago']
+APELLIDOS = ['Perez', 'Gomez', 'Rodriguez', 'Fernandez', 'Lopez', 'Martinez', 'Gonzalez', 'Sanchez', 'Romero',
+             'Diaz', 'Alvarez', 'Torres', 'Ruiz', 'Ramirez', 'Flores', 'Benitez', 'Acosta', 'Medina', 'Herrera',
+             'Luduena', 'Aguirre', 'Pereyra', 'Gutierrez', 'Molina', 'Silva', 'Castro', 'Rojas', 'Ortiz']
+DOMINIOS = ['gmail.com', 'hotmail.com', 'yahoo.com.ar', 'outlook.com']
+# Características telefónicas: Bell Ville, Villa María, Córdoba, Rosario, Río Cuarto, Marcos Juárez, Buenos Aires
+CARACTERISTICAS = ['3537', '353', '351', '341', '358', '3472', '11']
+
+# Demanda relativa de check-in por mes (enero y febrero: vacaciones de verano; julio: receso invernal)
+DEMANDA_MENSUAL = np.array([1.6, 1.5, 0.9, 0.8, 0.8, 0.7, 1.3, 0.9, 0.8, 1.0, 0.9, 1.2])
+# Por día de la semana del check-in, de lunes a domingo
+DEMANDA_DIA_SEMANA = np.array([0.8, 0.8, 0.9, 1.0, 1.4, 1.3, 0.8])
+# Días marcados como temporada alta (Semana Santa, fines de semana largos, además del verano)
+DEMANDA_TEMPORADA_ALTA = 1.5
+# Probabilidad de 1, 2, ..., 14 noches; en temporada alta se suman hasta 2 noches más
+PROBABILIDAD_NOCHES = np.array([0.30, 0.25, 0.15, 0.09, 0.06, 0.04, 0.05,
+                                0.015, 0.01, 0.01, 0.008, 0.006, 0.006, 0.005])
+ANTICIPACION_MEDIA_DIAS = 21
+PROPORCION_CANCELADAS = 0.08
+# Veces que se vuelve a sortear una estadía que no entra antes de dar el hotel por lleno
+MAX_INTENTOS = 50
+
+
+class GeneradorReservas:
+    """
+    bloque(numero, cantidad) → filas para importador.SQL_INSERTAR. Cada bloque usa su propio
+    generador aleatorio (semilla, numero); con límite de capacidad las estadías que entran
+    dependen de las de los bloques anteriores, así que se generan en orden (0, 1, 2...).
+    capacidades: habitaciones por tipo; personas: huéspedes máximos por tipo.
+    sobreventa: reservas confirmadas por habitación y noche que se aceptan (1 = nunca más que
+    las habitaciones; None = sin límite). Si el hotel se llena, bloque() da ValueError.
+    """
+
+    def __init__(self, motor_precios, capacidades, personas, desde=DESDE, hasta=HASTA, semilla=42, sobreventa=1.0):
+        calendario = motor_precios.calendario
+        self.motor = motor_precios
+        self.semilla = semilla
+        self.tipos = np.array([t for t in capacidades if capacidades[t] > 0 and t in motor_precios.acumulados],
+                              dtype=object)
+        if not len(self.tipos):
+            raise ValueError('No hay tipos de habitación con capacidad y tarifa')
+        pesos = np.array([capacidades[t] for t in self.tipos], dtype=np.float64)
+        self.probabilidad_tipo = pesos / pesos.sum()
+        self.personas = np.array([max(int(personas.get(t, 2)), 1) for t in self.tipos])
+
+        # el check-out más lejano (14 + 2 noches después de hasta) tiene que estar en el calendario de precios
+        self.primer_indice = (desde - calendario.desde).days
+        dias = (hasta - desde).days + 1
+        if dias <= 0 or self.primer_indice < 0 or self.primer_indice + dias + 16 >= len(calendario.alta):
+            raise ValueError(f'Fechas fuera del calendario de precios ({calendario.desde} a {calendario.hasta})')
+        self.desde = np.datetime64(desde, 'D')
+        fechas = np.arange(self.desde, self.desde + dias)
+        meses = fechas.astype('datetime64[M]').astype(np.int64) % 12
+        dia_semana = (fechas.astype(np.int64) + 3) % 7  # el 1970-01-01 fue jueves
+        self.alta = calendario.alta[self.primer_indice:self.primer_indice + dias]
+        demanda = (DEMANDA_MENSUAL[meses] * DEMANDA_DIA_SEMANA[dia_semana]
+                   * np.where(self.alta, DEMANDA_TEMPORADA_ALTA, 1.0))
+        self.probabilidad_dia = demanda / demanda.sum()
+
+        # habitaciones ocupadas por tipo y noche (hasta el check-out más lejano) y máximo aceptado
+        self.capacidades = {t: int(capacidades[t]) for t in self.tipos}
+        self.limites = None
+        if sobreventa is not None:
+            self.limites = np.maximum(np.floor(np.array(list(self.capacidades.values())) * sobreventa), 1)
+            self.ocupadas = np.zeros((len(self.tipos), dias + 16), dtype=np.int32)
+
+    def ocupar_existentes(self, conn):
+        """Suma a la ocupación las reservas que ya están en la base (solo con límite de capacidad)"""
+        if self.limites is None:
+            return
+        from ocupacion import CalendarioOcupacion
+
+        desde, hasta = self.desde, self.desde + self.ocupadas.shape[1] - 1
+        calendario = CalendarioOcupacion.desde_base(conn, self.capacidades, desde, hasta)
+        self.ocupadas += calendario.matriz(desde, hasta)
+
+    def _estadias(self, rnd, cantidad):
+        """(día de check-in desde self.desde, noches, código de tipo) sorteados según la demanda"""
+        dia = rnd.choice(len(self.probabilidad_dia), cantidad, p=self.probabilidad_dia)
+        noches = rnd.choice(np.arange(1, len(PROBABILIDAD_NOCHES) + 1), cantidad, p=PROBABILIDAD_NOCHES)
+        noches += np.where(self.alta[dia], rnd.binomial(2, 0.35, cantidad), 0)
+        return dia, noches, rnd.choice(len(self.tipos), cantidad, p=self.probabilidad_tipo)
+
+    def _ubicar(self, indices, dia, noches, codigo):
+        """Ocupa las estadías `indices` que entran, en orden; devuelve las que no entraron"""
+        rechazadas = []
+        for k, c, i, n in zip(indices.tolist(), codigo[indices].tolist(), dia[indices].tolist(),
+                              noches[indices].tolist()):
+            tramo = self.ocupadas[c, i:i + n]
+            if tramo.max() < self.limites[c]:
+                tramo += 1
+            else:
+                rechazadas.append(k)
+        return np.array(rechazadas, dtype=np.int64)
+
+    def bloque(self, numero, cantidad):
+        rnd = np.random.default_rng([self.semilla, numero])
+        dia, noches, codigo = self._estadias(rnd, cantidad)
+        cancelada = rnd.random(cantidad) < PROPORCION_CANCELADAS
+
+        # las canceladas no ocupan; las demás que no entran se sortean de nuevo
+        if self.limites is not None:
+            pendientes = np.flatnonzero(~cancelada)
+            for _ in range(MAX_INTENTOS):
+                pendientes = self._ubicar(pendientes, dia, noches, codigo)
+                if not len(pendientes):
+                    break
+                dia[pendientes], noches[pendientes], codigo[pendientes] = self._estadias(rnd, len(pendientes))
+            if len(pendientes):
+                raise ValueError(f'El hotel está lleno: no entran {len(pendientes):,} reservas más sin superar la '
+                                 'capacidad (ampliar las fechas, generar menos o aumentar la sobreventa)')
+
+        i = self.primer_indice + dia
+        precios, _ = self.motor.totales(self.tipos[codigo], i, i + noches)
+        # la mayoría de las reservas ocupan la habitación completa
+        capacidad = self.personas[codigo]
+        huespedes = np.minimum(np.floor(np.sqrt(rnd.random(cantidad)) * capacidad).astype(np.int64) + 1, capacidad)
+
+        checkin = self.desde + dia
+        anticipacion = np.minimum(rnd.exponential(ANTICIPACION_MEDIA_DIAS * 86400, cantidad), 365 * 86400)
+        fecha_reserva = checkin.astype('datetime64[s]') - anticipacion.astype('timedelta64[s]')
+
+        nombre = rnd.integers(0, len(NOMBRES), cantidad).tolist()
+        apellido = rnd.integers(0, len(APELLIDOS), cantidad).tolist()
+        dominio = rnd.integers(0, len(DOMINIOS), cantidad).tolist()
+        caracteristica = rnd.integers(0, len(CARACTERISTICAS), cantidad).tolist()
+        telefono = rnd.integers(10 ** 7, 10 ** 8, cantidad).tolist()
+        serie = numero * BLOQUE
+
+        return [
+            (f'{NOMBRES[n]} {APELLIDOS[a]}',
+             f'{NOMBRES[n]}.{APELLIDOS[a]}{serie + k}@{DOMINIOS[d]}'.lower(),
+             f'+54 9 {CARACTERISTICAS[c]} {str(t)[:10 - len(CARACTERISTICAS[c])]}',
+             tipo, entrada, salida, h, precio, 'cancelada' if x else 'confirmada', reservada)
+            for k, (n, a, d, c, t, tipo, entrada, salida, h, precio, x, reservada) in enumerate(zip(
+                nombre, apellido, dominio, caracteristica, telefono, self.tipos[codigo].tolist(),
+                np.datetime_as_string(checkin).tolist(), np.datetime_as_string(checkin + noches).tolist(),
+                huespedes.tolist(), precios.tolist(), cancelada.tolist(),
+                np.datetime_as_string(fecha_reserva).tolist()))
+        ]
+
+
+def generador_desde_hotel(hotel, desde=DESDE, hasta=HASTA, semilla=42, sobreventa=1.0):
+    """GeneradorReservas con las tarifas, feriados y habitaciones de hotel_info.json"""
+    from inventario import capacidades_desde_hotel
+    from precios import CalendarioTemporadas, MotorPrecios, feriados_desde_hotel, precios_desde_hotel
+
+    motor = MotorPrecios(precios_desde_hotel(hotel), CalendarioTemporadas(feriados_largos=feriados_desde_hotel(hotel)))
+    personas = {tipo: h.get('capacidad_personas', 2) for tipo, h in hotel.get('habitaciones', {}).items()}
+    return GeneradorReservas(motor, capacidades_desde_hotel(hotel), personas, desde, hasta, semilla, sobreventa)
+
+
+def cargar(db, generador, cantidad):
+    """Inserta `cantidad` reservas en una base ya migrada. Devuelve el id de la primera y de la última."""
+    from db import SQL_INDEXAR_FTS
+
+    with db.conexion() as conn:
+        generador.ocupar_existentes(conn)
+        ultimo_id, existentes = conn.execute('SELECT COALESCE(MAX(id), 0), COUNT(*) FROM reservas').fetchone()
+        # con más filas nuevas que existentes conviene reconstruir índices y búsqueda al final
+        objetos = []
+        if cantidad >= existentes:
+            objetos = conn.execute("""SELECT type, name, sql FROM sqlite_master
+                                      WHERE tbl_name = 'reservas' AND type IN ('index', 'trigger')
+                                        AND sql IS NOT NULL""").fetchall()
+            for tipo, nombre, _ in objetos:
+                conn.execute(f'DROP {tipo.upper()} {nombre}')
+
+    try:
+        for numero in range((cantidad + BLOQUE - 1) // BLOQUE):
+            filas = generador.bloque(numero, min(BLOQUE, cantidad - numero * BLOQUE))
+            with db.conexion() as conn:
+                conn.executemany(SQL_INSERTAR, filas)
+    finally:
+        if objetos:
+            with db.conexion() as conn:
+                for _, _, sql in objetos:
+                    conn.execute(sql)
+                if any(tipo == 'trigger' and nombre.startswith('reservas_fts') for tipo, nombre, _ in objetos):
+                    # sin fusiones automáticas mientras se indexa todo junto; después, el valor por defecto
+                    conn.execute("INSERT INTO reservas_fts (reservas_fts, rank) VALUES ('automerge', 0)")
+                    conn.execute(SQL_INDEXAR_FTS, (ultimo_id,))
+                    conn.execute("INSERT INTO reservas_fts (reservas_fts, rank) VALUES ('automerge', 4)")
+    return ultimo_id + 1, ultimo_id + cantidad
+
+
+def main():
+    from db import BaseDatos, ruta_db
+    from precios import parsear_fecha
+    from router_faq import cargar_hotel_info
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reservas', type=int, default=5000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--desde', default=DESDE.isoformat(), help='primer check-in posible (YYYY-MM-DD)')
+    parser.add_argument('--hasta', default=HASTA.isoformat(), help='último check-in posible (YYYY-MM-DD)')
+    parser.add_argument('--db', default=ruta_db(), help='base de reservas (se crea si no existe)')
+    parser.add_argument('--sobreventa', type=float, default=1.0,
+                        help='reservas confirmadas aceptadas por habitación y noche (1 = sin sobreventa)')
+    parser.add_argument('--sin-limite', action='store_true',
+                        help='no limitar por capacidad (benchmarks con millones de reservas)')
+    args = parser.parse_args()
+
+    desde, hasta = parsear_fecha(args.desde), parsear_fecha(args.hasta)
+    if desde is None or hasta is None:
+        parser.error('Fechas inválidas: usar YYYY-MM-DD')
+    try:
+        generador = generador_desde_hotel(cargar_hotel_info(), desde, hasta, args.semilla,
+                                          None if args.sin_limite else args.sobreventa)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # synchronous=OFF: es una base de prueba, no importa perderla si se corta la luz a mitad de la carga
+    db = BaseDatos(args.db, sincronizacion='OFF')
+    db.migrar()
+    with db.conexion() as conn:
+        anterior = conn.execute('SELECT COALESCE(MAX(id), 0) FROM reservas').fetchone()[0]
+    inicio = time.perf_counter()
+    try:
+        primero, ultimo = cargar(db, generador, args.reservas)
+    except ValueError as e:
+        # cada bloque es su propia transacción: informar cuántas reservas llegaron a guardarse
+        with db.conexion() as conn:
+            guardadas = conn.execute('SELECT COUNT(*) FROM reservas WHERE id > ?', (anterior,)).fetchone()[0]
+        sys.exit(f'{e}. Se guardaron {guardadas:,} reservas de los bloques anteriores.' if guardadas
+                 else f'{e}. No se guardó ninguna reserva.')
+    finally:
+        db.cerrar()
+    segundos = time.perf_counter() - inicio
+
+    print(f"{args.reservas:,} reservas generadas (ids {primero:,} a {ultimo:,}) en {segundos:.1f} s "
+          f"({args.reservas / segundos:,.0f} por segundo) en {args.db}")
+
+
+if __name__ == '__main__':
+    main()
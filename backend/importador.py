@@ -0,0 +1,203 @@
+"""
+Importación masiva de reservas (sincronización con channel managers / OTAs)
+Lee reservas en NDJSON (un objeto JSON por línea) o CSV con encabezado, de a una línea,
+y las procesa por lotes: normaliza nombre/email/teléfono como /api/reservar, cotiza el lote
+entero con MotorPrecios.cotizar_lote, verifica disponibilidad en el inventario e inserta con
+executemany en una transacción por lote. Una fila con error no frena el resto: se informa
+con su número de línea. La memoria usada depende del tamaño del lote, no del archivo.
+
+Campos: nombre, email, telefono, tipo_habitacion, fecha_checkin, fecha_checkout, huespedes
+y opcionalmente estado (confirmada por defecto) y fecha_reserva (ahora por defecto).
+
+Uso (desde backend/):
+    python importador.py reservas.ndjson
+    python importador.py reservas.csv --lote 1000
+    cat reservas.ndjson | python importador.py - --formato ndjson
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+from unidecode import unidecode
+
+CAMPOS_REQUERIDOS = ('nombre', 'email', 'telefono', 'tipo_habitacion', 'fecha_checkin', 'fecha_checkout', 'huespedes')
+SQL_INSERTAR = '''INSERT INTO reservas (nombre, email, telefono, tipo_habitacion, fecha_checkin, fecha_checkout,
+                  huespedes, precio_total, estado, fecha_reserva) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+
+def leer_ndjson(lineas):
+    """(número de línea, dict) por cada línea no vacía; si la línea no es un objeto JSON, (número, mensaje de error)"""
+    for numero, linea in enumerate(lineas, start=1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError as e:
+            yield numero, f'JSON inválido: {e}'
+            continue
+        yield numero, registro if isinstance(registro, dict) else 'Se esperaba un objeto JSON'
+
+
+def leer_csv(lineas):
+    """(número de línea, dict) por cada fila; la primera línea es el encabezado"""
+    lector = csv.DictReader(lineas)
+    for registro in lector:
+        yield lector.line_num, {k.strip(): v for k, v in registro.items() if k}
+
+
+def detectar_formato(nombre_o_tipo):
+    """'csv' o 'ndjson' según la extensión del archivo o el Content-Type"""
+    return 'csv' if 'csv' in (nombre_o_tipo or '').lower() else 'ndjson'
+
+
+class ImportadorReservas:
+    """
+    importar(registros) → resumen con importadas, errores (hasta max_errores con su línea) y lotes.
+    registros: iterable de (número de línea, dict o mensaje de error), como devuelven leer_ndjson y leer_csv.
+    inventario: si se pasa, las reservas sin lugar se rechazan y las importadas ocupan sus noches.
+    """
+
+    def __init__(self, db, motor_precios, inventario=None, tamano_lote=500, max_errores=1000):
+        self.db = db
+        self.motor_precios = motor_precios
+        self.inventario = inventario
+        self.tamano_lote = tamano_lote
+        self.max_errores = max_errores
+
+    @staticmethod
+    def _validar(registro):
+        """Fila normalizada para el INSERT (sin precio) o mensaje de error"""
+        faltantes = [c for c in CAMPOS_REQUERIDOS if registro.get(c) in (None, '')]
+        if faltantes:
+            return f"Campos requeridos: {', '.join(faltantes)}"
+        try:
+            huespedes = int(registro['huespedes'])
+        except (TypeError, ValueError):
+            return 'huespedes debe ser un número'
+        return [
+            unidecode(str(registro['nombre'])),
+            unidecode(str(registro['email'])).lower(),
+            str(registro['telefono']).strip(),
+            registro['tipo_habitacion'],
+            registro['fecha_checkin'],
+            registro['fecha_checkout'],
+            huespedes,
+            None,
+            registro.get('estado') or 'confirmada',
+            registro.get('fecha_reserva') or datetime.now().isoformat()
+        ]
+
+    def _procesar_lote(self, lote, resumen):
+        """lote: [(línea, fila)] ya validadas. Cotiza, aparta en el inventario e inserta."""
+        cotizaciones = self.motor_precios.cotizar_lote((f[3], f[4], f[5]) for _, f in lote)
+        aceptadas = []
+        for (numero, fila), cotizacion in zip(lote, cotizaciones):
+            if cotizacion is None:
+                self._error(resumen, numero, 'Tipo de habitación o fechas inválidas')
+                continue
+            fila[7] = cotizacion['precio_total']
+            if self.inventario and fila[8] != 'cancelada':
+                try:
+                    self.inventario.reservar(fila[3], fila[4], fila[5])
+                except Exception as e:
+                    self._error(resumen, numero, str(e))
+                    continue
+            aceptadas.append((numero, fila))
+        if not aceptadas:
+            return
+
+        try:
+            with self.db.conexion() as conn:
+                conn.executemany(SQL_INSERTAR, [fila for _, fila in aceptadas])
+            resumen['importadas'] += len(aceptadas)
+        except Exception:
+            # El lote se deshizo entero: de a una, para informar solo las filas con error
+            for numero, fila in aceptadas:
+                try:
+                    with self.db.conexion() as conn:
+                        conn.execute(SQL_INSERTAR, fila)
+                    resumen['importadas'] += 1
+                except Exception as e:
+                    self._liberar(fila)
+                    self._error(resumen, numero, str(e))
+        resumen['lotes'] += 1
+
+    def _liberar(self, fila):
+        if self.inventario and fila[8] != 'cancelada':
+            self.inventario.liberar(fila[3], fila[4], fila[5])
+
+    def _error(self, resumen, numero, mensaje):
+        resumen['con_error'] += 1
+        if len(resumen['errores']) < self.max_errores:
+            resumen['errores'].append({'linea': numero, 'error': mensaje})
+
+    def importar(self, registros):
+        resumen = {'procesadas': 0, 'importadas': 0, 'con_error': 0, 'lotes': 0, 'errores': []}
+        inicio = datetime.now()
+        lote = []
+        for numero, registro in registros:
+            resumen['procesadas'] += 1
+            fila = registro if isinstance(registro, str) else self._validar(registro)
+            if isinstance(fila, str):
+                self._error(resumen, numero, fila)
+                continue
+            lote.append((numero, fila))
+            if len(lote) >= self.tamano_lote:
+                self._procesar_lote(lote, resumen)
+                lote = []
+        if lote:
+            self._procesar_lote(lote, resumen)
+        resumen['segundos'] = round((datetime.now() - inicio).total_seconds(), 3)
+        return resumen
+
+
+def main():
+    from db import BaseDatos, ruta_db
+    from inventario import InventarioHabitaciones, capacidades_desde_hotel
+    from precios import CalendarioTemporadas, MotorPrecios, feriados_desde_hotel, precios_desde_hotel
+    from router_faq import cargar_hotel_info
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('archivo', help="archivo NDJSON o CSV ('-' para leer de la entrada estándar)")
+    parser.add_argument('--formato', choices=['ndjson', 'csv'], help='por defecto, según la extensión')
+    parser.add_argument('--lote', type=int, default=500, help='filas por transacción')
+    parser.add_argument('--db', default=ruta_db(), help='base de reservas')
+    parser.add_argument('--sin-disponibilidad', action='store_true',
+                        help='importar aunque no haya lugar (no verifica el inventario)')
+    args = parser.parse_args()
+
+    hotel = cargar_hotel_info()
+    db = BaseDatos(args.db)
+    db.migrar()
+    motor = MotorPrecios(precios_desde_hotel(hotel), CalendarioTemporadas(feriados_largos=feriados_desde_hotel(hotel)))
+    inventario = None
+    if not args.sin_disponibilidad:
+        inventario = InventarioHabitaciones(capacidades_desde_hotel(hotel))
+        with db.conexion() as conn:
+            inventario.cargar(conn.execute('SELECT tipo_habitacion, fecha_checkin, fecha_checkout, estado FROM reservas'))
+
+    formato = args.formato or detectar_formato(args.archivo)
+    entrada = (io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='') if args.archivo == '-'
+               else open(args.archivo, encoding='utf-8', newline=''))
+    with entrada:
+        registros = leer_csv(entrada) if formato == 'csv' else leer_ndjson(entrada)
+        resumen = ImportadorReservas(db, motor, inventario, tamano_lote=args.lote).importar(registros)
+
+    print(f"{resumen['importadas']:,} de {resumen['procesadas']:,} reservas importadas en {resumen['segundos']} s "
+          f"({resumen['lotes']} lotes), {resumen['con_error']:,} con error")
+    for error in resumen['errores'][:20]:
+        print(f"  línea {error['linea']}: {error['error']}")
+    if resumen['con_error'] > 20:
+        print(f"  ... y {resumen['con_error'] - 20:,} más")
+    if os.path.abspath(args.db) == os.path.abspath(ruta_db()):
+        print('Si el servidor está corriendo, reiniciarlo para que el inventario incluya las reservas importadas.')
+    sys.exit(1 if resumen['con_error'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Inventario de habitaciones y disponibilidad por noche
+Por cada tipo de habitación se guarda un arreglo con la cantidad de habitaciones ocupadas
+en cada noche del calendario. Consultar cuántas quedan libres entre dos fechas es el máximo
+de un tramo del arreglo, sin recorrer las reservas; al iniciar se carga todo de una vez
+desde la base con un arreglo de diferencias (+1 en el check-in, -1 en el check-out).
+"""
+
+import threading
+
+import numpy as np
+
+from precios import FECHA_DESDE, FECHA_HASTA, parsear_fecha
+
+# Estados de reserva que no ocupan habitación
+ESTADOS_LIBRES = ('cancelada',)
+
+
+class SinDisponibilidad(Exception):
+    """No quedan habitaciones libres del tipo pedido en alguna noche de la estadía"""
+
+    def __init__(self, tipo_habitacion, disponibles):
+        super().__init__(f'No hay habitaciones {tipo_habitacion} disponibles para esas fechas')
+        self.tipo_habitacion = tipo_habitacion
+        self.disponibles = disponibles
+
+
+def capacidades_desde_hotel(hotel):
+    """Cantidad de habitaciones por tipo (habitaciones.<tipo>.disponibilidad de hotel_info.json)"""
+    return {tipo: int(h.get('disponibilidad', 0)) for tipo, h in hotel.get('habitaciones', {}).items()}
+
+
+class InventarioHabitaciones:
+    """
+    ocupadas[tipo][i] = habitaciones de ese tipo ocupadas la noche del día desde + i.
+    Las consultas y las reservas se hacen con un lock: verificar y registrar es atómico.
+    """
+
+    def __init__(self, capacidades, desde=FECHA_DESDE, hasta=FECHA_HASTA):
+        self.capacidades = dict(capacidades)
+        self.desde = desde
+        self.hasta = hasta
+        self.dias = (hasta - desde).days + 1
+        self.ocupadas = {tipo: np.zeros(self.dias, dtype=np.int32) for tipo in self.capacidades}
+        self._lock = threading.Lock()
+
+        self.reservas_cargadas = 0
+        self.rechazadas = 0
+
+    def _tramo(self, fecha_checkin, fecha_checkout):
+        """Fechas → (i, j) noches [i, j) del calendario, o None si son inválidas"""
+        checkin = parsear_fecha(fecha_checkin)
+        checkout = parsear_fecha(fecha_checkout)
+        if checkin is None or checkout is None:
+            return None
+        i = (checkin - self.desde).days
+        j = (checkout - self.desde).days
+        if i < 0 or j > self.dias or j <= i:
+            return None
+        return i, j
+
+    def cargar(self, reservas):
+        """
+        Reconstruye la ocupación desde cero.
+        reservas: iterable de (tipo_habitacion, fecha_checkin, fecha_checkout, estado).
+        """
+        filas = {tipo: ([], []) for tipo in self.capacidades}
+        total = 0
+        for tipo, checkin, checkout, estado in reservas:
+            if tipo not in filas or estado in ESTADOS_LIBRES:
+                continue
+            tramo = self._tramo(checkin, checkout)
+            if tramo is None:
+                continue
+            filas[tipo][0].append(tramo[0])
+            filas[tipo][1].append(tramo[1])
+            total += 1
+
+        ocupadas = {}
+        for tipo, (inicios, fines) in filas.items():
+            diferencias = np.zeros(self.dias + 1, dtype=np.int32)
+            np.add.at(diferencias, np.asarray(inicios, dtype=np.int64), 1)
+            np.add.at(diferencias, np.asarray(fines, dtype=np.int64), -1)
+            ocupadas[tipo] = np.cumsum(diferencias[:-1], dtype=np.int32)
+
+        with self._lock:
+            self.ocupadas = ocupadas
+            self.reservas_cargadas = total
+
+    def _libres(self, tipo, i, j):
+        # con reservas de más (importadas o cargadas sin verificar) no quedan libres, no menos de cero
+        return max(0, int(self.capacidades[tipo] - self.ocupadas[tipo][i:j].max()))
+
+    def disponibles(self, tipo_habitacion, fecha_checkin, fecha_checkout):
+        """Habitaciones libres durante toda la estadía (None si el tipo o las fechas no son válidos)"""
+        tramo = self._tramo(fecha_checkin, fecha_checkout)
+        if tipo_habitacion not in self.capacidades or tramo is None:
+            return None
+        with self._lock:
+            return self._libres(tipo_habitacion, *tramo)
+
+    def disponibilidad(self, fecha_checkin, fecha_checkout, tipos=None, por_noche=False):
+        """
+        Disponibilidad de varios tipos a la vez: {tipo: {'total', 'disponibles', 'sobreventa'[, 'por_noche']}}.
+        sobreventa: reservas de más que habitaciones en la noche más cargada (0 si no hay).
+        Devuelve None si las fechas no son válidas.
+        """
+        tramo = self._tramo(fecha_checkin, fecha_checkout)
+        if tramo is None:
+            return None
+        i, j = tramo
+        resultado = {}
+        with self._lock:
+            for tipo in tipos or self.capacidades:
+                if tipo not in self.capacidades:
+                    continue
+                capacidad = self.capacidades[tipo]
+                libres = capacidad - self.ocupadas[tipo][i:j]
+                minimo = int(libres.min())
+                resultado[tipo] = {'total': capacidad, 'disponibles': max(0, minimo), 'sobreventa': max(0, -minimo)}
+                if por_noche:
+                    resultado[tipo]['por_noche'] = np.maximum(libres, 0).tolist()
+        return resultado
+
+    def reservar(self, tipo_habitacion, fecha_checkin, fecha_checkout, registrar=None):
+        """
+        Verifica que haya lugar y ocupa una habitación en cada noche, todo bajo el lock.
+        registrar() (ej. el INSERT en la base) se ejecuta antes de ocupar: si falla, no se ocupa nada.
+        Devuelve lo que devuelva registrar(); lanza SinDisponibilidad si no hay lugar
+        y ValueError si el tipo o las fechas no son válidos.
+        """
+        tramo = self._tramo(fecha_checkin, fecha_checkout)
+        if tipo_habitacion not in self.capacidades or tramo is None:
+            raise ValueError('Tipo de habitación o fechas inválidas')
+        i, j = tramo
+
+        with self._lock:
+            libres = self._libres(tipo_habitacion, i, j)
+            if libres <= 0:
+                self.rechazadas += 1
+                raise SinDisponibilidad(tipo_habitacion, max(libres, 0))
+            resultado = registrar() if registrar else None
+            self.ocupadas[tipo_habitacion][i:j] += 1
+            return resultado
+
+    def liberar(self, tipo_habitacion, fecha_checkin, fecha_checkout):
+        """Devuelve las noches de una reserva cancelada"""
+        tramo = self._tramo(fecha_checkin, fecha_checkout)
+        if tipo_habitacion not in self.capacidades or tramo is None:
+            return
+        i, j = tramo
+        with self._lock:
+            ocupadas = self.ocupadas[tipo_habitacion]
+            ocupadas[i:j] = np.maximum(ocupadas[i:j] - 1, 0)
+
+    def estadisticas(self):
+        return {
+            'capacidades': self.capacidades,
+            'reservas_cargadas': self.reservas_cargadas,
+            'rechazadas': self.rechazadas
+        }
@@ -0,0 +1,175 @@
+"""
+Límite de llamadas simultáneas al modelo de lenguaje
+Las generaciones corren en un pool de hilos de tamaño fijo con una cola acotada: si la cola
+está llena se rechaza enseguida (503 + Retry-After) en lugar de acumular pedidos, y cada
+llamada tiene un tiempo máximo. Así unas pocas respuestas lentas de Gemini no dejan sin
+hilos a las reservas ni a las cotizaciones.
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+
+class Saturado(Exception):
+    """Hay max_concurrentes llamadas en curso y la cola está llena"""
+
+    def __init__(self, reintentar_en):
+        super().__init__('El asistente está ocupado, intentá de nuevo en unos segundos')
+        self.reintentar_en = reintentar_en
+
+
+class TiempoAgotado(Exception):
+    """La llamada (incluida la espera en la cola) superó timeout_segundos"""
+
+    def __init__(self, timeout_segundos):
+        super().__init__(f'El asistente no respondió en {timeout_segundos:g} segundos')
+        self.timeout_segundos = timeout_segundos
+
+
+class LimitadorLLM:
+    """
+    Pool de max_concurrentes hilos para las llamadas al modelo + hasta max_cola pedidos en espera.
+    ejecutar() devuelve el resultado de la llamada; flujo() devuelve los fragmentos de una
+    llamada en streaming a medida que llegan.
+    """
+
+    def __init__(self, max_concurrentes=4, max_cola=16, timeout_segundos=30):
+        self.max_concurrentes = max_concurrentes
+        self.max_cola = max_cola
+        self.timeout_segundos = timeout_segundos
+
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_concurrentes, thread_name_prefix='llm')
+        self._lock = threading.Lock()
+        self._admitidas = 0  # en curso + en cola
+
+        self.en_curso = 0
+        self.completadas = 0
+        self.rechazadas = 0
+        self.vencidas = 0
+        self.duracion_media = 2.0  # segundos (media móvil), para estimar Retry-After
+
+    def reintentar_en(self):
+        """Segundos estimados hasta que se libere un lugar"""
+        en_espera = max(self._admitidas - self.max_concurrentes, 0) + 1
+        return max(1, math.ceil(self.duracion_media * en_espera / self.max_concurrentes))
+
+    def _admitir(self):
+        with self._lock:
+            if self._admitidas >= self.max_concurrentes + self.max_cola:
+                self.rechazadas += 1
+                raise Saturado(self.reintentar_en())
+            self._admitidas += 1
+
+    def _terminar(self, inicio):
+        with self._lock:
+            self._admitidas -= 1
+            if inicio is not None:
+                self.en_curso -= 1
+                self.completadas += 1
+                self.duracion_media = 0.8 * self.duracion_media + 0.2 * (time.perf_counter() - inicio)
+
+    def _correr(self, funcion, args, kwargs):
+        inicio = time.perf_counter()
+        with self._lock:
+            self.en_curso += 1
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            self._terminar(inicio)
+
+    def enviar(self, funcion, *args, **kwargs):
+        """
+        Encola funcion(*args, **kwargs) en el pool sin esperar el resultado (devuelve un Future).
+        Lanza Saturado si no hay lugar.
+        """
+        self._admitir()
+        try:
+            return self._ejecutor.submit(self._correr, funcion, args, kwargs)
+        except Exception:
+            self._terminar(None)
+            raise
+
+    def abandonar(self, futuro, vencida=True):
+        """Deja de esperar una llamada (vencida o descartada); si seguía en la cola, la quita"""
+        if futuro.cancel():
+            self._terminar(None)
+        if vencida:
+            with self._lock:
+                self.vencidas += 1
+
+    def ejecutar(self, funcion, *args, timeout=None, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs) en el pool y espera su resultado.
+        Lanza Saturado si no hay lugar y TiempoAgotado si no termina a tiempo
+        (la llamada sigue ocupando su hilo hasta que el modelo responda).
+        """
+        timeout = self.timeout_segundos if timeout is None else timeout
+        futuro = self.enviar(funcion, *args, **kwargs)
+        try:
+            return futuro.result(timeout=timeout)
+        except FuturesTimeout:
+            self.abandonar(futuro)
+            raise TiempoAgotado(timeout)
+
+    def flujo(self, funcion, *args, timeout=None, **kwargs):
+        """
+        Versión en streaming: admite la llamada ahora (lanza Saturado enseguida si no hay lugar)
+        y devuelve un generador con los fragmentos que produce funcion(*args, **kwargs).
+        El generador lanza TiempoAgotado si la respuesta completa supera el timeout.
+        """
+        timeout = self.timeout_segundos if timeout is None else timeout
+        self._admitir()
+        cola = queue.Queue()
+        cancelado = threading.Event()
+
+        def producir():
+            try:
+                for fragmento in funcion(*args, **kwargs):
+                    if cancelado.is_set():  # el cliente se desconectó o se venció el tiempo
+                        break
+                    cola.put(('fragmento', fragmento))
+                cola.put(('fin', None))
+            except Exception as e:
+                cola.put(('error', e))
+
+        try:
+            self._ejecutor.submit(self._correr, producir, (), {})
+        except Exception:
+            self._terminar(None)
+            raise
+
+        def fragmentos():
+            limite = time.monotonic() + timeout
+            try:
+                while True:
+                    try:
+                        tipo, valor = cola.get(timeout=max(limite - time.monotonic(), 0))
+                    except queue.Empty:
+                        with self._lock:
+                            self.vencidas += 1
+                        raise TiempoAgotado(timeout)
+                    if tipo == 'fin':
+                        return
+                    if tipo == 'error':
+                        raise valor
+                    yield valor
+            finally:
+                cancelado.set()
+
+        return fragmentos()
+
+    def estadisticas(self):
+        return {
+            'max_concurrentes': self.max_concurrentes,
+            'max_cola': self.max_cola,
+            'timeout_segundos': self.timeout_segundos,
+            'en_curso': self.en_curso,
+            'en_cola': max(self._admitidas - self.en_curso, 0),
+            'completadas': self.completadas,
+            'rechazadas': self.rechazadas,
+            'vencidas': self.vencidas,
+            'duracion_media_segundos': round(self.duracion_media, 3)
+        }
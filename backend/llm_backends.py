@@ -0,0 +1,229 @@
+"""
+Backends del modelo de lenguaje
+Todos exponen la interfaz de genai.GenerativeModel que usa el chat:
+    generate_content(prompt, stream=False, request_options=None) → objeto con .text
+    (o, con stream=True, un iterable de fragmentos con .text)
+
+- gemini: Gemini real (necesita GEMINI_API_KEY)
+- stub:   local y determinista; arma la respuesta con las secciones del prompt y simula
+          la latencia de Gemini (primer fragmento + tiempo por token)
+- replay: reproduce respuestas grabadas (LLM_GRABAR) con sus latencias originales
+
+Se elige con LLM_BACKEND. Con el stub o el replay se pueden correr test_precision.py,
+los benchmarks y las pruebas de carga sin clave ni conexión, y medir solo el servidor.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from constructor_prompt import estimar_tokens
+from modelo_falso import ErrorTransitorio, Respuesta
+from router_faq import normalizar
+
+MODELO_GEMINI = 'gemini-2.5-flash'
+ARCHIVO_GRABACIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'llm_grabaciones.jsonl')
+
+
+def clave_prompt(prompt):
+    return hashlib.sha1(normalizar(prompt).encode('utf-8')).hexdigest()
+
+
+def partir_texto(texto, palabras_por_fragmento=8):
+    """Divide una respuesta en fragmentos de pocas palabras (como llegan del streaming)"""
+    palabras = texto.split(' ')
+    return [' '.join(palabras[i:i + palabras_por_fragmento]) + (' ' if i + palabras_por_fragmento < len(palabras) else '')
+            for i in range(0, len(palabras), palabras_por_fragmento)]
+
+
+class BackendGemini:
+    nombre = 'gemini'
+
+    def __init__(self, modelo=MODELO_GEMINI, api_key=None):
+        import google.generativeai as genai  # solo se importa si se usa este backend
+
+        genai.configure(api_key=api_key or os.getenv('GEMINI_API_KEY'))
+        self.modelo = modelo
+        self._modelo = genai.GenerativeModel(modelo)
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        return self._modelo.generate_content(prompt, stream=stream, request_options=request_options)
+
+
+class BackendStub:
+    """
+    Respuesta determinista por prompt (mismo prompt → mismo texto y misma latencia).
+    latencia_inicial: segundos hasta el primer fragmento; segundos_por_token: ritmo de generación.
+    tasa_errores: proporción de ErrorTransitorio (para probar reintentos y el circuit breaker).
+    """
+    nombre = 'stub'
+
+    def __init__(self, latencia_inicial=0.4, segundos_por_token=0.01, tasa_errores=0.0, semilla=0):
+        self.latencia_inicial = latencia_inicial
+        self.segundos_por_token = segundos_por_token
+        self.tasa_errores = tasa_errores
+        self.semilla = semilla
+        self._lock = threading.Lock()
+        self.llamadas = 0
+
+    @staticmethod
+    def responder(prompt):
+        """Texto plausible a partir del prompt: el mensaje del usuario y la primera sección relevante"""
+        mensaje = prompt.rsplit('Usuario:', 1)[-1].replace('BellBot:', '').strip()
+        seccion = ''
+        if 'INFORMACIÓN RELEVANTE DEL HOTEL:' in prompt:
+            relevante = prompt.split('INFORMACIÓN RELEVANTE DEL HOTEL:', 1)[1].strip()
+            lineas = [l.strip('- ').strip() for l in relevante.split('\n')[1:4] if l.strip() and not l.startswith('[')]
+            seccion = ' '.join(lineas)
+        partes = [f'¡Hola! Con gusto te ayudo con tu consulta: "{mensaje[:120]}".']
+        if seccion:
+            partes.append(f'Según la información del hotel: {seccion[:400]}')
+        partes.append('¿Querés que te ayude con algo más o que avancemos con una reserva?')
+        return ' '.join(partes)
+
+    def _sortear(self, prompt):
+        azar = random.Random(f'{self.semilla}:{clave_prompt(prompt)}')
+        with self._lock:
+            self.llamadas += 1
+        return azar.random() < self.tasa_errores, azar.uniform(0.8, 1.2)
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        falla, variacion = self._sortear(prompt)
+        texto = self.responder(prompt)
+        fragmentos = partir_texto(texto)
+        primera = self.latencia_inicial * variacion
+        if stream:
+            return self._flujo(fragmentos, primera, variacion, falla)
+        time.sleep(primera + estimar_tokens(texto) * self.segundos_por_token * variacion)
+        if falla:
+            raise ErrorTransitorio('503 Servicio no disponible (stub)')
+        return Respuesta(texto)
+
+    def _flujo(self, fragmentos, primera, variacion, falla):
+        time.sleep(primera)
+        if falla:
+            raise ErrorTransitorio('503 Servicio no disponible (stub)')
+        for fragmento in fragmentos:
+            yield Respuesta(fragmento)
+            time.sleep(estimar_tokens(fragmento) * self.segundos_por_token * variacion)
+
+
+class BackendReplay:
+    """
+    Reproduce respuestas grabadas por clave de prompt (ver BackendGrabador).
+    velocidad: 1 = latencias originales, 0 = sin esperas. Si un prompt no está grabado
+    se responde con el stub (o se lanza KeyError si respaldo=None).
+    """
+    nombre = 'replay'
+
+    def __init__(self, archivo=ARCHIVO_GRABACIONES, velocidad=1.0, respaldo=None):
+        self.archivo = archivo
+        self.velocidad = velocidad
+        self.respaldo = respaldo
+        self.grabaciones = {}
+        if os.path.exists(archivo):
+            with open(archivo, encoding='utf-8') as f:
+                for linea in f:
+                    if linea.strip():
+                        registro = json.loads(linea)
+                        self.grabaciones[registro['clave']] = registro
+        self.aciertos = 0
+        self.fallos = 0
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        registro = self.grabaciones.get(clave_prompt(prompt))
+        if registro is None:
+            self.fallos += 1
+            if self.respaldo is None:
+                raise KeyError('Prompt sin grabación')
+            return self.respaldo.generate_content(prompt, stream=stream, request_options=request_options)
+        self.aciertos += 1
+
+        fragmentos = registro.get('fragmentos') or [registro['respuesta']]
+        primera = registro.get('primer_fragmento_segundos', registro['segundos']) * self.velocidad
+        resto = max(registro['segundos'] * self.velocidad - primera, 0)
+        if stream:
+            return self._flujo(fragmentos, primera, resto / max(len(fragmentos) - 1, 1))
+        time.sleep(primera + resto)
+        return Respuesta(registro['respuesta'])
+
+    @staticmethod
+    def _flujo(fragmentos, primera, pausa):
+        time.sleep(primera)
+        for i, fragmento in enumerate(fragmentos):
+            if i:
+                time.sleep(pausa)
+            yield Respuesta(fragmento)
+
+
+class BackendGrabador:
+    """Envuelve otro backend y agrega cada respuesta (texto, fragmentos y latencias) al archivo JSONL"""
+
+    def __init__(self, backend, archivo=ARCHIVO_GRABACIONES):
+        self.backend = backend
+        self.nombre = f'{backend.nombre}+grabacion'
+        self.archivo = archivo
+        self._lock = threading.Lock()
+
+    def _guardar(self, prompt, fragmentos, primera, total):
+        registro = {
+            'clave': clave_prompt(prompt),
+            'mensaje': prompt.rsplit('Usuario:', 1)[-1].replace('BellBot:', '').strip()[:200],
+            'respuesta': ''.join(fragmentos),
+            'fragmentos': fragmentos,
+            'primer_fragmento_segundos': round(primera, 4),
+            'segundos': round(total, 4)
+        }
+        with self._lock, open(self.archivo, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        inicio = time.perf_counter()
+        respuesta = self.backend.generate_content(prompt, stream=stream, request_options=request_options)
+        if stream:
+            return self._flujo(prompt, respuesta, inicio)
+        total = time.perf_counter() - inicio
+        self._guardar(prompt, [respuesta.text], total, total)
+        return respuesta
+
+    def _flujo(self, prompt, fragmentos, inicio):
+        textos, primera = [], None
+        for fragmento in fragmentos:
+            if primera is None:
+                primera = time.perf_counter() - inicio
+            try:
+                textos.append(fragmento.text or '')
+            except ValueError:
+                textos.append('')
+            yield fragmento
+        self._guardar(prompt, textos, primera or 0, time.perf_counter() - inicio)
+
+
+def crear_backend(nombre=None):
+    """Backend según LLM_BACKEND (gemini por defecto); LLM_GRABAR=<archivo> graba sus respuestas"""
+    nombre = (nombre or os.getenv('LLM_BACKEND', 'gemini')).lower()
+    stub = BackendStub(
+        latencia_inicial=float(os.getenv('LLM_STUB_LATENCIA_INICIAL', 0.4)),
+        segundos_por_token=float(os.getenv('LLM_STUB_SEGUNDOS_POR_TOKEN', 0.01)),
+        tasa_errores=float(os.getenv('LLM_STUB_ERRORES', 0)),
+        semilla=int(os.getenv('LLM_SEMILLA', 0))
+    )
+    if nombre == 'gemini':
+        backend = BackendGemini(os.getenv('LLM_MODELO', MODELO_GEMINI))
+    elif nombre == 'stub':
+        backend = stub
+    elif nombre == 'replay':
+        backend = BackendReplay(
+            os.getenv('LLM_REPLAY_ARCHIVO', ARCHIVO_GRABACIONES),
+            velocidad=float(os.getenv('LLM_REPLAY_VELOCIDAD', 1.0)),
+            respaldo=stub
+        )
+    else:
+        raise ValueError(f'LLM_BACKEND desconocido: {nombre} (opciones: gemini, stub, replay)')
+
+    if os.getenv('LLM_GRABAR'):
+        backend = BackendGrabador(backend, os.getenv('LLM_GRABAR'))
+    return backend
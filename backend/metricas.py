@@ -0,0 +1,141 @@
+"""
+Métricas del servidor en formato Prometheus (texto plano, sin dependencias)
+- contadores: pedidos por ruta y estado, llamadas al modelo por resultado, etc.
+- histogramas: duración de los pedidos y de cada tramo caliente (armado del prompt,
+  llamada al modelo, consultas SQLite, serialización JSON) y tamaños de prompt/respuesta
+- medidores: valores que se leen al exportar (llamadas en curso, estado del circuito, ...)
+
+Uso:
+    metricas = Metricas(prefijo='hotel')
+    metricas.histograma('prompt_segundos', 'Tiempo de armado del prompt')
+    with metricas.medir('prompt_segundos'):
+        ...
+    metricas.exportar()  → texto para GET /api/metrics
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LIMITES_BYTES = (256, 1024, 4096, 8192, 16384, 32768, 65536, 131072)
+
+
+def _etiquetas(claves, valores):
+    if not claves:
+        return ''
+    pares = (f'{c}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+             for c, v in zip(claves, valores))
+    return '{' + ','.join(pares) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    def __init__(self, nombre, tipo, ayuda):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.ayuda = ayuda
+        self.series = {}  # tupla de (etiqueta, valor) ordenada → valor o [cuentas, suma, total]
+
+    def cabecera(self):
+        return [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+
+
+class _Histograma(_Metrica):
+    def __init__(self, nombre, ayuda, limites):
+        super().__init__(nombre, 'histogram', ayuda)
+        self.limites = tuple(limites)
+
+    def observar(self, clave, valor):
+        serie = self.series.get(clave)
+        if serie is None:
+            serie = self.series[clave] = [[0] * len(self.limites), 0.0, 0]
+        i = bisect_left(self.limites, valor)
+        if i < len(self.limites):
+            serie[0][i] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def lineas(self):
+        for clave, (cuentas, suma, total) in sorted(self.series.items()):
+            claves = [c for c, _ in clave]
+            valores = [v for _, v in clave]
+            acumulado = 0
+            for limite, cuenta in zip(self.limites, cuentas):
+                acumulado += cuenta
+                yield f'{self.nombre}_bucket{_etiquetas(claves + ["le"], valores + [_numero(limite)])} {acumulado}'
+            yield f'{self.nombre}_bucket{_etiquetas(claves + ["le"], valores + ["+Inf"])} {total}'
+            yield f'{self.nombre}_sum{_etiquetas(claves, valores)} {_numero(round(suma, 6))}'
+            yield f'{self.nombre}_count{_etiquetas(claves, valores)} {total}'
+
+
+class Metricas:
+    """Registro de métricas seguro entre hilos; las series se crean al primer uso de cada combinación de etiquetas"""
+
+    def __init__(self, prefijo='hotel'):
+        self.prefijo = prefijo
+        self._metricas = {}
+        self._medidores = []  # (nombre, ayuda, función → número o {etiquetas: número})
+        self._lock = threading.Lock()
+
+    def _nombre(self, nombre):
+        return f'{self.prefijo}_{nombre}' if self.prefijo else nombre
+
+    def contador(self, nombre, ayuda):
+        self._metricas[nombre] = _Metrica(self._nombre(nombre), 'counter', ayuda)
+
+    def histograma(self, nombre, ayuda, limites=LIMITES_SEGUNDOS):
+        self._metricas[nombre] = _Histograma(self._nombre(nombre), ayuda, limites)
+
+    def medidor(self, nombre, ayuda, funcion):
+        """funcion() se llama al exportar; puede devolver un número o {(('etiqueta', valor), ...): número}"""
+        self._medidores.append((self._nombre(nombre), ayuda, funcion))
+
+    def contar(self, nombre, cantidad=1, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        metrica = self._metricas[nombre]
+        with self._lock:
+            metrica.series[clave] = metrica.series.get(clave, 0) + cantidad
+
+    def observar(self, nombre, valor, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            self._metricas[nombre].observar(clave, valor)
+
+    @contextmanager
+    def medir(self, nombre, **etiquetas):
+        """Registra en el histograma `nombre` los segundos que tarda el bloque (también si lanza una excepción)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus (text/plain; version=0.0.4)"""
+        lineas = []
+        with self._lock:
+            for metrica in self._metricas.values():
+                lineas += metrica.cabecera()
+                if metrica.tipo == 'histogram':
+                    lineas += list(metrica.lineas())
+                else:
+                    for clave, valor in sorted(metrica.series.items()):
+                        lineas.append(f'{metrica.nombre}{_etiquetas([c for c, _ in clave], [v for _, v in clave])} '
+                                      f'{_numero(valor)}')
+        for nombre, ayuda, funcion in self._medidores:
+            try:
+                valor = funcion()
+            except Exception:
+                continue  # un medidor que falla no debe romper el scrape
+            lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} gauge']
+            if isinstance(valor, dict):
+                for clave, v in sorted(valor.items()):
+                    lineas.append(f'{nombre}{_etiquetas([c for c, _ in clave], [x for _, x in clave])} {_numero(v)}')
+            else:
+                lineas.append(f'{nombre} {_numero(valor)}')
+        return '\n'.join(lineas) + '\n'
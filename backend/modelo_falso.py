@@ -0,0 +1,71 @@
+"""
+Modelo falso local con la misma interfaz que genai.GenerativeModel
+Devuelve un texto fijo con una demora configurable y puede inyectar errores transitorios,
+para probar el cliente resiliente (reintentos, hedging, circuit breaker) sin llamar a Gemini.
+"""
+
+import random
+import threading
+import time
+
+
+class ErrorTransitorio(Exception):
+    """Simula un 503 del servicio (mismo nombre de clase que google.api_core)"""
+    code = 503
+
+
+class Respuesta:
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class ModeloFalso:
+    """
+    generate_content(prompt, stream=False, request_options=None)
+    latencia: segundos por respuesta; cola_lenta: probabilidad de que una respuesta tarde
+    factor_lento veces más (latencia de cola); tasa_errores: probabilidad de ErrorTransitorio.
+    """
+
+    def __init__(self, texto='Respuesta de prueba del modelo local.', latencia=0.2, cola_lenta=0.0, factor_lento=10,
+                 tasa_errores=0.0, fragmentos=4, semilla=None):
+        self.texto = texto
+        self.latencia = latencia
+        self.cola_lenta = cola_lenta
+        self.factor_lento = factor_lento
+        self.tasa_errores = tasa_errores
+        self.fragmentos = fragmentos
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self.llamadas = 0
+
+    def _sortear(self):
+        with self._lock:
+            self.llamadas += 1
+            falla = self._azar.random() < self.tasa_errores
+            lenta = self._azar.random() < self.cola_lenta
+        return falla, self.latencia * (self.factor_lento if lenta else 1)
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        falla, demora = self._sortear()
+        timeout = (request_options or {}).get('timeout')
+        if stream:
+            return self._flujo(falla, demora, timeout)
+        time.sleep(min(demora, timeout) if timeout else demora)
+        if falla:
+            raise ErrorTransitorio('503 Servicio no disponible (simulado)')
+        if timeout and demora > timeout:
+            raise TimeoutError('Tiempo agotado (simulado)')
+        return Respuesta(self.texto)
+
+    def _flujo(self, falla, demora, timeout):
+        palabras = self.texto.split(' ')
+        tamano = max(1, -(-len(palabras) // self.fragmentos))
+        pausa = demora / self.fragmentos
+        if falla:
+            time.sleep(pausa)
+            raise ErrorTransitorio('503 Servicio no disponible (simulado)')
+        for i in range(0, len(palabras), tamano):
+            time.sleep(pausa)
+            yield Respuesta(' '.join(palabras[i:i + tamano]) + ' ')
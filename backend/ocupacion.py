@@ -0,0 +1,168 @@
+"""
+Ocupación por noche con NumPy
+Cada estadía se guarda como (tipo, noche de check-in, noche de check-out) en días desde
+1970-01-01. Para una ventana de fechas la ocupación de todas las noches sale de un arreglo
+de diferencias: +1 en la noche de llegada y -1 en la de salida (recortadas a la ventana),
+contadas con np.bincount para todos los tipos a la vez y acumuladas con np.cumsum. No hay
+bucles por reserva ni por noche: un año de un millón de reservas se calcula en milisegundos.
+
+    calendario = CalendarioOcupacion.desde_base(conn, capacidades_desde_hotel(hotel), '2025-01-01', '2025-12-31')
+    calendario.ocupadas('2025-01-01', '2025-12-31')   # DataFrame noche × tipo
+    calendario.resumen('2025-01-01', '2025-12-31')    # % de ocupación total y por tipo
+
+Con una ventana, desde_base lee de la base solo las estadías que la tocan (índices por
+fecha de check-in y de check-out); ventana_reciente da la ventana por defecto sin recorrer
+la tabla.
+
+Igual que el inventario, no cuentan las reservas canceladas ni las de tipos que no están
+en hotel_info.json.
+"""
+
+import numpy as np
+import pandas as pd
+
+from inventario import ESTADOS_LIBRES
+
+# Fecha de SQLite → días desde 1970-01-01 (2440587.5 es el día juliano de esa fecha)
+DIA_SQL = 'CAST(julianday({}) - 2440587.5 AS INTEGER)'
+# Noches de la ventana por defecto (ventana_reciente)
+VENTANA_DIAS = 365
+
+
+def numero_dia(fecha):
+    """'YYYY-MM-DD', date o datetime64 → días desde 1970-01-01 (ValueError si no es una fecha)"""
+    return int(np.datetime64(str(fecha)[:10] if isinstance(fecha, str) else fecha, 'D').astype(np.int64))
+
+
+def fecha_dia(numero):
+    """Días desde 1970-01-01 → 'YYYY-MM-DD'"""
+    return str(np.datetime64(int(numero), 'D'))
+
+
+def ventana_reciente(conn, dias=VENTANA_DIAS, hoy=None):
+    """
+    (desde, hasta) de las últimas `dias` noches con reservas hasta hoy: termina en la última
+    noche reservada o en hoy, lo que sea antes. Lee solo el máximo del índice de check-out.
+    None si no hay reservas.
+    """
+    ultima = conn.execute('SELECT MAX(fecha_checkout) FROM reservas').fetchone()[0]
+    if not ultima:
+        return None
+    hasta = min(numero_dia(ultima) - 1, numero_dia(hoy or np.datetime64('today', 'D')))
+    return fecha_dia(hasta - dias + 1), fecha_dia(hasta)
+
+
+class CalendarioOcupacion:
+    """
+    capacidades: {tipo: habitaciones}; codigos: índice del tipo (en el orden de capacidades)
+    de cada estadía; inicios y fines: noche de check-in y de check-out en días desde 1970-01-01.
+    """
+
+    def __init__(self, capacidades, codigos, inicios, fines):
+        self.capacidades = dict(capacidades)
+        self.tipos = list(self.capacidades)
+        self.codigos = np.asarray(codigos, dtype=np.int32)
+        self.inicios = np.asarray(inicios, dtype=np.int32)
+        self.fines = np.asarray(fines, dtype=np.int32)
+
+    @classmethod
+    def desde_base(cls, conn, capacidades, desde=None, hasta=None):
+        """
+        Lee de la tabla de reservas solo el tipo y las dos fechas, ya convertidas a números por SQLite.
+        Con desde/hasta trae solo las estadías que ocupan alguna noche de la ventana (inclusive);
+        sin ventana lee todas las reservas. De los dos índices (check-out > desde o check-in <= hasta)
+        usa el que deja menos filas, estimado con la primera y la última fecha de la tabla.
+        """
+        tipos = list(capacidades)
+        if not tipos:
+            return cls(capacidades, [], [], [])
+        casos = ' '.join(f'WHEN ? THEN {i}' for i in range(len(tipos)))
+        sql = f'''SELECT CASE tipo_habitacion {casos} END, {DIA_SQL.format('fecha_checkin')},
+                         {DIA_SQL.format('fecha_checkout')}
+                  FROM reservas
+                  WHERE +tipo_habitacion IN ({', '.join('?' * len(tipos))})
+                    AND COALESCE(estado, '') NOT IN ({', '.join('?' * len(ESTADOS_LIBRES))})
+                    AND julianday(fecha_checkout) > julianday(fecha_checkin)'''
+        parametros = tipos + tipos + list(ESTADOS_LIBRES)
+        # el "+" delante de la columna descarta su índice: SQLite no sabe qué rango es más chico
+        por_checkout = hasta is None or desde is not None and cls._checkout_es_menor(conn, desde, hasta)
+        if desde is not None:
+            sql += f" AND {'' if por_checkout else '+'}fecha_checkout > ?"
+            parametros.append(fecha_dia(numero_dia(desde)))
+        if hasta is not None:
+            sql += f" AND {'+' if por_checkout else ''}fecha_checkin <= ?"
+            parametros.append(fecha_dia(numero_dia(hasta)))
+        filas = conn.execute(sql, parametros).fetchall()
+        datos = np.array(filas, dtype=np.int32).reshape(-1, 3)
+        return cls(capacidades, datos[:, 0], datos[:, 1], datos[:, 2])
+
+    @staticmethod
+    def _checkout_es_menor(conn, desde, hasta):
+        """True si hay menos noches entre desde y la última fecha que entre la primera y hasta"""
+        primera, ultima = conn.execute('''SELECT (SELECT MIN(fecha_checkin) FROM reservas),
+                                                  (SELECT MAX(fecha_checkout) FROM reservas)''').fetchone()
+        if not primera or not ultima:
+            return True
+        return numero_dia(ultima) - numero_dia(desde) <= numero_dia(hasta) - numero_dia(primera)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def rango(self):
+        """(primera noche, última noche) con alguna estadía, como datetime64; None si no hay reservas"""
+        if not len(self):
+            return None
+        return (np.datetime64(int(self.inicios.min()), 'D'), np.datetime64(int(self.fines.max()) - 1, 'D'))
+
+    def matriz(self, desde, hasta):
+        """Arreglo (tipos × noches) de habitaciones ocupadas cada noche entre desde y hasta (inclusive)"""
+        inicio = numero_dia(desde)
+        noches = numero_dia(hasta) - inicio + 1
+        if noches <= 0:
+            raise ValueError('La fecha hasta es anterior a desde')
+        # cada tipo usa su propio tramo de noches + 1 posiciones (la última recibe las salidas fuera de la ventana)
+        i = np.clip(self.inicios - inicio, 0, noches)
+        j = np.clip(self.fines - inicio, 0, noches)
+        base = self.codigos * (noches + 1)
+        largo = len(self.tipos) * (noches + 1)
+        diferencias = np.bincount(base + i, minlength=largo) - np.bincount(base + j, minlength=largo)
+        return np.cumsum(diferencias.reshape(len(self.tipos), noches + 1)[:, :-1], axis=1).astype(np.int32)
+
+    def ocupadas(self, desde, hasta):
+        """DataFrame con una fila por noche y una columna por tipo de habitación"""
+        return pd.DataFrame(self.matriz(desde, hasta).T, columns=self.tipos,
+                            index=pd.date_range(str(desde)[:10], str(hasta)[:10], freq='D', name='noche'))
+
+    def resumen(self, desde=None, hasta=None):
+        """
+        Porcentaje de ocupación (noches ocupadas / noches disponibles) en la ventana, total y por
+        tipo, y la noche con más ocupación. Sin fechas, la ventana va de la primera a la última
+        noche con reservas. Si alguna noche hay más reservas que habitaciones se cuenta la capacidad.
+        """
+        if desde is None or hasta is None:
+            rango = self.rango()
+            if rango is None:
+                return None
+            desde, hasta = desde or rango[0], hasta or rango[1]
+        matriz = self.matriz(desde, hasta)
+        capacidades = np.array([self.capacidades[t] for t in self.tipos], dtype=np.int64)
+        ocupadas = np.minimum(matriz, capacidades[:, None])
+        noches = matriz.shape[1]
+        por_noche = ocupadas.sum(axis=0)
+        disponibles = int(capacidades.sum()) * noches
+        pico = int(por_noche.argmax())
+        return {
+            'desde': str(np.datetime64(numero_dia(desde), 'D')),
+            'hasta': str(np.datetime64(numero_dia(hasta), 'D')),
+            'noches': noches,
+            'habitaciones': int(capacidades.sum()),
+            'ocupacion': round(100 * int(por_noche.sum()) / disponibles, 2) if disponibles else 0,
+            'por_tipo': {
+                tipo: round(100 * int(ocupadas[k].sum()) / (int(capacidades[k]) * noches), 2) if capacidades[k] else 0
+                for k, tipo in enumerate(self.tipos)
+            },
+            'noche_pico': {
+                'noche': str(np.datetime64(numero_dia(desde) + pico, 'D')),
+                'ocupadas': int(por_noche[pico])
+            }
+        }
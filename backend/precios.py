@@ -0,0 +1,232 @@
+"""
+Motor de precios con calendario de temporadas precalculado
+Cada día entre FECHA_DESDE y FECHA_HASTA se marca una sola vez como temporada alta o baja
+(verano, Semana Santa calculada a partir de la Pascua y feriados largos configurables).
+Con la suma acumulada de la tarifa diaria de cada habitación, el precio de cualquier
+estadía es una resta de dos posiciones: acumulado[checkout] - acumulado[checkin].
+"""
+
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+FECHA_DESDE = date(2000, 1, 1)
+FECHA_HASTA = date(2100, 12, 31)
+
+# Verano: diciembre a febrero
+MESES_TEMPORADA_ALTA = (12, 1, 2)
+
+# Feriados largos por defecto (mes, día); se pueden reemplazar con los de hotel_info.json
+FERIADOS_LARGOS = [(5, 25), (7, 9), (10, 12)]
+
+MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6, 'julio': 7,
+    'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12
+}
+
+
+def calcular_pascua(anio):
+    """Domingo de Pascua (calendario gregoriano, algoritmo de Meeus/Jones/Butcher)"""
+    a = anio % 19
+    b, c = divmod(anio, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(anio, mes, dia + 1)
+
+
+def feriados_desde_hotel(hotel):
+    """Lee los feriados largos de temporadas.alta.periodos ("25 de Mayo" → (5, 25))"""
+    feriados = []
+    for periodo in hotel.get('temporadas', {}).get('alta', {}).get('periodos', []):
+        for ejemplo in periodo.get('ejemplos', []):
+            coincidencia = re.match(r'(\d{1,2}) de (\w+)', ejemplo.strip().lower())
+            if coincidencia and coincidencia.group(2) in MESES:
+                feriados.append((MESES[coincidencia.group(2)], int(coincidencia.group(1))))
+    return feriados or list(FERIADOS_LARGOS)
+
+
+def precios_desde_hotel(hotel):
+    """Tarifas por tipo de habitación a partir de hotel_info.json (mismo formato que HABITACIONES)"""
+    return {
+        tipo: {
+            'precio_temporada_baja': h['precios']['temporada_baja'],
+            'precio_temporada_alta': h['precios']['temporada_alta'],
+        }
+        for tipo, h in hotel['habitaciones'].items()
+    }
+
+
+def parsear_fecha(valor):
+    """'YYYY-MM-DD' → date (None si no es válida)"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        pass
+    try:
+        # strptime acepta también meses/días sin cero inicial (2025-1-5)
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+class CalendarioTemporadas:
+    """Arreglo booleano con un valor por día: True = temporada alta"""
+
+    def __init__(self, desde=FECHA_DESDE, hasta=FECHA_HASTA, feriados_largos=None):
+        self.desde = desde
+        self.hasta = hasta
+        self.feriados_largos = list(feriados_largos if feriados_largos is not None else FERIADOS_LARGOS)
+
+        dias = np.arange(np.datetime64(desde), np.datetime64(hasta) + 1)
+        meses = dias.astype('datetime64[M]').astype(int) % 12 + 1
+        self.alta = np.isin(meses, MESES_TEMPORADA_ALTA)
+
+        for anio in range(desde.year, hasta.year + 1):
+            # Semana Santa: del Domingo de Ramos al Domingo de Pascua
+            pascua = calcular_pascua(anio)
+            self._marcar(pascua - timedelta(days=7), pascua)
+
+            # Feriados largos: el feriado más el fin de semana pegado (puente)
+            for mes, dia in self.feriados_largos:
+                try:
+                    feriado = date(anio, mes, dia)
+                except ValueError:
+                    continue
+                dia_semana = feriado.weekday()  # 0 = lunes
+                if dia_semana in (0, 1):  # lunes/martes → desde el sábado anterior
+                    self._marcar(feriado - timedelta(days=dia_semana + 2), feriado)
+                elif dia_semana in (3, 4):  # jueves/viernes → hasta el domingo
+                    self._marcar(feriado, feriado + timedelta(days=6 - dia_semana))
+                elif dia_semana == 5:  # sábado → sábado y domingo
+                    self._marcar(feriado, feriado + timedelta(days=1))
+                elif dia_semana == 6:  # domingo → sábado y domingo
+                    self._marcar(feriado - timedelta(days=1), feriado)
+                else:
+                    self._marcar(feriado, feriado)
+
+    def _marcar(self, inicio, fin):
+        i = max((inicio - self.desde).days, 0)
+        j = min((fin - self.desde).days, len(self.alta) - 1)
+        if i <= j:
+            self.alta[i:j + 1] = True
+
+    def indice(self, fecha):
+        """Posición de la fecha en el calendario (None si está fuera de rango)"""
+        i = (fecha - self.desde).days
+        return i if 0 <= i < len(self.alta) else None
+
+    def es_alta(self, fecha):
+        i = self.indice(fecha)
+        return bool(self.alta[i]) if i is not None else False
+
+
+class MotorPrecios:
+    """
+    Precios por estadía a partir del calendario.
+    acumulados[tipo][i] = suma de las tarifas de las noches anteriores al día i.
+    """
+
+    def __init__(self, habitaciones, calendario=None):
+        self.calendario = calendario or CalendarioTemporadas()
+        self.tipos = list(habitaciones)
+        self.acumulados = {}
+        for tipo, h in habitaciones.items():
+            tarifa_diaria = np.where(self.calendario.alta, h['precio_temporada_alta'], h['precio_temporada_baja'])
+            self.acumulados[tipo] = np.concatenate(([0], np.cumsum(tarifa_diaria, dtype=np.int64)))
+
+    def cotizar(self, tipo_habitacion, fecha_checkin, fecha_checkout):
+        """Mismo resultado que calcular_precio_reserva: {'noches', 'precio_total', 'precio_promedio_noche'} o None"""
+        acumulado = self.acumulados.get(tipo_habitacion) if isinstance(tipo_habitacion, str) else None
+        checkin = parsear_fecha(fecha_checkin)
+        checkout = parsear_fecha(fecha_checkout)
+        if acumulado is None or checkin is None or checkout is None:
+            return None
+
+        i = self.calendario.indice(checkin)
+        j = self.calendario.indice(checkout)
+        noches = (checkout - checkin).days
+        if i is None or j is None or noches <= 0:
+            return None
+
+        precio_total = int(acumulado[j] - acumulado[i])
+        return {
+            "noches": noches,
+            "precio_total": precio_total,
+            "precio_promedio_noche": precio_total / noches
+        }
+
+    def cotizar_lote(self, cotizaciones):
+        """
+        Cotiza muchas estadías en una sola llamada.
+        cotizaciones: iterable de (tipo_habitacion, fecha_checkin, fecha_checkout).
+        Devuelve una lista con el resultado de cotizar() (o None) para cada una, en el mismo orden.
+        """
+        cotizaciones = list(cotizaciones)
+        if not cotizaciones:
+            return []
+        tipos, checkins, checkouts = zip(*cotizaciones)
+        i, j = self.indices(checkins), self.indices(checkouts)
+        totales, validas = self.totales(tipos, i, j)
+
+        resultados = []
+        for k in range(len(cotizaciones)):
+            if not validas[k]:
+                resultados.append(None)
+                continue
+            noches = int(j[k] - i[k])
+            precio_total = int(totales[k])
+            resultados.append({
+                "noches": noches,
+                "precio_total": precio_total,
+                "precio_promedio_noche": precio_total / noches
+            })
+        return resultados
+
+    def indices(self, fechas):
+        """
+        Fechas ('YYYY-MM-DD' o date) → posiciones en el calendario (-1 si son inválidas o están fuera de rango).
+        Cada fecha distinta pasa por parsear_fecha, igual que en cotizar(): NumPy aceptaría también
+        enteros o 'YYYY-MM-DDTHH:MM' y el lote cotizaría lo que una cotización sola rechaza.
+        """
+        posiciones = {}
+        indices = []
+        for fecha in fechas:
+            try:
+                i = posiciones.get(fecha)
+                if i is None:
+                    i = posiciones[fecha] = self._posicion(fecha)
+            except TypeError:  # no se puede usar de clave (una lista, por ejemplo)
+                i = self._posicion(fecha)
+            indices.append(i)
+        return np.array(indices, dtype=np.int64)
+
+    def _posicion(self, fecha):
+        dia = parsear_fecha(fecha)
+        i = self.calendario.indice(dia) if dia is not None else None
+        return -1 if i is None else i
+
+    def totales(self, tipos, i, j):
+        """Precio total de cada estadía (vectorizado por tipo). Devuelve (totales, validas)."""
+        # fromiter y no asarray: con tipos que son listas del mismo largo asarray armaría una matriz
+        tipos = np.fromiter(tipos, dtype=object, count=len(tipos))
+        totales = np.zeros(len(tipos), dtype=np.int64)
+        validas = (i >= 0) & (j >= 0) & (j > i)
+        conocidos = np.zeros(len(tipos), dtype=bool)
+        for tipo, acumulado in self.acumulados.items():
+            filas = tipos == tipo
+            conocidos |= filas
+            filas &= validas
+            totales[filas] = acumulado[j[filas]] - acumulado[i[filas]]
+        validas &= conocidos
+        return totales, validas
@@ -0,0 +1,138 @@
+"""
+Resúmenes precalculados de reservas (rollups) para analytics
+En lugar de leer toda la tabla en cada análisis, se mantienen totales por día de check-in,
+por mes, por tipo de habitación y por cantidad de huéspedes (reservas, ingresos y noches).
+Se actualizan de forma incremental: rollup_estado guarda el último id de reserva ya sumado y
+actualizar_rollups() suma solo las reservas nuevas (catch-up por marca de agua). Leerlos
+cuesta lo mismo con 100 reservas que con millones.
+
+Los cambios sobre reservas ya sumadas (por ejemplo una cancelación) no se reflejan hasta
+reconstruir_rollups(); igual que el análisis original, se cuentan todas las reservas sin
+mirar el estado.
+"""
+
+import threading
+
+# Dimensiones de rollup_reservas y cómo se calcula su clave a partir de una reserva
+DIMENSIONES = {
+    'dia': "COALESCE(date(fecha_checkin), '')",
+    'mes': "COALESCE(strftime('%Y-%m', fecha_checkin), '')",
+    'huespedes': "COALESCE(CAST(huespedes AS TEXT), '')",
+    'total': "''",
+}
+NOCHES = "COALESCE(CAST(julianday(fecha_checkout) - julianday(fecha_checkin) AS INTEGER), 0)"
+LOTE = 50000
+
+_lock = threading.Lock()
+
+
+def actualizar_rollups(conn, lote=LOTE):
+    """
+    Suma a los rollups las reservas con id mayor a la marca de agua, de a `lote` por vez.
+    Corre en una transacción IMMEDIATE: dos actualizaciones simultáneas (otro hilo u otro
+    proceso) no pueden sumar dos veces las mismas reservas. Devuelve cuántas reservas sumó.
+    """
+    # Sin reservas nuevas no se toma el lock de escritura: alcanza con una lectura por la clave primaria
+    nuevas = conn.execute('SELECT EXISTS (SELECT 1 FROM reservas WHERE id > '
+                          '(SELECT ultimo_id FROM rollup_estado WHERE id = 1))').fetchone()[0]
+    if not nuevas:
+        return 0
+    sumadas = 0
+    with _lock:
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                desde = conn.execute('SELECT ultimo_id FROM rollup_estado WHERE id = 1').fetchone()[0]
+                hasta = conn.execute('SELECT MAX(id) FROM (SELECT id FROM reservas WHERE id > ? ORDER BY id LIMIT ?)',
+                                     (desde, lote)).fetchone()[0]
+                if hasta is None:
+                    conn.execute('COMMIT')
+                    return sumadas
+                for dimension, clave in DIMENSIONES.items():
+                    conn.execute(f'''
+                        INSERT INTO rollup_reservas (dimension, clave, tipo_habitacion, reservas, ingresos, noches)
+                        SELECT ?, {clave}, COALESCE(tipo_habitacion, ''), COUNT(*),
+                               COALESCE(SUM(precio_total), 0), SUM({NOCHES})
+                        FROM reservas WHERE id > ? AND id <= ?
+                        GROUP BY 2, 3
+                        ON CONFLICT (dimension, clave, tipo_habitacion) DO UPDATE SET
+                            reservas = reservas + excluded.reservas,
+                            ingresos = ingresos + excluded.ingresos,
+                            noches = noches + excluded.noches''', (dimension, desde, hasta))
+                sumadas += conn.execute('SELECT COUNT(*) FROM reservas WHERE id > ? AND id <= ?',
+                                        (desde, hasta)).fetchone()[0]
+                conn.execute('UPDATE rollup_estado SET ultimo_id = ? WHERE id = 1', (hasta,))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+
+def reconstruir_rollups(conn):
+    """Borra los rollups y los vuelve a calcular desde cero (después de modificar reservas viejas)"""
+    with _lock:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('DELETE FROM rollup_reservas')
+        conn.execute('UPDATE rollup_estado SET ultimo_id = 0 WHERE id = 1')
+        conn.execute('COMMIT')
+    return actualizar_rollups(conn)
+
+
+def leer_rollup(conn, dimension, desde=None, hasta=None):
+    """Filas (clave, tipo_habitacion, reservas, ingresos, noches) de una dimensión, opcionalmente en un rango de claves"""
+    sql = 'SELECT clave, tipo_habitacion, reservas, ingresos, noches FROM rollup_reservas WHERE dimension = ?'
+    parametros = [dimension]
+    if desde:
+        sql += ' AND clave >= ?'
+        parametros.append(desde)
+    if hasta:
+        sql += ' AND clave <= ?'
+        parametros.append(hasta)
+    return conn.execute(sql + ' ORDER BY clave, tipo_habitacion', parametros).fetchall()
+
+
+def _sumar(filas, por):
+    """Agrupa filas del rollup por clave (por='clave') o por tipo (por='tipo')"""
+    resultado = {}
+    for clave, tipo, reservas, ingresos, noches in filas:
+        k = clave if por == 'clave' else tipo
+        actual = resultado.setdefault(k, {'reservas': 0, 'ingresos': 0.0, 'noches': 0})
+        actual['reservas'] += reservas
+        actual['ingresos'] += ingresos
+        actual['noches'] += noches
+    return resultado
+
+
+def resumen_analytics(conn, desde=None, hasta=None):
+    """
+    Totales generales, por tipo de habitación, por mes y por cantidad de huéspedes; con desde/hasta
+    (YYYY-MM-DD) agrega la serie diaria de ese rango. Lee solo los rollups.
+    """
+    por_tipo = _sumar(leer_rollup(conn, 'total'), 'tipo')
+    reservas = sum(t['reservas'] for t in por_tipo.values())
+    ingresos = sum(t['ingresos'] for t in por_tipo.values())
+    noches = sum(t['noches'] for t in por_tipo.values())
+    for totales in por_tipo.values():
+        totales['ingreso_promedio'] = round(totales['ingresos'] / totales['reservas'], 2) if totales['reservas'] else 0
+
+    resumen = {
+        'total': {
+            'reservas': reservas,
+            'ingresos': ingresos,
+            'ingreso_promedio': round(ingresos / reservas, 2) if reservas else 0,
+            'noches': noches,
+            'noches_promedio': round(noches / reservas, 2) if reservas else 0
+        },
+        'por_tipo': por_tipo,
+        'por_mes': [{'mes': mes, **t} for mes, t in sorted(_sumar(leer_rollup(conn, 'mes'), 'clave').items())],
+        'por_huespedes': [
+            {'huespedes': int(h) if h.isdigit() else h, **t,
+             'precio_promedio': round(t['ingresos'] / t['reservas'], 2) if t['reservas'] else 0}
+            for h, t in sorted(_sumar(leer_rollup(conn, 'huespedes'), 'clave').items())
+        ],
+        'actualizado_hasta_id': conn.execute('SELECT ultimo_id FROM rollup_estado WHERE id = 1').fetchone()[0]
+    }
+    if desde or hasta:
+        resumen['por_dia'] = [{'dia': dia, **t} for dia, t in
+                              sorted(_sumar(leer_rollup(conn, 'dia', desde, hasta), 'clave').items())]
+    return resumen
@@ -0,0 +1,269 @@
+"""
+Router de intenciones para preguntas frecuentes
+Responde sin llamar a Gemini las consultas que se resuelven con datos/hotel_info.json
+(horarios, servicios, políticas, formas de pago, habitaciones...).
+"""
+
+import json
+import os
+import re
+from unidecode import unidecode
+
+RUTA_HOTEL_INFO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datos', 'hotel_info.json')
+
+# Puntaje mínimo para responder sin LLM y proporción máxima del segundo mejor puntaje
+UMBRAL_PUNTAJE = 3
+MARGEN_SEGUNDO = 0.6
+MAX_PALABRAS = 15
+
+# Señales de que la consulta necesita cálculo o contexto (fechas, disponibilidad, reservas concretas)
+PATRONES_DINAMICOS = [
+    'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+    'septiembre', 'setiembre', 'octubre', 'noviembre', 'diciembre',
+    'disponib', 'quiero reservar', 'quisiera reservar', 'noches', 'manana', 'fin de semana',
+]
+REGEX_FECHA = re.compile(r'\d{1,2}\s*[/-]\s*\d{1,2}')
+
+# Gestión de una reserva propia ("quiero cancelar la reserva que hice") → LLM, no la política general
+PATRONES_GESTION = [
+    'mi reserva', 'reserva que hice', 'reserva que tengo', 'cancelar la reserva', 'cancelar mi',
+    'modificar la reserva', 'cambiar la reserva',
+]
+# Señales de que el último turno del bot estaba pidiendo datos de una reserva en curso
+PATRONES_RECOLECCION = [
+    'nombre completo', 'tu nombre', 'email', 'correo', 'telefono', 'tipo de habitacion',
+    'que habitacion', 'cual habitacion', 'fecha de check', 'fechas', 'check in', 'check out',
+    'cuantos huespedes', 'cuantas personas', 'huespedes', 'forma de pago', 'confirm', 'tu reserva',
+]
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni signos de puntuación, con espacios simples"""
+    texto = unidecode(texto or '').lower()
+    texto = re.sub(r'[^a-z0-9]+', ' ', texto)
+    return texto.strip()
+
+
+def formatear_precio(valor):
+    """Formato argentino: $25.000"""
+    return f"${valor:,}".replace(',', '.')
+
+
+def cargar_hotel_info(ruta=RUTA_HOTEL_INFO):
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)['hotel']
+
+
+def recolectando_reserva(historial):
+    """
+    True si el último mensaje del bot en el historial [{'role', 'content'}] pedía datos de una
+    reserva: hace una pregunta (o dice "necesito") y nombra alguno de los datos de la reserva.
+    """
+    for mensaje in reversed(historial or []):
+        if mensaje.get('role') == 'user':
+            continue
+        contenido = mensaje.get('content') or ''
+        texto = ' ' + normalizar(contenido) + ' '
+        if '?' not in contenido and ' necesito ' not in texto:
+            return False
+        return any(' ' + patron in texto for patron in PATRONES_RECOLECCION)
+    return False
+
+
+class RouterFAQ:
+    """
+    Índice precalculado de intenciones → respuesta.
+    Cada intención tiene patrones (frases normalizadas) con un peso; la consulta se
+    responde localmente solo si la mejor intención supera el umbral y no hay otra cerca.
+    """
+
+    def __init__(self, hotel=None):
+        self.hotel = hotel or cargar_hotel_info()
+        self.intenciones = self._construir_intenciones()
+        # Preguntas frecuentes textuales → respuesta directa
+        self.exactas = {
+            normalizar(faq['pregunta']): faq['respuesta']
+            for faq in self.hotel.get('preguntas_frecuentes', [])
+        }
+
+    def _construir_intenciones(self):
+        h = self.hotel
+        faq = {normalizar(f['pregunta']): f['respuesta'] for f in h.get('preguntas_frecuentes', [])}
+        servicios = {normalizar(s['nombre']): s for s in h['servicios']}
+        ubicacion = h['ubicacion']
+        horarios = h['horarios']
+        politicas = h['politicas']
+        pagos = h['formas_pago']
+        habitaciones = h['habitaciones']
+
+        def servicio(nombre):
+            s = servicios[nombre]
+            texto = f"Sí, contamos con {s['nombre'].lower()}: {s['descripcion'].lower()}"
+            if s.get('horario'):
+                texto += f", horario {s['horario']} hs"
+            if s.get('capacidad'):
+                texto += f" (capacidad: {s['capacidad']})"
+            texto += '. ' + ('Es un servicio gratuito para nuestros huéspedes.' if s.get('gratuito') else 'Es un servicio adicional con cargo.')
+            return texto
+
+        def habitacion(clave):
+            hab = habitaciones[clave]
+            precios = hab['precios']
+            return (
+                f"{hab['nombre']}: capacidad para {hab['capacidad_personas']} personas, "
+                f"{hab['metros_cuadrados']} m². Incluye {', '.join(s.lower() for s in hab['servicios'][:6])}. "
+                f"Precio por noche: {formatear_precio(precios['temporada_baja'])} en temporada baja y "
+                f"{formatear_precio(precios['temporada_alta'])} en temporada alta."
+            )
+
+        lista_habitaciones = '\n'.join(
+            f"- {hab['nombre']} (hasta {hab['capacidad_personas']} personas): "
+            f"desde {formatear_precio(hab['precios']['temporada_baja'])} por noche"
+            for hab in habitaciones.values()
+        )
+        mas_barata = min(habitaciones.values(), key=lambda hab: hab['precios']['temporada_baja'])
+        comodidades = habitaciones['matrimonial']['servicios']
+        alta = h['temporadas']['alta']
+        atracciones = '\n'.join(
+            f"- {a['nombre']} ({a['distancia_km']} km): {a['descripcion']}" for a in h['atracciones_cercanas']
+        )
+        accesibilidad = h['accesibilidad']
+
+        # (nombre, [(patrón, peso)], respuesta)
+        intenciones = [
+            ('ubicacion', [('direccion', 3), ('ubicad', 3), ('ubicacion', 3), ('donde esta', 3), ('donde queda', 3), ('como llego', 3)],
+             f"El {h['nombre']} está en {ubicacion['direccion']}, {ubicacion['ciudad']} (CP {ubicacion['codigo_postal']}), "
+             f"{ubicacion['provincia']}, {ubicacion['pais']}. {faq.get(normalizar('¿Está cerca del centro?'), '')}".strip()),
+            ('contacto', [('telefono del hotel', 3), ('contacto', 3), ('whatsapp', 3), ('mail del hotel', 3), ('email del hotel', 3)],
+             f"Podés contactarnos al {h['contacto']['telefono']}, por WhatsApp al {h['contacto']['whatsapp']} "
+             f"o por email a {h['contacto']['email']}."),
+            ('check_in_out', [('check in', 3), ('check out', 3), ('checkin', 3), ('checkout', 3), ('hora de entrada', 3), ('hora de salida', 3)],
+             f"El check-in es a partir de las {horarios['check_in']} hs y el check-out hasta las {horarios['check_out']} hs."),
+            ('desayuno', [('desayuno', 3)],
+             f"Sí, el desayuno {horarios['desayuno']['tipo'].lower()} está incluido en todas las tarifas y se sirve de "
+             f"{horarios['desayuno']['inicio']} a {horarios['desayuno']['fin']} hs."),
+            ('recepcion', [('recepcion', 3)],
+             f"Sí, la recepción atiende las {horarios['recepcion']}, todos los días."),
+            ('wifi', [('wifi', 3), ('wi fi', 3), ('internet', 3)],
+             faq[normalizar('¿Tienen WiFi?')]),
+            ('estacionamiento', [('estacionamiento', 3), ('estacionar', 3), ('cochera', 3), ('parking', 3)],
+             faq[normalizar('¿Tienen estacionamiento?')]),
+            ('piscina', [('piscina', 3), ('pileta', 3)],
+             faq[normalizar('¿Tienen piscina?')]),
+            ('gimnasio', [('gimnasio', 3), ('gym', 3)], servicio('gimnasio')),
+            ('conferencias', [('conferencia', 3), ('sala de reuniones', 3), ('eventos', 2)], servicio('sala de conferencias')),
+            ('room_service', [('room service', 3), ('servicio a la habitacion', 3)], servicio('room service')),
+            ('lavanderia', [('lavanderia', 3), ('planchado', 3)], servicio('lavanderia')),
+            ('limpieza', [('limpieza', 3)], servicio('servicio de limpieza')),
+            ('servicios', [('servicios', 3)],
+             'Nuestros servicios: ' + ', '.join(s['nombre'] for s in h['servicios']) + '.'),
+            ('cancelacion', [('cancela', 3)],
+             f"La cancelación es gratuita hasta {politicas['cancelacion']['gratuita_hasta']}. Después de ese plazo "
+             f"se cobra el {politicas['cancelacion']['cargo_cancelacion_tardia']}."),
+            ('mascotas', [('mascota', 3), ('perro', 3), ('gato', 3)],
+             faq[normalizar('¿Aceptan mascotas?')]),
+            ('ninos', [('nino', 3), ('chicos', 2), ('menores', 3), ('bebe', 3)],
+             f"Los niños menores de 5 años no pagan. De 5 a 12 años tienen {politicas['ninos']['de_5_a_12_anos']} "
+             f"y los mayores de 12 abonan {politicas['ninos']['mayores_12_anos'].lower()}."),
+            ('fumar', [('fumar', 3), ('fumador', 3), ('cigarr', 3)],
+             f"No se permite fumar en las habitaciones (multa de {formatear_precio(politicas['fumadores']['multa_por_fumar_habitacion'])}). "
+             f"Áreas designadas: {', '.join(politicas['fumadores']['areas_designadas'])}."),
+            ('garantia', [('necesito tarjeta', 3), ('requiere tarjeta', 3), ('tarjeta de credito', 1), ('garantia', 3), ('garantizar', 3)],
+             f"Sí, {politicas['garantia_reserva']['descripcion'].lower()}."),
+            ('formas_pago', [('pagar', 2), ('pago', 2), ('tarjeta', 1), ('efectivo', 2), ('transferencia', 2), ('cuotas', 2)],
+             f"{faq[normalizar('¿Qué formas de pago aceptan?')]} Tarjetas de crédito: {', '.join(pagos['tarjetas']['credito'])}. "
+             f"Débito: {', '.join(pagos['tarjetas']['debito'])}. Cuotas: {pagos['cuotas']['hasta']}."),
+            ('como_reservar', [('como hago una reserva', 3), ('como reservo', 3), ('como reservar', 3), ('para reservar', 3), ('hacer una reserva', 3)],
+             'Para hacer una reserva necesito: nombre, email, teléfono, tipo de habitación, fechas de check-in y '
+             'check-out y cantidad de huéspedes. También podés completar el formulario de reserva.'),
+            ('tipos_habitacion', [('tipos de habitacion', 3), ('que habitaciones', 3), ('tipo de habitaciones', 3), ('opciones de habitacion', 3)],
+             f"Tenemos estos tipos de habitación:\n{lista_habitaciones}"),
+            ('habitacion_matrimonial', [('matrimonial', 3)], habitacion('matrimonial')),
+            ('habitacion_doble', [('doble', 3)], habitacion('doble')),
+            ('habitacion_triple', [('triple', 3)],
+             habitacion('triple_matrimonial') + '\n' + habitacion('triple_individual')),
+            ('precios', [('mas barata', 3), ('mas economica', 3), ('precios', 2), ('tarifas', 2), ('cuesta', 1), ('cuanto sale', 1)],
+             f"La opción más económica es la {mas_barata['nombre']}, desde "
+             f"{formatear_precio(mas_barata['precios']['temporada_baja'])} por noche. Precios por tipo:\n{lista_habitaciones}"),
+            ('temporadas', [('temporada', 3)],
+             f"Temporada alta: diciembre a febrero, Semana Santa y feriados largos (aprox. {alta['incremento_porcentual']}% más). "
+             f"Temporada baja: {h['temporadas']['baja']['descripcion'].lower()}, con precios más accesibles. "
+             f"Por ejemplo, la {habitaciones['matrimonial']['nombre']} cuesta "
+             f"{formatear_precio(habitaciones['matrimonial']['precios']['temporada_baja'])} en baja y "
+             f"{formatear_precio(habitaciones['matrimonial']['precios']['temporada_alta'])} en alta."),
+            ('comodidades', [('aire acondicionado', 3), ('bano', 3), ('calefaccion', 3), ('televisor', 3), (' tv', 3), ('minibar', 3), ('caja de seguridad', 3)],
+             f"Sí, todas las habitaciones tienen {', '.join(s.lower() for s in comodidades)}."),
+            ('atracciones', [('atraccion', 3), ('que hay cerca', 3), ('lugares para visitar', 3), ('que visitar', 3), ('turismo', 3)],
+             f"Cerca del hotel:\n{atracciones}"),
+            ('accesibilidad', [('accesib', 3), ('silla de ruedas', 3), ('discapacidad', 3), ('rampa', 3), ('ascensor', 3)],
+             f"Sí, el hotel cuenta con rampas, ascensor accesible, baños adaptados y "
+             f"{accesibilidad['habitaciones_adaptadas']} habitaciones adaptadas."),
+        ]
+
+        return [
+            (nombre, [(' ' + normalizar(patron), peso) for patron, peso in patrones], respuesta)
+            for nombre, patrones, respuesta in intenciones
+        ]
+
+    def clasificar(self, mensaje):
+        """Devuelve [(puntaje, intención, respuesta)] ordenado de mayor a menor puntaje"""
+        texto = ' ' + normalizar(mensaje) + ' '
+        puntajes = []
+        for nombre, patrones, respuesta in self.intenciones:
+            puntaje = sum(peso for patron, peso in patrones if patron in texto)
+            if puntaje:
+                puntajes.append((puntaje, nombre, respuesta))
+        puntajes.sort(key=lambda p: p[0], reverse=True)
+        return puntajes
+
+    def respuesta_contingencia(self, mensaje):
+        """
+        Respuesta cuando el LLM no está disponible: lo más parecido que haya en el JSON
+        (sin exigir confianza) y los datos de contacto de recepción.
+        """
+        contacto = self.hotel.get('contacto', {})
+        partes = ['En este momento no puedo darte una respuesta completa.']
+        puntajes = self.clasificar(mensaje)
+        if puntajes:
+            partes.append('Esto es lo que te puedo contar:')
+            partes.extend(respuesta for _, _, respuesta in puntajes[:2])
+        partes.append(
+            f"Para reservas o consultas puntuales escribinos por WhatsApp al {contacto.get('whatsapp')}, "
+            f"llamanos al {contacto.get('telefono')} o escribí a {contacto.get('email')}."
+        )
+        return '\n\n'.join(partes)
+
+    def responder(self, mensaje, historial=None):
+        """
+        Devuelve {'respuesta', 'intencion', 'confianza'} si la consulta se puede
+        responder con confianza desde el JSON; None si hay que consultar al LLM.
+        Con historial, una respuesta a un pedido de datos de reserva ("La doble",
+        "el pago lo hago en efectivo") sigue la conversación en el LLM.
+        """
+        texto = normalizar(mensaje)
+        if not texto or recolectando_reserva(historial):
+            return None
+
+        if texto in self.exactas:
+            return {'respuesta': self.exactas[texto], 'intencion': 'pregunta_frecuente', 'confianza': 1.0}
+
+        # Consultas largas o con fechas/disponibilidad → LLM
+        if len(texto.split()) > MAX_PALABRAS or REGEX_FECHA.search(mensaje or ''):
+            return None
+        if any(' ' + patron in ' ' + texto for patron in PATRONES_DINAMICOS + PATRONES_GESTION):
+            return None
+
+        puntajes = self.clasificar(mensaje)
+        if not puntajes or puntajes[0][0] < UMBRAL_PUNTAJE:
+            return None
+
+        mejor = puntajes[0][0]
+        segundo = puntajes[1][0] if len(puntajes) > 1 else 0
+        if segundo >= mejor * MARGEN_SEGUNDO:
+            return None  # ambigua o varias preguntas juntas
+
+        return {
+            'respuesta': puntajes[0][2],
+            'intencion': puntajes[0][1],
+            'confianza': round(1 - segundo / mejor, 2)
+        }
@@ -0,0 +1,187 @@
+"""
+Sesiones de conversación del lado del servidor
+El cliente envía solo el mensaje nuevo y un session_id; el historial se guarda acá con
+un tope de mensajes por sesión, un presupuesto global de memoria y expiración por inactividad.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Costo fijo aproximado por mensaje guardado (tupla + deque), además del texto
+BYTES_POR_MENSAJE = 64
+
+
+class Sesion:
+    __slots__ = ('mensajes', 'bytes', 'ultimo_uso', 'datos')
+
+    def __init__(self, max_mensajes):
+        self.mensajes = deque(maxlen=max_mensajes)  # (rol, contenido)
+        self.bytes = 0
+        self.ultimo_uso = time.time()
+        self.datos = {}  # estado extra de la conversación (lo usan otras capas)
+
+
+def tamano_mensaje(contenido):
+    return len(contenido.encode('utf-8')) + BYTES_POR_MENSAJE
+
+
+class AlmacenSesiones:
+    """
+    Sesiones en memoria ordenadas por último uso (LRU).
+    Se expulsan las sesiones inactivas más de ttl_segundos y, si se supera max_bytes o
+    max_sesiones, las usadas hace más tiempo.
+    plegador(resumen, mensajes) → resumen (GestorContexto.plegar): todo mensaje que sale de la
+    sesión, porque llegó al tope o porque se plegó al armar el prompt, pasa por el resumen.
+    """
+
+    def __init__(self, max_mensajes=20, max_bytes=16 * 1024 * 1024, max_sesiones=10000, ttl_segundos=1800,
+                 plegador=None):
+        self.max_mensajes = max_mensajes
+        self.plegador = plegador
+        self.max_bytes = max_bytes
+        self.max_sesiones = max_sesiones
+        self.ttl_segundos = ttl_segundos
+
+        self._sesiones = OrderedDict()  # session_id → Sesion
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.creadas = 0
+        self.expiradas = 0
+        self.expulsadas = 0
+
+    def _purgar(self, ahora):
+        """Quita expiradas (desde la más vieja) y aplica los límites globales"""
+        while self._sesiones:
+            session_id, sesion = next(iter(self._sesiones.items()))
+            if ahora - sesion.ultimo_uso > self.ttl_segundos:
+                self._quitar(session_id)
+                self.expiradas += 1
+            elif self._bytes > self.max_bytes or len(self._sesiones) > self.max_sesiones:
+                self._quitar(session_id)
+                self.expulsadas += 1
+            else:
+                break
+
+    def _quitar(self, session_id):
+        sesion = self._sesiones.pop(session_id)
+        self._bytes -= sesion.bytes
+
+    def _sacar_primero(self, sesion):
+        """Quita el mensaje más viejo de la sesión descontando su tamaño"""
+        rol, contenido = sesion.mensajes.popleft()
+        tamano = tamano_mensaje(contenido)
+        sesion.bytes -= tamano
+        self._bytes -= tamano
+        return {'role': rol, 'content': contenido}
+
+    def _sumar_al_resumen(self, sesion, mensajes):
+        """Pliega los mensajes en el resumen guardado en la sesión (y actualiza su tamaño)"""
+        if not mensajes or self.plegador is None:
+            return
+        anterior = sesion.datos.get('resumen')
+        resumen = self.plegador(anterior, mensajes)
+        diferencia = tamano_mensaje(repr(resumen)) - (tamano_mensaje(repr(anterior)) if anterior else 0)
+        sesion.datos['resumen'] = resumen
+        sesion.bytes += diferencia
+        self._bytes += diferencia
+
+    def _tomar(self, session_id, ahora):
+        sesion = self._sesiones.get(session_id) if session_id else None
+        if sesion is None:
+            return None
+        if ahora - sesion.ultimo_uso > self.ttl_segundos:
+            self._quitar(session_id)
+            self.expiradas += 1
+            return None
+        sesion.ultimo_uso = ahora
+        self._sesiones.move_to_end(session_id)
+        return sesion
+
+    def obtener_o_crear(self, session_id=None):
+        """Devuelve un session_id válido: el recibido si sigue vivo, o uno nuevo"""
+        with self._lock:
+            ahora = time.time()
+            if self._tomar(session_id, ahora) is not None:
+                return session_id
+
+            session_id = secrets.token_urlsafe(16)
+            self._sesiones[session_id] = Sesion(self.max_mensajes)
+            self.creadas += 1
+            self._purgar(ahora)
+            return session_id
+
+    def historial(self, session_id):
+        """Mensajes de la sesión en el formato del frontend: [{'role', 'content'}]"""
+        with self._lock:
+            sesion = self._tomar(session_id, time.time())
+            if sesion is None:
+                return []
+            return [{'role': rol, 'content': contenido} for rol, contenido in sesion.mensajes]
+
+    def sesion(self, session_id):
+        """Objeto Sesion (para guardar estado extra en sesion.datos) o None"""
+        with self._lock:
+            return self._tomar(session_id, time.time())
+
+    def agregar(self, session_id, rol, contenido):
+        with self._lock:
+            ahora = time.time()
+            sesion = self._tomar(session_id, ahora)
+            if sesion is None:
+                return False
+
+            # Al llegar al tope el mensaje más viejo sale de la sesión: antes se pliega en el resumen
+            # (los turnos de FAQ, caché o contingencia no pasan por construir_contexto)
+            if len(sesion.mensajes) == sesion.mensajes.maxlen:
+                self._sumar_al_resumen(sesion, [self._sacar_primero(sesion)])
+
+            sesion.mensajes.append((rol, contenido))
+            tamano = tamano_mensaje(contenido)
+            sesion.bytes += tamano
+            self._bytes += tamano
+            self._purgar(ahora)
+            return True
+
+    def resumen(self, session_id):
+        """Resumen acumulado de los mensajes ya plegados (ver contexto.py) o None"""
+        with self._lock:
+            sesion = self._tomar(session_id, time.time())
+            return sesion.datos.get('resumen') if sesion else None
+
+    def plegar(self, session_id, mensajes):
+        """
+        Pasa al resumen los mensajes [{'role', 'content'}] plegados al armar un prompt (tomados de
+        historial() antes). Solo se quitan mientras sigan al principio de la sesión: si otro pedido
+        los plegó primero o salieron por el tope, ya están en el resumen y no se quita nada más.
+        Devuelve cuántos se plegaron.
+        """
+        with self._lock:
+            sesion = self._tomar(session_id, time.time())
+            if sesion is None:
+                return 0
+            sacados = []
+            for mensaje in mensajes:
+                if not sesion.mensajes or sesion.mensajes[0] != (mensaje.get('role'), mensaje.get('content')):
+                    break
+                sacados.append(self._sacar_primero(sesion))
+            self._sumar_al_resumen(sesion, sacados)
+            return len(sacados)
+
+    def agregar_turno(self, session_id, mensaje_usuario, respuesta):
+        self.agregar(session_id, 'user', mensaje_usuario)
+        self.agregar(session_id, 'assistant', respuesta)
+
+    def estadisticas(self):
+        return {
+            'sesiones_activas': len(self._sesiones),
+            'bytes_usados': self._bytes,
+            'max_bytes': self.max_bytes,
+            'max_mensajes_por_sesion': self.max_mensajes,
+            'ttl_segundos': self.ttl_segundos,
+            'creadas': self.creadas,
+            'expiradas': self.expiradas,
+            'expulsadas': self.expulsadas
+        }
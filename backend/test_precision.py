@@ -4,13 +4,18 @@ Este script prueba el chatbot con un conjunto de preguntas predefinidas
 y verifica si las respuestas contienen la información esperada.
 """
 
+import argparse
 import requests
 import json
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # URL del API
-API_URL = "http://localhost:5000/api/chat"
+SERVIDOR = "http://localhost:5000"
+API_URL = SERVIDOR + "/api/chat"
 
 # Dataset de pruebas - Lista de tuplas: (pregunta, palabras_clave_esperadas)
 DATASET_PRUEBAS = [
@@ -64,6 +69,26 @@ DATASET_PRUEBAS = [
     ("¿Las habitaciones tienen baño privado?", ["baño", "privado", "todas"]),
 ]
 
+# Conversaciones a mitad de una reserva - Lista de tuplas: (historial, mensaje, palabras_clave_esperadas)
+# El mensaje responde a lo que pidió el bot: tiene que seguir la reserva (LLM), nunca la respuesta fija de una FAQ
+PEDIDO_TIPO = [
+    {'role': 'user', 'content': 'Quiero reservar una habitación para el 10/03'},
+    {'role': 'assistant', 'content': '¡Perfecto! ¿Qué tipo de habitación preferís: matrimonial, doble o triple?'},
+]
+PEDIDO_DATOS = [
+    {'role': 'user', 'content': 'Quiero reservar la doble del 10/03 al 12/03'},
+    {'role': 'assistant', 'content': 'Genial. Para confirmar la reserva necesito tu nombre completo, email, '
+                                     'teléfono y la forma de pago. ¿Me los pasás?'},
+]
+DATASET_CONVERSACIONES = [
+    (PEDIDO_TIPO, "La doble", ["doble"]),
+    (PEDIDO_TIPO, "Perfecto, la triple", ["triple"]),
+    (PEDIDO_TIPO, "No quiero la matrimonial", ["doble", "triple"]),
+    (PEDIDO_DATOS, "el pago lo hago en efectivo", ["efectivo", "nombre", "email"]),
+    (PEDIDO_DATOS, "quiero cancelar la reserva que hice", ["reserva", "cancel"]),
+    ([], "quiero cancelar la reserva que hice", ["reserva", "cancel"]),
+]
+
 def verificar_respuesta(respuesta, palabras_clave):
     """
     Verifica si la respuesta contiene al menos una de las palabras clave esperadas
@@ -85,92 +110,159 @@ def verificar_respuesta(respuesta, palabras_clave):
     # Considera correcto si al menos 1 palabra clave está presente
     return coincidencias > 0
 
-def ejecutar_pruebas():
+def percentiles(valores):
+    """p50/p95/p99 (rango más cercano), media y máximo de una lista de latencias en ms"""
+    if not valores:
+        return {'p50': None, 'p95': None, 'p99': None, 'media': None, 'max': None}
+    ordenados = sorted(valores)
+    
+    def p(q):
+        return round(ordenados[max(0, -(-len(ordenados) * q // 100) - 1)], 2)
+    
+    return {
+        'p50': p(50), 'p95': p(95), 'p99': p(99),
+        'media': round(sum(ordenados) / len(ordenados), 2),
+        'max': round(ordenados[-1], 2)
+    }
+
+_local = threading.local()
+
+def sesion_http():
+    """Una sesión HTTP por hilo (reutiliza la conexión entre preguntas)"""
+    if not hasattr(_local, 'sesion'):
+        _local.sesion = requests.Session()
+    return _local.sesion
+
+def evaluar_pregunta(pregunta, palabras_clave, url=API_URL, timeout=30, historial=None):
+    """
+    Envía una pregunta al API y devuelve el resultado con su latencia.
+    Con historial (conversación a mitad de una reserva) la respuesta no puede venir del router de FAQ.
+    """
+    resultado = {'pregunta': pregunta, 'palabras_clave': palabras_clave, 'correcta': False}
+    inicio = time.perf_counter()
+    try:
+        response = sesion_http().post(
+            url,
+            json={
+                'message': pregunta, # la pregunta que haría el usuario
+                'history': historial or [] # vacío si no hay contexto previo
+            },
+            timeout=timeout
+        )
+        resultado['latencia_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+        resultado['status'] = response.status_code
+        
+        # Si la respuesta es correcta obtiene el texto del chatbot
+        if response.status_code == 200:
+            data = response.json()
+            respuesta = data.get('response', '')
+            resultado['respuesta'] = respuesta
+            resultado['origen'] = data.get('origen', 'gemini')  # faq = router local, gemini = LLM
+            resultado['correcta'] = (verificar_respuesta(respuesta, palabras_clave)
+                                     and not (historial and resultado['origen'] == 'faq'))
+        # Si hay error HTTP o de conexión, lo registra como incorrecto
+        else:
+            resultado['respuesta'] = f"Error: {response.status_code}"
+            resultado['error'] = True
+    except Exception as e:
+        resultado['latencia_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+        resultado['respuesta'] = f"Error: {str(e)}"
+        resultado['error'] = True
+    return resultado
+
+def resumir(resultados, duracion):
+    """Precisión, errores, throughput y percentiles de latencia (total, por origen y por pregunta)"""
+    total = len(resultados)
+    correctas = sum(r['correcta'] for r in resultados)
+    errores = sum(bool(r.get('error')) for r in resultados)
+    
+    por_origen = {}
+    por_pregunta = {}
+    for r in resultados:
+        if not r.get('error'):
+            por_origen.setdefault(r.get('origen', 'gemini'), []).append(r['latencia_ms'])
+        pregunta = por_pregunta.setdefault(r['pregunta'], {'latencias': [], 'correctas': 0, 'total': 0})
+        pregunta['latencias'].append(r['latencia_ms'])
+        pregunta['correctas'] += r['correcta']
+        pregunta['total'] += 1
+    
+    return {
+        'total_solicitudes': total,
+        'correctas': correctas,
+        'precision': round(correctas / total * 100, 2) if total else 0,
+        'errores': errores,
+        'tasa_errores': round(errores / total * 100, 2) if total else 0,
+        'duracion_s': round(duracion, 3),
+        'throughput_rps': round(total / duracion, 2) if duracion else 0,
+        'latencia_ms': percentiles([r['latencia_ms'] for r in resultados if not r.get('error')]),
+        'por_origen': {
+            origen: {'cantidad': len(latencias), **percentiles(latencias)}
+            for origen, latencias in por_origen.items()
+        },
+        'por_pregunta': [
+            {'pregunta': pregunta, 'correctas': datos['correctas'], 'total': datos['total'],
+             **percentiles(datos['latencias'])}
+            for pregunta, datos in por_pregunta.items()
+        ]
+    }
+
+def ejecutar_pruebas(workers=1, repeticiones=1, url=API_URL, timeout=30, salida=None):
     """
-    Ejecuta todas las pruebas y calcula la precisión
+    Ejecuta el dataset `repeticiones` veces con `workers` pedidos en paralelo.
+    Devuelve (precision, resultados, resumen) y guarda todo en un archivo JSON.
     """
     print("=" * 80)
     print("INICIANDO PRUEBAS DE PRECISIÓN DEL CHATBOT")
     print("=" * 80)
-    print(f"\nTotal de preguntas en el dataset: {len(DATASET_PRUEBAS)}\n")
+    print(f"\nTotal de preguntas en el dataset: {len(DATASET_PRUEBAS)} (+{len(DATASET_CONVERSACIONES)} a mitad de una reserva)")
+    print(f"Repeticiones: {repeticiones} | Pedidos en paralelo: {workers}\n")
     print("-" * 80)
     
+    casos = [(None, pregunta, palabras_clave) for pregunta, palabras_clave in DATASET_PRUEBAS]
+    casos += DATASET_CONVERSACIONES
+    tareas = [(rep, historial, pregunta, palabras_clave)
+              for rep in range(1, repeticiones + 1)
+              for historial, pregunta, palabras_clave in casos]
     resultados = []
-    correctas = 0
     
-    # Por cada pregunta evía una petición POST a la API
-    for i, (pregunta, palabras_clave) in enumerate(DATASET_PRUEBAS, 1):
-        print(f"\n[{i}/{len(DATASET_PRUEBAS)}] Pregunta: {pregunta}")
-        print(f"Palabras clave esperadas: {', '.join(palabras_clave)}")
-        
-        try:
-            # Hacer request al API
-            response = requests.post(
-                API_URL,
-                json={
-                    'message': pregunta, # la pregunta que haría el usuario
-                    'history': [] # vacío (no hay contexto previo)
-                },
-                timeout=30 # 30 segundos máximo para recibir respuesta
-            )
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as ejecutor:
+        futuros = {
+            ejecutor.submit(evaluar_pregunta, pregunta, palabras_clave, url, timeout, historial): rep
+            for rep, historial, pregunta, palabras_clave in tareas
+        }
+        for i, futuro in enumerate(as_completed(futuros), 1):
+            resultado = futuro.result()
+            resultado['repeticion'] = futuros[futuro]
+            resultados.append(resultado)
             
-            # Si la respuesta es correcta obtiene el texto del chatbot
-            if response.status_code == 200:
-                data = response.json()
-                respuesta = data.get('response', '')
-                
-                # Verificar si la respuesta es correcta
-                es_correcta = verificar_respuesta(respuesta, palabras_clave)
-                
-                if es_correcta:
-                    correctas += 1
-                    status = "✅ CORRECTO"
-                else:
-                    status = "❌ INCORRECTO"
-                
-                print(f"Respuesta: {respuesta[:150]}...")
-                print(f"Estado: {status}")
-                
-                resultados.append({
-                    'pregunta': pregunta,
-                    'respuesta': respuesta,
-                    'palabras_clave': palabras_clave,
-                    'correcta': es_correcta
-                })
-            # Si hay error HTTP o de conexión, lo registra como incorrecto
+            if resultado.get('error'):
+                status = "❌ ERROR"
             else:
-                print(f"❌ Error HTTP: {response.status_code}")
-                resultados.append({
-                    'pregunta': pregunta,
-                    'respuesta': f"Error: {response.status_code}",
-                    'palabras_clave': palabras_clave,
-                    'correcta': False
-                })
-        
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
-            resultados.append({
-                'pregunta': pregunta,
-                'respuesta': f"Error: {str(e)}",
-                'palabras_clave': palabras_clave,
-                'correcta': False
-            })
-        
-        # Espera 0.5 segundos antes de la siguiente prueba
-        time.sleep(0.5)
-        print("-" * 80)
+                status = "✅ CORRECTO" if resultado['correcta'] else "❌ INCORRECTO"
+            print(f"[{i}/{len(tareas)}] {status:<14} {resultado['latencia_ms']:>9.1f} ms "
+                  f"({resultado.get('origen', '-')}) {resultado['pregunta']}")
+            if not resultado['correcta']:
+                print(f"    Respuesta: {resultado['respuesta'][:150]}...")
+    duracion = time.perf_counter() - inicio
     
-    # Calcular precisión
-    precision = (correctas / len(DATASET_PRUEBAS)) * 100
+    resumen = resumir(resultados, duracion)
+    precision = resumen['precision']
+    latencia = resumen['latencia_ms']
     
     # Mostrar resultados finales
     print("\n" + "=" * 80)
     print("RESULTADOS FINALES")
     print("=" * 80)
-    print(f"\nTotal de preguntas: {len(DATASET_PRUEBAS)}")
-    print(f"Respuestas correctas: {correctas}")
-    print(f"Respuestas incorrectas: {len(DATASET_PRUEBAS) - correctas}")
+    print(f"\nTotal de solicitudes: {resumen['total_solicitudes']}")
+    print(f"Respuestas correctas: {resumen['correctas']}")
+    print(f"Respuestas incorrectas: {resumen['total_solicitudes'] - resumen['correctas']}")
+    print(f"Errores: {resumen['errores']} ({resumen['tasa_errores']:.2f}%)")
     print(f"\n🎯 PRECISIÓN ALCANZADA: {precision:.2f}%")
+    print(f"\n⏱️  Latencia (ms): p50 {latencia['p50']} | p95 {latencia['p95']} | p99 {latencia['p99']} | máx {latencia['max']}")
+    for origen, datos in resumen['por_origen'].items():
+        print(f"    {origen:<12} {datos['cantidad']:>4} resp. | p50 {datos['p50']} | p95 {datos['p95']} | p99 {datos['p99']}")
+    print(f"🚀 Throughput: {resumen['throughput_rps']:.2f} solicitudes/s en {resumen['duracion_s']:.1f} s")
     
     if precision >= 90:
         print("\n✅ ¡OBJETIVO CUMPLIDO! Precisión >= 90%")
@@ -179,38 +271,189 @@ def ejecutar_pruebas():
     
     # Guardar resultados en archivo JSON
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"resultados_precision_{timestamp}.json"
+    filename = salida or f"resultados_precision_{timestamp}.json"
     
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump({
             'timestamp': timestamp,
-            'total_preguntas': len(DATASET_PRUEBAS),
-            'correctas': correctas,
+            'configuracion': {'url': url, 'workers': workers, 'repeticiones': repeticiones, 'timeout': timeout},
+            'total_preguntas': len(DATASET_PRUEBAS) + len(DATASET_CONVERSACIONES),
+            'correctas': resumen['correctas'],
             'precision': precision,
-            'resultados': resultados
+            'resumen': resumen,
+            'resultados': sorted(resultados, key=lambda r: (r['repeticion'], r['pregunta']))
         }, f, ensure_ascii=False, indent=2)
     
     print(f"\n📁 Resultados guardados en: {filename}")
     print("=" * 80)
     
-    return precision, resultados
+    return precision, resultados, resumen
+
+def comparar_resultados(resumen, archivo_anterior, tolerancia=0.2, margen_ms=5.0):
+    """
+    Compara contra una corrida anterior (archivo JSON de ejecutar_pruebas).
+    Hay regresión si un percentil de latencia empeora más que `tolerancia` (proporción) y más
+    que `margen_ms`, si sube la tasa de errores o si baja la precisión.
+    Devuelve la lista de regresiones encontradas (vacía si no hay).
+    """
+    with open(archivo_anterior, encoding='utf-8') as f:
+        anterior = json.load(f).get('resumen', {})
+    
+    regresiones = []
+    for clave in ('p50', 'p95', 'p99'):
+        antes = (anterior.get('latencia_ms') or {}).get(clave)
+        ahora = resumen['latencia_ms'].get(clave)
+        if antes is None or ahora is None:
+            continue
+        if ahora > antes * (1 + tolerancia) and ahora - antes > margen_ms:
+            regresiones.append(f"Latencia {clave}: {antes} ms → {ahora} ms (+{(ahora / antes - 1) * 100:.0f}%)")
+    
+    if resumen['tasa_errores'] > anterior.get('tasa_errores', 0):
+        regresiones.append(f"Tasa de errores: {anterior.get('tasa_errores', 0)}% → {resumen['tasa_errores']}%")
+    if resumen['precision'] < anterior.get('precision', 0):
+        regresiones.append(f"Precisión: {anterior.get('precision')}% → {resumen['precision']}%")
+    return regresiones
+
+def evaluar_router():
+    """
+    Evalúa el router de preguntas frecuentes (router_faq.py) sin servidor ni Gemini.
+    El dataset de pruebas es el conjunto de aceptación: toda respuesta del router debe ser correcta.
+    """
+    from router_faq import RouterFAQ
+    
+    print("=" * 80)
+    print("EVALUACIÓN DEL ROUTER DE PREGUNTAS FRECUENTES (sin LLM)")
+    print("=" * 80)
+    
+    router = RouterFAQ()
+    respondidas = 0
+    correctas = 0
+    tiempo_total = 0
+    
+    for pregunta, palabras_clave in DATASET_PRUEBAS:
+        inicio = time.perf_counter()
+        resultado = router.responder(pregunta)
+        tiempo_total += time.perf_counter() - inicio
+        
+        if resultado is None:
+            print(f"➡️  Gemini    | {pregunta}")
+            continue
+        
+        respondidas += 1
+        es_correcta = verificar_respuesta(resultado['respuesta'], palabras_clave)
+        correctas += es_correcta
+        status = "✅" if es_correcta else "❌"
+        print(f"{status} {resultado['intencion']:<24} | {pregunta}")
+    
+    # A mitad de una reserva el router no tiene que contestar: la conversación sigue en el LLM
+    interrumpidas = 0
+    for historial, mensaje, _ in DATASET_CONVERSACIONES:
+        resultado = router.responder(mensaje, historial)
+        if resultado is None:
+            print(f"➡️  Gemini    | {mensaje} (a mitad de una reserva)")
+        else:
+            interrumpidas += 1
+            print(f"❌ {resultado['intencion']:<24} | {mensaje} (interrumpe la reserva)")
+    
+    cobertura = respondidas / len(DATASET_PRUEBAS) * 100
+    precision = (correctas / respondidas * 100) if respondidas else 0
+    
+    print("-" * 80)
+    print(f"Cobertura del router: {respondidas}/{len(DATASET_PRUEBAS)} ({cobertura:.2f}%)")
+    print(f"Precisión de lo respondido: {correctas}/{respondidas} ({precision:.2f}%)")
+    print(f"Reservas interrumpidas por una FAQ: {interrumpidas}/{len(DATASET_CONVERSACIONES)}")
+    print(f"Tiempo promedio por consulta: {tiempo_total / len(DATASET_PRUEBAS) * 1e6:.1f} µs")
+    
+    # Criterio de aceptación: el router nunca debe dar una respuesta incorrecta ni cortar una reserva
+    return respondidas == correctas and not interrumpidas
+
+def evaluar_sesiones():
+    """
+    Evalúa que ningún mensaje salga de una sesión (sesiones.py) sin pasar por su resumen,
+    sin servidor ni Gemini.
+    """
+    from contexto import GestorContexto
+    from sesiones import AlmacenSesiones
+    
+    print("=" * 80)
+    print("EVALUACIÓN DEL RESUMEN DE SESIONES (sin LLM)")
+    print("=" * 80)
+    
+    gestor = GestorContexto(max_mensajes=16)
+    sesiones = AlmacenSesiones(max_mensajes=20, plegador=gestor.plegar)
+    
+    # Un turno que pasa por Gemini con los datos de la reserva y después solo preguntas
+    # frecuentes: esos turnos no arman prompt, así que sus mensajes salen por el tope del deque
+    s1 = sesiones.obtener_o_crear()
+    sesiones.agregar_turno(s1, "Quiero reservar, mi email es juan@mail.com, del 10 al 12 de marzo",
+                           "Perfecto, ¿qué tipo de habitación prefiere?")
+    for _ in range(11):
+        sesiones.agregar_turno(s1, "¿A qué hora es el check-in?", "El check-in es a partir de las 15:00.")
+    
+    datos = (sesiones.resumen(s1) or {}).get('datos', {})
+    conserva = 'juan@mail.com' in datos.get('email', '') and 'marzo' in datos.get('fechas', '')
+    print(f"{'✅' if conserva else '❌'} Datos de la reserva tras 12 turnos: {datos}")
+    
+    # Dos pedidos que pliegan el mismo historial a la vez: se quita una sola vez
+    s2 = sesiones.obtener_o_crear()
+    for i in range(6):
+        sesiones.agregar_turno(s2, f"pregunta {i}", f"respuesta {i}")
+    historial = sesiones.historial(s2)
+    hilos = [threading.Thread(target=sesiones.plegar, args=(s2, historial[:4])) for _ in range(2)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    restantes = len(sesiones.historial(s2))
+    plegados = sesiones.resumen(s2)['lineas']
+    sin_duplicar = restantes == 8 and len(plegados) == 4
+    print(f"{'✅' if sin_duplicar else '❌'} Plegado concurrente: quedan {restantes}/8 mensajes, "
+          f"{len(plegados)}/4 en el resumen")
+    
+    return conserva and sin_duplicar
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precisión y latencia del chatbot")
+    parser.add_argument('--router', action='store_true', help='evalúa solo el router local, sin servidor')
+    parser.add_argument('--sesiones', action='store_true', help='evalúa solo el resumen de sesiones, sin servidor')
+    parser.add_argument('--servidor', default=SERVIDOR, help='URL base del backend')
+    parser.add_argument('--workers', type=int, default=1, help='pedidos en paralelo')
+    parser.add_argument('--repeticiones', type=int, default=1, help='veces que se corre el dataset')
+    parser.add_argument('--timeout', type=float, default=30, help='segundos máximos por pedido')
+    parser.add_argument('--salida', help='archivo JSON de resultados (por defecto resultados_precision_<fecha>.json)')
+    parser.add_argument('--comparar', help='JSON de una corrida anterior: falla si la latencia empeora')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='empeoramiento de latencia aceptado (0.2 = 20%%)')
+    parser.add_argument('--max-p95-ms', type=float, help='falla si la latencia p95 supera este valor')
+    args = parser.parse_args()
+    
+    # python test_precision.py --router → evalúa solo el router local, sin servidor
+    if args.router:
+        sys.exit(0 if evaluar_router() else 1)
+    # python test_precision.py --sesiones → evalúa solo el resumen de sesiones, sin servidor
+    if args.sesiones:
+        sys.exit(0 if evaluar_sesiones() else 1)
+    
     try:
         # Antes de correr las pruebas verifica que el servidor esté corriendo
         try:
-            health_check = requests.get("http://localhost:5000/api/health", timeout=5)
+            health_check = requests.get(f"{args.servidor}/api/health", timeout=5)
             if health_check.status_code != 200:
                 print("⚠️  ADVERTENCIA: El servidor no responde correctamente")
-                print("Asegúrate de que el backend esté corriendo en http://localhost:5000")
+                print(f"Asegúrate de que el backend esté corriendo en {args.servidor}")
                 exit(1)
         except:
             print("❌ ERROR: No se puede conectar al servidor")
-            print("Asegúrate de que el backend esté corriendo en http://localhost:5000")
+            print(f"Asegúrate de que el backend esté corriendo en {args.servidor}")
             exit(1)
         
         # Ejecutar pruebas
-        precision, resultados = ejecutar_pruebas()
+        precision, resultados, resumen = ejecutar_pruebas(
+            workers=args.workers,
+            repeticiones=args.repeticiones,
+            url=f"{args.servidor}/api/chat",
+            timeout=args.timeout,
+            salida=args.salida
+        )
         
         # Mostrar preguntas que fallaron
         if precision < 100:
@@ -222,8 +465,20 @@ if __name__ == "__main__":
                     print(f"\n❌ Pregunta: {r['pregunta']}")
                     print(f"   Esperaba: {', '.join(r['palabras_clave'])}")
                     print(f"   Obtuvo: {r['respuesta'][:100]}...")
+        
+        # Regresiones de latencia (para CI)
+        regresiones = comparar_resultados(resumen, args.comparar, args.tolerancia) if args.comparar else []
+        if args.max_p95_ms is not None and (resumen['latencia_ms']['p95'] or 0) > args.max_p95_ms:
+            regresiones.append(f"Latencia p95 {resumen['latencia_ms']['p95']} ms > {args.max_p95_ms} ms")
+        if regresiones:
+            print("\n" + "=" * 80)
+            print("REGRESIONES:")
+            print("=" * 80)
+            for regresion in regresiones:
+                print(f"❌ {regresion}")
+            sys.exit(1)
     
     except KeyboardInterrupt:
         print("\n\n⚠️  Pruebas interrumpidas por el usuario")
     except Exception as e:
-        print(f"\n\n❌ Error fatal: {str(e)}")
\ No newline at end of file
+        print(f"\n\n❌ Error fatal: {str(e)}")
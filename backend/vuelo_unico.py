@@ -0,0 +1,162 @@
+"""
+Agrupación de llamadas idénticas en curso (single-flight)
+Si llegan varios pedidos con el mismo prompt efectivo (instrucciones + secciones + historial +
+mensaje, normalizado) mientras el primero todavía espera a Gemini, los demás no hacen otra
+llamada: esperan la del primero y reciben el mismo resultado (o los mismos fragmentos).
+"""
+
+import hashlib
+import threading
+import time
+
+from limitador import TiempoAgotado
+from router_faq import normalizar
+
+
+class Interrumpida(Exception):
+    """El pedido que hacía la llamada compartida se cortó antes de terminar"""
+
+
+class _Vuelo:
+    __slots__ = ('condicion', 'terminado', 'resultado', 'error', 'fragmentos', 'seguidores', 'inicio')
+
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.condicion = threading.Condition()
+        self.terminado = False
+        self.resultado = None
+        self.error = None
+        self.fragmentos = []
+        self.seguidores = 0
+
+
+class VueloUnico:
+    """
+    Un vuelo por clave: el primer pedido (líder) hace la llamada y los que llegan mientras
+    tanto (seguidores) esperan su resultado. Al terminar la clave se libera.
+    """
+
+    def __init__(self, espera_maxima=30):
+        self.espera_maxima = espera_maxima
+        self._vuelos = {}
+        self._lock = threading.Lock()
+
+        self.llamadas = 0
+        self.deduplicadas = 0
+
+    @staticmethod
+    def clave(prompt):
+        """Clave del prompt efectivo: mayúsculas, tildes y puntuación no cambian la respuesta"""
+        return hashlib.sha1(normalizar(prompt).encode('utf-8')).hexdigest()
+
+    def _unirse(self, clave):
+        """Devuelve (vuelo, es_lider)"""
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            # Un vuelo más viejo que espera_maxima quedó abandonado (ej. un stream que nunca se leyó)
+            if vuelo is None or time.monotonic() - vuelo.inicio > self.espera_maxima:
+                vuelo = self._vuelos[clave] = _Vuelo()
+                self.llamadas += 1
+                return vuelo, True
+            vuelo.seguidores += 1
+            self.deduplicadas += 1
+            return vuelo, False
+
+    def _terminar(self, clave, vuelo, resultado=None, error=None):
+        with self._lock:
+            if self._vuelos.get(clave) is vuelo:
+                del self._vuelos[clave]
+        with vuelo.condicion:
+            vuelo.resultado = resultado
+            vuelo.error = error
+            vuelo.terminado = True
+            vuelo.condicion.notify_all()
+
+    def ejecutar(self, clave, funcion, *args, **kwargs):
+        """
+        Devuelve (resultado, compartido). compartido=True si se reutilizó la llamada de otro pedido.
+        Si la llamada del líder falla, todos reciben la misma excepción.
+        """
+        clave = 'resultado:' + clave
+        vuelo, lider = self._unirse(clave)
+        if lider:
+            try:
+                resultado = funcion(*args, **kwargs)
+            except BaseException as e:
+                self._terminar(clave, vuelo, error=e)
+                raise
+            self._terminar(clave, vuelo, resultado=resultado)
+            return resultado, False
+
+        with vuelo.condicion:
+            if not vuelo.condicion.wait_for(lambda: vuelo.terminado, timeout=self.espera_maxima):
+                raise TiempoAgotado(self.espera_maxima)
+        if vuelo.error is not None:
+            raise vuelo.error
+        return vuelo.resultado, True
+
+    def flujo(self, clave, crear_fragmentos):
+        """
+        Versión en streaming. crear_fragmentos() (solo la llama el líder, acá mismo, así sus
+        errores de admisión se propagan enseguida) devuelve el iterable de fragmentos.
+        Devuelve (generador, compartido): los seguidores reciben todos los fragmentos desde el primero.
+        """
+        clave = 'flujo:' + clave
+        vuelo, lider = self._unirse(clave)
+        if not lider:
+            return self._seguir(vuelo), True
+
+        try:
+            fuente = crear_fragmentos()
+        except BaseException as e:
+            self._terminar(clave, vuelo, error=e)
+            raise
+
+        def guiar():
+            error = None
+            try:
+                for fragmento in fuente:
+                    with vuelo.condicion:
+                        vuelo.fragmentos.append(fragmento)
+                        vuelo.condicion.notify_all()
+                    yield fragmento
+            except GeneratorExit:
+                error = Interrumpida('La respuesta compartida se interrumpió')
+                raise
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                self._terminar(clave, vuelo, error=error)
+
+        return guiar(), False
+
+    def _seguir(self, vuelo):
+        leidos = 0
+        limite = time.monotonic() + self.espera_maxima
+        while True:
+            with vuelo.condicion:
+                vuelo.condicion.wait_for(
+                    lambda: len(vuelo.fragmentos) > leidos or vuelo.terminado,
+                    timeout=max(limite - time.monotonic(), 0)
+                )
+                nuevos = vuelo.fragmentos[leidos:]
+                terminado = vuelo.terminado
+            if nuevos:
+                leidos += len(nuevos)
+                yield from nuevos
+            elif terminado:
+                if vuelo.error is not None:
+                    raise vuelo.error
+                return
+            else:
+                raise TiempoAgotado(self.espera_maxima)
+
+    def estadisticas(self):
+        pedidos = self.llamadas + self.deduplicadas
+        return {
+            'en_vuelo': len(self._vuelos),
+            'llamadas': self.llamadas,
+            'deduplicadas': self.deduplicadas,
+            'tasa_deduplicacion': round(self.deduplicadas / pedidos, 4) if pedidos else 0
+        }
@@ -14,6 +14,8 @@ const HotelChatbot = () => {
   const [isLoading, setIsLoading] = useState(false);
   const [isListening, setIsListening] = useState(false);
   const [showReservationForm, setShowReservationForm] = useState(false);
+  // El historial se guarda en el servidor: solo se envía el mensaje nuevo y el id de sesión
+  const [sessionId, setSessionId] = useState(null);
   const messagesEndRef = useRef(null);
   const recognitionRef = useRef(null);
 
@@ -103,26 +105,67 @@ const HotelChatbot = () => {
     setIsLoading(true);
 
     // El frontend hace llamadas HTTP al backend usando fetch. Por ejemplo, cuando el usuario envía un mensaje.
+    // Se usa /api/chat/stream (Server-Sent Events) para mostrar la respuesta a medida que se genera.
     try {
-      const response = await fetch('http://localhost:5000/api/chat', {
+      const response = await fetch('http://localhost:5000/api/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           message: messageText,
-          history: messages
+          session_id: sessionId
         })
       });
 
-      const data = await response.json();
+      if (!response.ok || !response.body) {
+        throw new Error(`HTTP ${response.status}`);
+      }
 
-      const assistantMessage = {
+      // Mensaje del asistente que se va completando con cada fragmento
+      setMessages(prev => [...prev, {
         role: 'assistant',
-        content: data.response,
-        imagenes: data.imagenes || [],
-        timestamp: data.timestamp
+        content: '',
+        imagenes: [],
+        timestamp: new Date().toISOString()
+      }]);
+
+      const actualizarUltimo = (cambios) => {
+        setMessages(prev => {
+          const copia = [...prev];
+          copia[copia.length - 1] = { ...copia[copia.length - 1], ...cambios(copia[copia.length - 1]) };
+          return copia;
+        });
       };
 
-      setMessages(prev => [...prev, assistantMessage]);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Cada evento SSE termina con una línea en blanco
+        const eventos = buffer.split('\n\n');
+        buffer = eventos.pop();
+
+        for (const bloque of eventos) {
+          const evento = bloque.match(/^event: (.*)$/m)?.[1];
+          const datos = JSON.parse(bloque.match(/^data: (.*)$/m)?.[1] || '{}');
+
+          if (evento === 'inicio') {
+            setIsLoading(false);
+            if (datos.session_id) setSessionId(datos.session_id);
+            actualizarUltimo(() => ({ imagenes: datos.imagenes || [] }));
+          } else if (evento === 'fragmento') {
+            actualizarUltimo(ultimo => ({ content: ultimo.content + datos.texto }));
+          } else if (evento === 'fin') {
+            actualizarUltimo(() => ({ content: datos.response, timestamp: datos.timestamp }));
+          } else if (evento === 'error') {
+            throw new Error(datos.error);
+          }
+        }
+      }
 
       // SÍNTESIS DE VOZ DESACTIVADA
       // if ('speechSynthesis' in window) {